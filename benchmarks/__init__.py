@@ -0,0 +1,6 @@
+"""
+Benchmark suite of ``osmipy``, to catch throughput regressions.
+
+Run it with ``python -m benchmarks run -o results.json``, and compare two runs with
+``python -m benchmarks compare baseline.json results.json``.
+"""
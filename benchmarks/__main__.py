@@ -0,0 +1,69 @@
+import argparse
+import sys
+
+from benchmarks import bench, corpora, memory
+
+
+def get_arguments_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__import__('benchmarks').__doc__)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run = subparsers.add_parser('run', help='run the benchmarks')
+    run.add_argument('-o', '--output', help='output (JSON) file', default='bench_results.json')
+    run.add_argument('-n', '--size', type=int, default=200, help='number of molecules per corpus')
+    run.add_argument('-r', '--repeat', type=int, default=3, help='number of runs (the best one is kept)')
+    run.add_argument('-s', '--seed', type=int, default=42, help='seed of the corpora')
+    run.add_argument('-b', '--benchmark', action='append', choices=sorted(bench.BENCHMARKS), help='benchmarks to run')
+    run.add_argument('-c', '--corpus', action='append', choices=sorted(corpora.CLASSES), help='corpora to use')
+
+    compare = subparsers.add_parser('compare', help='compare a run with a baseline')
+    compare.add_argument('baseline', help='baseline (JSON) file')
+    compare.add_argument('current', help='current (JSON) file')
+    compare.add_argument('-t', '--threshold', type=float, default=.1, help='relative slow-down to flag')
+
+    mem = subparsers.add_parser('memory', help='measure the memory used by the molecules')
+    mem.add_argument('-n', '--size', type=int, default=500, help='number of molecules per corpus')
+    mem.add_argument('-s', '--seed', type=int, default=42, help='seed of the corpora')
+    mem.add_argument('-c', '--corpus', action='append', choices=sorted(corpora.CLASSES), help='corpora to use')
+
+    return parser
+
+
+def main():
+    args = get_arguments_parser().parse_args()
+
+    if args.command == 'run':
+        results = bench.run(args.size, args.repeat, args.seed, args.benchmark, args.corpus)
+        bench.save(results, args.output)
+
+        for name, result in sorted(results['results'].items()):
+            print('{:45} {:10.4f} s {:12.0f} mol/s'.format(name, result['time'], result['molecules_per_second']))
+
+    elif args.command == 'compare':
+        comparison = bench.compare(bench.load(args.baseline), bench.load(args.current), args.threshold)
+        flagged = 0
+
+        for name, base_time, time, ratio, slower in comparison:
+            flagged += slower
+            print('{:45} {:10.4f} s {:10.4f} s {:7.2f}x{}'.format(
+                name, base_time, time, ratio, '  << SLOWER' if slower else ''))
+
+        if flagged:
+            print('{} benchmark(s) slower than the baseline (threshold: {:.0%})'.format(flagged, args.threshold))
+            return 1
+
+    elif args.command == 'memory':
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))  # the parser is recursive
+
+        for name in (args.corpus or sorted(corpora.CLASSES)):
+            r = memory.measure(corpora.corpus(name, args.size, args.seed))
+            print('{:15} {:8d} atoms  AST: {:10d} B  library: {:10d} B ({:.2f}x)  nodes: {} shared, {} local'.format(
+                name, r['atoms'], r['ast_bytes'], r['library_bytes'], r['ast_bytes'] / r['library_bytes'],
+                r['shared_nodes'], r['local_nodes']))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+The benchmarks, and the comparison of two runs.
+"""
+
+import json
+import platform
+import sys
+import time
+import warnings
+
+import osmipy
+from osmipy import lexer, smiles_parser, smiles, array_graph, adjacency
+
+from benchmarks import corpora
+
+
+# each benchmark gets the strings of the corpus and the corresponding (parsed) molecules
+
+def bench_lexer_tokenize(strings, molecules):
+    for s in strings:
+        for _ in lexer.Lexer(s).tokenize():
+            pass
+
+
+def bench_parser_smiles(strings, molecules):
+    for s in strings:
+        smiles_parser.Parser(lexer.Lexer(s)).smiles()
+
+
+def bench_interpreter_interpret(strings, molecules):
+    for m in molecules:
+        smiles.Interpreter(m.node).interpret()
+
+
+def bench_atom_ids_validate(strings, molecules):
+    for m in molecules:
+        smiles.AtomIdCheckAndUpdate(m.node).validate()
+
+
+def bench_smiles_add_fragment(strings, molecules):
+    for i in range(1, len(molecules)):
+        molecules[i - 1].add_fragment(molecules[i])
+
+
+def bench_implicit_hcount(strings, molecules):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # fractional bond orders in some cages
+        for m in molecules:
+            for ba, _, _, _ in array_graph.walk(m.node):
+                ba.implicit_hcount()
+
+
+def bench_adjacency_randomized(strings, molecules):
+    for m in molecules:
+        for _ in adjacency.AdjacencyIndex.from_smiles(m).randomized(10):
+            pass
+
+
+BENCHMARKS = {
+    'lexer.tokenize': bench_lexer_tokenize,
+    'parser.smiles': bench_parser_smiles,
+    'interpreter.interpret': bench_interpreter_interpret,
+    'atom_ids.validate': bench_atom_ids_validate,
+    'smiles.add_fragment': bench_smiles_add_fragment,
+    'implicit_hcount': bench_implicit_hcount,
+    'adjacency.randomized': bench_adjacency_randomized,
+}
+
+
+def run(size=200, repeat=3, seed=42, benchmarks=None, classes=None):
+    """Run the benchmarks on each corpus, and keep the best time of ``repeat`` runs
+
+    :param size: number of molecules per corpus
+    :type size: int
+    :param repeat: number of runs
+    :type repeat: int
+    :param seed: seed of the corpora
+    :type seed: int
+    :param benchmarks: benchmarks to run (if ``None``, all of them)
+    :type benchmarks: list of str
+    :param classes: corpora to use (if ``None``, all of them)
+    :type classes: list of str
+    :rtype: dict
+    """
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))  # the parser is recursive
+
+    results = {}
+
+    for corpus_name in (classes or sorted(corpora.CLASSES)):
+        strings = corpora.corpus(corpus_name, size, seed)
+        molecules = [smiles.SMILES(s) for s in strings]
+        n_atoms = sum(m.next_atom_id for m in molecules)
+
+        for bench_name in (benchmarks or sorted(BENCHMARKS)):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                BENCHMARKS[bench_name](strings, molecules)
+                times.append(time.perf_counter() - start)
+
+            best = min(times)
+            results['{}/{}'.format(bench_name, corpus_name)] = {
+                'time': best,
+                'molecules_per_second': len(molecules) / best,
+                'atoms_per_second': n_atoms / best,
+            }
+
+    return {
+        'meta': {
+            'osmipy': osmipy.__version__,
+            'python': platform.python_version(),
+            'size': size,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results
+    }
+
+
+def compare(baseline, current, threshold=.1):
+    """Compare two runs.
+
+    :param baseline: baseline run
+    :type baseline: dict
+    :param current: current run
+    :type current: dict
+    :param threshold: relative slow-down above which a benchmark is flagged
+    :type threshold: float
+    :return: list of ``(name, baseline time, current time, ratio, flagged)``, for benchmarks present in both runs
+    :rtype: list
+    """
+
+    comparison = []
+    for name, result in sorted(current['results'].items()):
+        if name not in baseline['results']:
+            continue
+
+        base_time = baseline['results'][name]['time']
+        ratio = result['time'] / base_time if base_time > 0 else 1.
+        comparison.append((name, base_time, result['time'], ratio, ratio > 1 + threshold))
+
+    return comparison
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
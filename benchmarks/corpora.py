@@ -0,0 +1,92 @@
+"""
+Deterministic synthetic corpora, by molecule-size classes.
+"""
+
+import random
+
+from osmipy import generate
+
+SUBSTITUENTS = ['C', 'O', 'N', 'F', 'Cl', 'Br', 'C(=O)O', 'C(F)(F)F', 'OC', 'N(C)C', 'C#N', '[N+](=O)[O-]']
+AROMATIC_RINGS = ['c1ccccc1', 'c1ccncc1', 'c1ccoc1', 'c1ccsc1', 'c1cc[nH]c1']
+LINKERS = ['C', 'CC', 'C(=O)N', 'NC(=O)', 'O', 'S(=O)(=O)', 'C=C', 'CC(C)']
+MONOMERS = ['CC(C)', 'CC(c1ccccc1)', 'CC(C(=O)OC)', 'CC(Cl)', 'OCC', 'CC(C#N)', 'C(F)(F)']
+
+
+def _substituted(rng, ring):
+    """Put a substituent on a ring"""
+    return ring[:2] + '(' + rng.choice(SUBSTITUENTS) + ')' + ring[2:] if rng.random() < .5 else ring
+
+
+def small_drugs(rng):
+    """Drug-like molecules, of 10 to 40 atoms"""
+    parts = [rng.choice(SUBSTITUENTS)]
+    for _ in range(rng.randint(1, 3)):
+        parts.append(rng.choice(LINKERS))
+        parts.append(_substituted(rng, rng.choice(AROMATIC_RINGS)))
+
+    if rng.random() < .3:
+        parts.append('.[Na+]' if rng.random() < .5 else '.Cl')
+
+    return ''.join(parts)
+
+
+def macrocycles(rng):
+    """Single rings of 12 to 30 atoms, with substituents"""
+    size = rng.randint(12, 30)
+    atoms = []
+    for i in range(size):
+        atom = rng.choice(['C', 'C', 'C', 'O', 'N'])
+        if rng.random() < .2:
+            atom += '(' + rng.choice(SUBSTITUENTS) + ')'
+        atoms.append(atom)
+
+    atoms[0] = 'C1'
+    atoms[-1] = 'C1'
+    return ''.join(atoms)
+
+
+def polymers(rng):
+    """Long chains of 50 to 150 monomers"""
+    return 'C' + ''.join(rng.choice(MONOMERS) for _ in range(rng.randint(50, 150))) + 'C'
+
+
+def cages(rng):
+    """Ring-dense structures (fused cubanes and adamantanes, linked together)"""
+    units = [
+        'C12C3C4C1C5C2C3C45',
+        'C1C2CC3CC1CC(C2)C3',
+        'c1cc2ccc3cccc4ccc(c1)c2c34',
+    ]
+    return 'C'.join(rng.choice(units) for _ in range(rng.randint(2, 8)))
+
+
+def generated(rng):
+    """Random (syntactically valid) molecules of 10 to 60 atoms, from ``osmipy.generate``"""
+    return generate.Generator(
+        seed=rng.random(), min_atoms=10, max_atoms=60, ring_density=.15, bracket_fraction=.15,
+        percent_fraction=.1).smiles()
+
+
+CLASSES = {
+    'small_drugs': small_drugs,
+    'macrocycles': macrocycles,
+    'polymers': polymers,
+    'cages': cages,
+    'generated': generated,
+}
+
+
+def corpus(name, size, seed=42):
+    """Get a corpus of a given class
+
+    :param name: name of the class (see ``CLASSES``)
+    :type name: str
+    :param size: number of molecules
+    :type size: int
+    :param seed: seed of the random number generator
+    :type seed: int
+    :rtype: list of str
+    """
+
+    rng = random.Random('{}-{}'.format(name, seed))
+    return [CLASSES[name](rng) for _ in range(size)]
@@ -0,0 +1,71 @@
+"""
+Memory used to keep a corpus in memory, as parsed molecules or in an ``osmipy.interning.Library``.
+"""
+
+import gc
+import tracemalloc
+
+from osmipy import smiles, interning
+
+
+def _allocated(build):
+    """Memory allocated by ``build()`` (and still used by its result)"""
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    return after - before, result
+
+
+def _local_nodes(library):
+    """Number of nodes that are specific to a molecule"""
+
+    n = 0
+    for root in library.roots:
+        stack = [] if root is None else [root]
+        while stack:
+            node = stack.pop()
+            if not node.interned:
+                n += 1
+                stack.extend(b for _, b in node.branches)
+                if node.right is not None:
+                    stack.append(node.right)
+
+    return n
+
+
+def measure(strings):
+    """Measure the memory used by the molecules of a corpus
+
+    :param strings: the corpus
+    :type strings: list of str
+    :return: the memory (in bytes) of the parsed molecules and of the library, and the number of nodes
+    :rtype: dict
+    """
+
+    molecules = [smiles.SMILES(s) for s in strings]
+
+    def build_library():
+        library = interning.Library()
+        for m in molecules:
+            library.add(m)
+        return library
+
+    ast_bytes, _ = _allocated(lambda: [smiles.SMILES(s) for s in strings])
+    library_bytes, library = _allocated(build_library)
+
+    return {
+        'molecules': len(strings),
+        'atoms': sum(m.next_atom_id for m in molecules),
+        'ast_bytes': ast_bytes,
+        'library_bytes': library_bytes,
+        'shared_nodes': library.number_of_nodes(),
+        'local_nodes': _local_nodes(library),
+    }
@@ -7,4 +7,6 @@ __version__ = '0.1a'
 __author__ = 'Pierre Beaujean'
 __maintainer__ = 'Pierre Beaujean'
 __email__ = 'pierre.beaujean@unamur.be'
-__status__ = 'Development'
\ No newline at end of file
+__status__ = 'Development'
+
+from osmipy.profiling import profile  # noqa
@@ -0,0 +1,381 @@
+"""
+Adjacency index of a molecule, and randomized SMILES.
+
+The index is built once from the array representation of the molecule (see ``osmipy.array_graph``): each atom gets
+its written form and its list of neighbours, with the bond as it should be written when going from this atom to the
+neighbour (directional bonds are reversed when needed).
+
+Randomized SMILES are then obtained by a depth-first traversal starting from a random atom of each fragment, visiting
+the neighbours in a random order (which gives a random order of the branches), without touching the AST:
+
+.. code-block:: python
+
+    from osmipy import smiles
+
+    s = smiles.SMILES('OC(=O)[C@@H](N)Cc1ccccc1')
+    variants = s.randomized(20, seed=42)
+
+Ring closures get the lowest free digit (``%nn`` above 9), and the chirality of the atoms is adapted to the new
+order of their neighbours.
+"""
+
+import heapq
+import random
+
+from osmipy import array_graph, smiles
+from osmipy.smiles_ast import Atom, Bond
+from osmipy.tokens import *
+
+MAX_RING_ID = 99
+
+INVERTED_CHIRALITY = array_graph.INVERTED_CHIRALITY
+
+RING_LABELS = [''] + [str(i) for i in range(1, 10)] + [PERCENT + str(i) for i in range(10, MAX_RING_ID + 1)]
+
+MERGING_SYMBOLS = frozenset(s for s in TOT_SYMBOLS if len(s) == 2)
+
+COLUMNS = ('parent', 'link', 'bond', 'symbol', 'isotope', 'chirality', 'hcount', 'charge', 'klass')
+
+
+class RingClosureException(Exception):
+    """Raised when a traversal needs more ring closures open at the same time than there are ring ids"""
+    pass
+
+
+def _next_ring_id(free_ids):
+    """Take the lowest free ring id
+
+    :param free_ids: the free ring ids (heap)
+    :type free_ids: list of int
+    :rtype: int
+    """
+
+    if not free_ids:
+        raise RingClosureException('more than {} ring closures are open at the same time'.format(MAX_RING_ID))
+
+    return heapq.heappop(free_ids)
+
+
+def _reverse(bond):
+    """Bond as written when going the other way"""
+    return Bond.invsign(bond) if bond in ['/', '\\'] else bond
+
+
+def _parity(reference, order):
+    """Parity of the permutation that gives ``order`` from ``reference``
+
+    :rtype: int
+    """
+
+    positions = [reference.index(x) for x in order]
+    inversions = 0
+    for i in range(len(positions)):
+        for j in range(i + 1, len(positions)):
+            if positions[i] > positions[j]:
+                inversions += 1
+
+    return inversions % 2
+
+
+class AdjacencyIndex:
+    """Adjacency index of a molecule
+
+    :param graph: the molecule
+    :type graph: osmipy.array_graph.ArrayGraph
+    """
+
+    def __init__(self, graph):
+        n = len(graph)
+        interpreter = smiles.Interpreter(None)
+
+        self.texts = []
+        self.inverted_texts = []
+        self.neighbours = [[] for _ in range(n)]
+        self.references = [None] * n  # order of the neighbours in the original string (for chiral atoms)
+        self.graph = graph  # see ``osmipy.subgraph``
+        self.positions = dict((atom_id, i) for i, atom_id in enumerate(graph.atom_id.tolist()))
+        self.distances = None  # see ``osmipy.topology``
+        self.double_bonds = None  # see ``osmipy.stereo``
+        self.ring_bond_conflicts = []  # ring bonds that are not written the same way on both sides
+
+        chiral = []
+
+        for index, (parent, link, bond, symbol, isotope, chirality, hcount, charge, klass) in enumerate(zip(
+                *(getattr(graph, c).tolist() for c in COLUMNS))):
+
+            atom = Atom(
+                symbol=array_graph.SYMBOLS[symbol],
+                isotope=isotope,
+                chirality=array_graph.CHIRALITIES[chirality],
+                hcount=hcount,
+                charge=charge,
+                klass=klass)
+
+            self.texts.append(interpreter.visit_atom(atom))
+            self.inverted_texts.append(None)
+
+            if atom.chirality in INVERTED_CHIRALITY:
+                atom.chirality = INVERTED_CHIRALITY[atom.chirality]
+                self.inverted_texts[index] = interpreter.visit_atom(atom)
+                chiral.append(index)
+
+            if link != array_graph.LINK_ROOT and array_graph.BONDS[bond] != DOT:
+                b = array_graph.BONDS[bond] or ''
+                self.neighbours[parent].append((index, b))
+                self.neighbours[index].append((parent, _reverse(b)))
+
+        # ring bonds: the bond may be given on the opening side, the closing side, or both
+        ring_bonds = {}
+        for owner, target, bond in zip(graph.rb_owner.tolist(), graph.rb_target.tolist(), graph.rb_bond.tolist()):
+            if target < 0:
+                continue
+
+            key = (owner, target) if owner < target else (target, owner)
+            b = array_graph.BONDS[bond] or ''
+            if owner > target:
+                b = _reverse(b)
+
+            if not ring_bonds.get(key):
+                ring_bonds[key] = b
+            elif b and b != ring_bonds[key]:
+                self.ring_bond_conflicts.append(key)
+
+        for (i, j), b in ring_bonds.items():
+            if all(k != j for k, _ in self.neighbours[i]):
+                self.neighbours[i].append((j, b))
+                self.neighbours[j].append((i, _reverse(b)))
+
+        self.adjacent = [[j for j, _ in n] for n in self.neighbours]
+        self.bonds = [dict(n) for n in self.neighbours]
+
+        # reference order of the neighbours of chiral atoms
+        for index in chiral:
+            self.references[index] = self._reference(graph, index)
+
+        # fragments
+        self.fragments = []
+        seen = [False] * n
+        for start in range(n):
+            if seen[start]:
+                continue
+
+            fragment = [start]
+            seen[start] = True
+            stack = [start]
+            while stack:
+                i = stack.pop()
+                for j, _ in self.neighbours[i]:
+                    if not seen[j]:
+                        seen[j] = True
+                        fragment.append(j)
+                        stack.append(j)
+
+            self.fragments.append(fragment)
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def from_smiles(cls, smi):
+        """Build the index of a SMILES object
+
+        :param smi: the molecule
+        :type smi: osmipy.smiles.SMILES
+        :rtype: AdjacencyIndex
+        """
+
+        return cls(smi.to_graph())
+
+    @staticmethod
+    def _reference(graph, index):
+        """Order of the neighbours of an atom in the original string (``-1`` being the implicit hydrogen)
+
+        :rtype: list of int
+        """
+
+        order = []
+        if graph.link[index] != array_graph.LINK_ROOT and array_graph.BONDS[graph.bond[index]] != DOT:
+            order.append(graph.parent[index])
+
+        if graph.hcount[index] > 0:
+            order.append(-1)
+
+        order.extend(t for o, t in zip(graph.rb_owner, graph.rb_target) if o == index and t > -1)
+
+        children = [
+            i for i in range(index + 1, len(graph))
+            if graph.parent[i] == index and array_graph.BONDS[graph.bond[i]] != DOT]
+
+        order.extend(i for i in children if graph.link[i] == array_graph.LINK_BRANCH)
+        order.extend(i for i in children if graph.link[i] == array_graph.LINK_CHAIN)
+
+        return order
+
+    def random_smiles(self, rng=None):
+        """Write a random SMILES of the molecule
+
+        :param rng: random number generator
+        :type rng: random.Random
+        :rtype: str
+        """
+
+        if rng is None:
+            rng = random
+
+        fragments = list(self.fragments)
+        rng.shuffle(fragments)
+
+        return DOT.join(self._write(rng.choice(fragment), rng) for fragment in fragments)
+
+    def randomized(self, n, rng=None, max_attempts=None):
+        """Give (at most) ``n`` distinct random SMILES of the molecule.
+
+        Since small or symmetric molecules may not have that many different spellings, the generation stops after
+        ``max_attempts`` trials (by default, ``10 * n``).
+
+        :param n: number of SMILES
+        :type n: int
+        :param rng: random number generator
+        :type rng: random.Random
+        :param max_attempts: maximum number of trials
+        :type max_attempts: int
+        :rtype: collections.Iterable[str]
+        """
+
+        if max_attempts is None:
+            max_attempts = 10 * n
+
+        seen = set()
+        attempts = 0
+
+        while len(seen) < n and attempts < max_attempts:
+            attempts += 1
+            s = self.random_smiles(rng)
+            if s not in seen:
+                seen.add(s)
+                yield s
+
+    def _write(self, root, rng):
+        """Write a fragment, starting from ``root``
+
+        :rtype: str
+        """
+
+        adjacent = self.adjacent
+        n = len(adjacent)
+
+        # 1. random DFS, to get the spanning tree and the ring closures
+        from_atom = [-1] * n
+        children = [None] * n
+        rings = [None] * n  # partners of the ring closures, in the order in which they are written
+        order = []
+        stack = [root]
+
+        while stack:
+            i = stack.pop()
+            if children[i] is not None:
+                continue
+
+            order.append(i)
+            children[i] = []
+            if rings[i] is None:
+                rings[i] = []
+
+            candidates = adjacent[i]
+            if len(candidates) > 1:
+                candidates = list(candidates)
+                rng.shuffle(candidates)
+
+            for j in candidates:
+                if j == from_atom[i]:
+                    continue
+                if children[j] is not None:  # already visited: ring closure
+                    rings[j].append(i)
+                    rings[i].append(j)
+                else:
+                    from_atom[j] = i
+                    stack.append(j)
+
+        # (an atom pushed more than once is attached to the last atom that pushed it, which is the one that visited it)
+        for i in order[1:]:
+            children[from_atom[i]].append(i)
+
+        # 2. write, in the same order
+        bonds = self.bonds
+        texts = self.texts
+        references = self.references
+        pieces = []
+        free_ids = list(range(1, MAX_RING_ID + 1))
+        open_rings = {}
+        to_write = [(root, '')]
+
+        while to_write:
+            item = to_write.pop()
+            if type(item) is str:
+                pieces.append(item)
+                continue
+
+            i, bond = item
+            text = texts[i]
+
+            if references[i] is not None:
+                new_order = [] if from_atom[i] < 0 else [from_atom[i]]
+                if -1 in references[i]:
+                    new_order.append(-1)
+                new_order.extend(rings[i])
+                new_order.extend(children[i])
+                if _parity(references[i], new_order):
+                    text = self.inverted_texts[i]
+
+            # avoid ``C`` followed by ``n`` to be read as ``Cn``
+            if not bond and pieces and len(pieces[-1]) == 1 and pieces[-1] + text[0] in MERGING_SYMBOLS:
+                bond = MINUS
+
+            pieces.append(bond)
+            pieces.append(text)
+
+            if rings[i]:
+                released = []
+                for j in rings[i]:
+                    if (j, i) in open_rings:
+                        ring_id = open_rings.pop((j, i))
+                        released.append(ring_id)
+                        pieces.append(RING_LABELS[ring_id])
+                    else:
+                        ring_id = _next_ring_id(free_ids)
+                        open_rings[(i, j)] = ring_id
+                        pieces.append(bonds[i][j])
+                        pieces.append(RING_LABELS[ring_id])
+
+                for ring_id in released:
+                    heapq.heappush(free_ids, ring_id)
+
+            c = children[i]
+            if c:
+                to_write.append((c[-1], bonds[i][c[-1]]))
+                for j in reversed(c[:-1]):
+                    to_write.append(RPAR)
+                    to_write.append((j, bonds[i][j]))
+                    to_write.append(LPAR)
+
+        return ''.join(pieces)
+
+
+def iter_randomized(molecules, n, seed=None):
+    """Stream random SMILES for a list of molecules
+
+    :param molecules: the molecules
+    :type molecules: collections.Iterable[osmipy.smiles.SMILES|osmipy.array_graph.ArrayGraph]
+    :param n: number of SMILES per molecule
+    :type n: int
+    :param seed: seed of the random number generator
+    :return: for each molecule, its index and the SMILES
+    :rtype: collections.Iterable[tuple(int, str)]
+    """
+
+    rng = random.Random(seed)
+
+    for i, molecule in enumerate(molecules):
+        index = AdjacencyIndex(molecule) if type(molecule) is array_graph.ArrayGraph else molecule.adjacency()
+        for s in index.randomized(n, rng):
+            yield i, s
@@ -0,0 +1,188 @@
+"""
+Parsing from ``asyncio`` code, without blocking the event loop.
+
+The parsing is done in an executor (by default, the one of the event loop, which is a pool of threads), which can
+be a ``concurrent.futures.ProcessPoolExecutor`` to use several cores: the molecules are then sent back in their binary
+form (see ``osmipy.array_graph``).
+
+.. code-block:: python
+
+    from osmipy import aio
+
+    molecule = await aio.parse('c1ccccc1C(=O)O')
+
+    async for molecule in aio.parse_stream(records, executor=pool):
+        ...
+
+``parse_stream()`` reads the records (from any asynchronous iterable) into a bounded queue, and sends them to the
+executor by batches (of the records that are available, up to ``batch_size``), with a bounded number of batches being
+parsed at the same time: when the consumer or the executor is too slow, the reading of the input stops.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+
+from osmipy import smiles, smiles_parser
+
+_END = object()
+
+
+def _parse_batch(records, serialize):
+    """Parse a batch of records (in the executor)
+
+    :param records: the records
+    :type records: list of str
+    :param serialize: give the molecules in their binary form
+    :type serialize: bool
+    :return: the molecules (or their binary form), and the errors, as ``(position in the batch, error)``
+    :rtype: tuple
+    """
+
+    molecules = []
+    errors = []
+
+    for i, record in enumerate(records):
+        try:
+            molecules.append(smiles.SMILES(record))
+        except smiles_parser.ERRORS as e:
+            errors.append((i, e))
+
+    return (smiles.dumps(molecules) if serialize else molecules), errors
+
+
+async def _run(executor, records):
+    """Parse a batch in the executor
+
+    :rtype: tuple(list, list)
+    """
+
+    serialize = isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+    result = await asyncio.get_running_loop().run_in_executor(executor, _parse_batch, records, serialize)
+
+    molecules, errors = result
+    if serialize:
+        molecules = smiles.loads(molecules)
+
+    # put the invalid records back in place
+    if errors:
+        molecules = iter(molecules)
+        failed = dict(errors)
+        molecules = [None if i in failed else next(molecules) for i in range(len(records))]
+
+    return molecules, errors
+
+
+async def parse(text, executor=None):
+    """Parse a string in an executor
+
+    :param text: the string
+    :type text: str
+    :param executor: the executor (by default, the one of the event loop)
+    :type executor: concurrent.futures.Executor
+    :rtype: osmipy.smiles.SMILES
+    """
+
+    molecules, errors = await _run(executor, [text])
+    if errors:
+        raise errors[0][1]
+
+    return molecules[0]
+
+
+async def _read(records, queue):
+    """Put the records in the queue (waiting when it is full), then ``_END``"""
+
+    async for record in records:
+        await queue.put(record)
+
+    await queue.put(_END)
+
+
+async def parse_stream(
+        records, executor=None, ordered=True, batch_size=64, max_batches=4, queue_size=None, errors=None,
+        indexed=False):
+    """Parse a stream of records in an executor
+
+    :param records: the records
+    :type records: collections.AsyncIterable[str]
+    :param executor: the executor (by default, the one of the event loop)
+    :type executor: concurrent.futures.Executor
+    :param ordered: give the molecules in the order of the records (otherwise, as soon as their batch is parsed)
+    :type ordered: bool
+    :param batch_size: maximum number of records sent at once to the executor
+    :type batch_size: int
+    :param max_batches: maximum number of batches that are parsed at the same time
+    :type max_batches: int
+    :param queue_size: maximum number of records that are read in advance (by default, ``batch_size``)
+    :type queue_size: int
+    :param errors: if a list is given, the invalid records are skipped, and ``(index, error)`` is added to it
+        (otherwise, the error is raised)
+    :type errors: list
+    :param indexed: give ``(index of the record, molecule)`` instead of the molecule
+    :type indexed: bool
+    :rtype: collections.AsyncIterable[osmipy.smiles.SMILES]
+    """
+
+    queue = asyncio.Queue(queue_size or batch_size)
+    reader = asyncio.ensure_future(_read(records, queue))
+    getter = None
+    batches = collections.deque()  # (index of the first record, task)
+    next_index = 0
+    end = False
+
+    try:
+        while not end or batches:
+            if not end and getter is None and len(batches) < max_batches:
+                getter = asyncio.ensure_future(queue.get())
+
+            waiting = [task for _, task in batches] + [t for t in (getter, reader) if t is not None and not t.done()]
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            if reader.done() and reader.exception() is not None:
+                raise reader.exception()
+
+            # new batch
+            if getter is not None and getter.done():
+                batch = [getter.result()]
+                getter = None
+
+                while len(batch) < batch_size and batch[-1] is not _END and not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                if batch[-1] is _END:
+                    end = True
+                    batch.pop()
+
+                if batch:
+                    batches.append((next_index, asyncio.ensure_future(_run(executor, batch))))
+                    next_index += len(batch)
+
+            # parsed batches
+            while batches:
+                if ordered:
+                    if not batches[0][1].done():
+                        break
+                    first, task = batches.popleft()
+                else:
+                    k = next((k for k, (_, t) in enumerate(batches) if t.done()), None)
+                    if k is None:
+                        break
+                    first, task = batches[k]
+                    del batches[k]
+
+                molecules, batch_errors = task.result()
+                if batch_errors:
+                    if errors is None:
+                        raise batch_errors[0][1]
+                    errors.extend((first + i, e) for i, e in batch_errors)
+
+                for i, molecule in enumerate(molecules, start=first):
+                    if molecule is not None:
+                        yield (i, molecule) if indexed else molecule
+    finally:
+        reader.cancel()
+        if getter is not None:
+            getter.cancel()
+        for _, task in batches:
+            task.cancel()
@@ -0,0 +1,360 @@
+"""
+Compact representation of the AST as a set of fixed-width arrays, and the corresponding (versioned) binary format.
+
+The atoms are stored in the order of the traversal (which is also the order of the atoms in the string), each with
+the index of the atom it is attached to (``parent``), the way it is attached (``link``: root, continuation of the chain
+or first atom of a branch) and the bond of this attachment.
+The ring bonds are stored in a separate set of arrays, in the order of the traversal, with the index of their owner
+and of their target.
+"""
+
+import array
+import struct
+import sys
+
+from osmipy.smiles_ast import Chain, BranchedAtom, Branch, RingBond, Atom, Bond, BOND_SYMBOLS
+from osmipy.tokens import *
+
+SYMBOLS = tuple(TOT_SYMBOLS + [WILDCARD])
+SYMBOL_CODES = dict((s, i) for i, s in enumerate(SYMBOLS))
+
+BONDS = BOND_SYMBOLS
+BOND_CODES = dict((s, i) for i, s in enumerate(BONDS))
+
+CHIRALITIES = (None, '@', '@@')
+CHIRALITY_CODES = dict((s, i) for i, s in enumerate(CHIRALITIES))
+
+INVERTED_CHIRALITY = {'@': '@@', '@@': '@'}
+INVERTED_CHIRALITY_CODES = dict((CHIRALITY_CODES[a], CHIRALITY_CODES[b]) for a, b in INVERTED_CHIRALITY.items())
+
+LINK_ROOT, LINK_CHAIN, LINK_BRANCH = 0, 1, 2
+
+VERSION = 1
+MAGIC = b'OSMI'
+HEADER = struct.Struct('<4sHHiII')  # magic, version, flags, next_atom_id, number of atoms, number of ring bonds
+
+BATCH_MAGIC = b'OSMB'
+BATCH_HEADER = struct.Struct('<4sHHQ')  # magic, version, flags, number of records
+
+# (name, typecode) of the columns, in the order of the binary format (largest items first, to keep them aligned)
+ATOMS_COLUMNS_I32 = ('atom_id', 'parent', 'klass')
+RING_BONDS_COLUMNS_I32 = ('rb_owner', 'rb_target')
+ATOMS_COLUMNS_U16 = ('isotope', )
+ATOMS_COLUMNS_U8 = ('link', 'bond', 'symbol', 'chirality', 'hcount', 'charge', 'ring_bonds')
+RING_BONDS_COLUMNS_U8 = ('rb_ring_id', 'rb_bond')
+
+TYPECODES = {
+    'atom_id': 'i', 'parent': 'i', 'klass': 'i',
+    'rb_owner': 'i', 'rb_target': 'i',
+    'isotope': 'H',
+    'link': 'B', 'bond': 'B', 'symbol': 'B', 'chirality': 'B', 'hcount': 'B', 'charge': 'b', 'ring_bonds': 'B',
+    'rb_ring_id': 'B', 'rb_bond': 'B'
+}
+
+COLUMNS = ATOMS_COLUMNS_I32 + RING_BONDS_COLUMNS_I32 + ATOMS_COLUMNS_U16 + ATOMS_COLUMNS_U8 + RING_BONDS_COLUMNS_U8
+RING_BONDS_COLUMNS = RING_BONDS_COLUMNS_I32 + RING_BONDS_COLUMNS_U8
+
+
+class ArrayGraphException(Exception):
+    pass
+
+
+def walk(node):
+    """Iterate over the branched atoms of an AST, in the order of the string (without recursion).
+
+    Gives, for each of them, a tuple ``(branched_atom, parent_index, link, bond)``.
+
+    :param node: the AST
+    :type node: osmipy.smiles_ast.Chain
+    """
+
+    if node is None:
+        return
+
+    stack = [(node, -1, LINK_ROOT, None)]
+    index = 0
+
+    while stack:
+        chain, parent, link, bond = stack.pop()
+        ba = chain.left
+        yield ba, parent, link, bond
+
+        if chain.right is not None:
+            stack.append((chain.right, index, LINK_CHAIN, chain.bond))
+
+        for branch in reversed(ba.branches):
+            stack.append((branch.chain, index, LINK_BRANCH, branch.bond))
+
+        index += 1
+
+
+ITEM_SIZES = dict((c, struct.calcsize(t)) for c, t in TYPECODES.items())
+
+AST_COLUMNS = ('atom_id', 'parent', 'link', 'bond', 'symbol', 'isotope', 'chirality', 'hcount', 'charge', 'klass')
+
+
+class ArrayGraph:
+    """Molecule stored as arrays (see the module documentation).
+
+    The columns are ``array.array`` (or ``memoryview``, if the graph is a view of a buffer) of the same length, with
+    one item per atom (``atom_id``, ``parent``, ``link``, ``bond``, ``symbol``, ``isotope``, ``chirality``, ``hcount``,
+    ``charge``, ``klass`` and the number of ``ring_bonds``) or per ring bond (``rb_owner``, ``rb_target``,
+    ``rb_ring_id`` and ``rb_bond``).
+    Symbols, bonds and chiralities are stored as their index in ``SYMBOLS``, ``BONDS`` and ``CHIRALITIES``.
+
+    :param next_atom_id: next atom id
+    :type next_atom_id: int
+    :param columns: columns (if not given, empty arrays are created)
+    :type columns: dict
+    """
+
+    def __init__(self, next_atom_id=0, columns=None):
+        self.next_atom_id = next_atom_id
+
+        for column in COLUMNS:
+            setattr(self, column, array.array(TYPECODES[column]) if columns is None else columns[column])
+
+    def __len__(self):
+        return len(self.atom_id)
+
+    def number_of_ring_bonds(self):
+        return len(self.rb_owner)
+
+    def nbytes(self):
+        """Size of the binary representation
+
+        :rtype: int
+        """
+
+        return HEADER.size + \
+            sum(ITEM_SIZES[c] for c in COLUMNS if c not in RING_BONDS_COLUMNS) * len(self) + \
+            sum(ITEM_SIZES[c] for c in RING_BONDS_COLUMNS) * self.number_of_ring_bonds()
+
+    def symbols(self):
+        """Get the symbols of the atoms
+
+        :rtype: list of str
+        """
+
+        return [SYMBOLS[s] for s in self.symbol]
+
+    @classmethod
+    def from_ast(cls, node, next_atom_id=None):
+        """Create the arrays from an AST
+
+        :param node: the AST
+        :type node: osmipy.smiles_ast.Chain
+        :param next_atom_id: next atom id (if ``None``, the largest atom id plus one)
+        :type next_atom_id: int
+        :rtype: ArrayGraph
+        """
+
+        g = cls()
+        indices = {}
+        ring_bonds = []
+
+        try:
+            for ba, parent, link, bond in walk(node):
+                atom = ba.atom
+                spec = atom.spec
+                indices[id(atom)] = len(g.atom_id)  # (shared by the views, see ``SMILES.fragments()``)
+
+                g.atom_id.append(atom.atom_id)
+                g.parent.append(parent)
+                g.link.append(link)
+                g.bond.append(0 if bond is None else BOND_CODES[bond.symbol])
+                g.symbol.append(SYMBOL_CODES[spec.symbol])
+                g.isotope.append(spec.isotope)
+                g.chirality.append(CHIRALITY_CODES[spec.chirality])
+                g.hcount.append(spec.hcount)
+                g.charge.append(spec.charge)
+                g.klass.append(spec.klass)
+                g.ring_bonds.append(len(ba.ring_bonds))
+
+                ring_bonds.extend(ba.ring_bonds)
+
+            for rb in ring_bonds:
+                g.rb_owner.append(indices[id(rb.parent.atom)])
+                g.rb_target.append(-1 if rb.target is None else indices[id(rb.target.atom)])
+                g.rb_ring_id.append(rb.ring_id)
+                g.rb_bond.append(BOND_CODES[None if rb.bond is None else rb.bond.symbol])
+        except (KeyError, OverflowError) as e:
+            raise ArrayGraphException('cannot store AST: {}'.format(e))
+
+        if next_atom_id is None:
+            next_atom_id = max(g.atom_id, default=-1) + 1
+
+        g.next_atom_id = next_atom_id
+
+        return g
+
+    def to_ast(self):
+        """Create the AST
+
+        :return: the AST and the atoms, in the order of the arrays
+        :rtype: tuple(osmipy.smiles_ast.Chain, list)
+        """
+
+        branched_atoms = []
+        chains = []
+        atoms = []
+
+        for atom_id, parent, link, bond, symbol, isotope, chirality, hcount, charge, klass in zip(
+                *(getattr(self, c).tolist() for c in AST_COLUMNS)):
+
+            atom = Atom(
+                symbol=SYMBOLS[symbol],
+                isotope=isotope,
+                chirality=CHIRALITIES[chirality],
+                hcount=hcount,
+                charge=charge,
+                klass=klass,
+                atom_id=atom_id)
+
+            ba = BranchedAtom(atom)
+            chain = Chain(ba)
+
+            if link == LINK_CHAIN:
+                parent_chain = chains[parent]
+                parent_chain.right = chain
+                chain.parent = parent_chain
+                if bond != 0:
+                    parent_chain.bond = Bond(BONDS[bond])
+                    parent_chain.bond.parent = parent_chain
+            elif link == LINK_BRANCH:
+                branch = Branch(chain, None if bond == 0 else Bond(BONDS[bond]))
+                parent_ba = branched_atoms[parent]
+                branch.parent = parent_ba
+                parent_ba.branches.append(branch)
+
+            branched_atoms.append(ba)
+            chains.append(chain)
+            atoms.append(atom)
+
+        for owner, target, ring_id, bond in zip(
+                self.rb_owner.tolist(), self.rb_target.tolist(), self.rb_ring_id.tolist(), self.rb_bond.tolist()):
+            rb = RingBond(ring_id, None if bond == 0 else Bond(BONDS[bond]))
+            if target > -1:
+                rb.target = branched_atoms[target]
+
+            owner_ba = branched_atoms[owner]
+            rb.parent = owner_ba
+            owner_ba.ring_bonds.append(rb)
+
+        return chains[0] if len(chains) > 0 else None, atoms
+
+    def to_bytes(self):
+        """Get the binary representation
+
+        :rtype: bytes
+        """
+
+        columns = []
+        for column in COLUMNS:
+            data = getattr(self, column)
+            if type(data) is not array.array:
+                data = array.array(TYPECODES[column], data)
+            if sys.byteorder == 'big':
+                data = array.array(TYPECODES[column], data)
+                data.byteswap()
+            columns.append(data.tobytes())
+
+        return HEADER.pack(MAGIC, VERSION, 0, self.next_atom_id, len(self), self.number_of_ring_bonds()) + \
+            b''.join(columns)
+
+    @classmethod
+    def from_buffer(cls, buffer, offset=0):
+        """Create a graph from a binary representation.
+
+        Unless the platform is big-endian, the columns are ``memoryview`` of the buffer, so that nothing is copied
+        (thus, the buffer must stay valid as long as the graph is used).
+
+        :param buffer: the buffer (``bytes``, ``mmap``, ...)
+        :param offset: offset of the record in the buffer
+        :type offset: int
+        :rtype: ArrayGraph
+        """
+
+        magic, version, _, next_atom_id, n_atoms, n_ring_bonds = HEADER.unpack_from(buffer, offset)
+
+        if magic != MAGIC:
+            raise ArrayGraphException('not a graph record')
+        if version != VERSION:
+            raise ArrayGraphException('unsupported version {}'.format(version))
+
+        view = memoryview(buffer)
+        position = offset + HEADER.size
+        columns = {}
+
+        for column in COLUMNS:
+            size = (n_ring_bonds if column in RING_BONDS_COLUMNS else n_atoms) * ITEM_SIZES[column]
+            data = view[position:position + size].cast(TYPECODES[column])
+            if sys.byteorder == 'big':
+                data = array.array(TYPECODES[column], data)
+                data.byteswap()
+
+            columns[column] = data
+            position += size
+
+        return cls(next_atom_id, columns)
+
+
+def _padding(size):
+    return (-size) % 8
+
+
+def dumps(graphs):
+    """Pack a list of graphs (or ``SMILES``) in a single buffer, with an index of the offsets of the records.
+
+    :param graphs: the graphs
+    :type graphs: list of ArrayGraph|osmipy.smiles.SMILES
+    :rtype: bytes
+    """
+
+    records = []
+    offsets = array.array('Q', [0])
+
+    for g in graphs:
+        if type(g) is not ArrayGraph:
+            g = ArrayGraph.from_ast(g.node, g.next_atom_id)
+
+        record = g.to_bytes()
+        record += b'\0' * _padding(len(record))
+        records.append(record)
+        offsets.append(offsets[-1] + len(record))
+
+    start = BATCH_HEADER.size + len(offsets) * offsets.itemsize
+    offsets = array.array('Q', (o + start for o in offsets))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+
+    return BATCH_HEADER.pack(BATCH_MAGIC, VERSION, 0, len(records)) + offsets.tobytes() + b''.join(records)
+
+
+def iter_loads(buffer):
+    """Iterate over the graphs packed in a buffer by ``dumps()``.
+
+    :param buffer: the buffer
+    :rtype: collections.Iterable[ArrayGraph]
+    """
+
+    magic, version, _, n = BATCH_HEADER.unpack_from(buffer, 0)
+
+    if magic != BATCH_MAGIC:
+        raise ArrayGraphException('not a batch of graphs')
+    if version != VERSION:
+        raise ArrayGraphException('unsupported version {}'.format(version))
+
+    offsets = struct.unpack_from('<{}Q'.format(n + 1), buffer, BATCH_HEADER.size)
+    for i in range(n):
+        yield ArrayGraph.from_buffer(buffer, offsets[i])
+
+
+def loads(buffer):
+    """Unpack the graphs packed by ``dumps()``
+
+    :param buffer: the buffer
+    :rtype: list of ArrayGraph
+    """
+
+    return list(iter_loads(buffer))
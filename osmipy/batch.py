@@ -0,0 +1,257 @@
+"""
+Parsing of many records by a pool of processes, with a scheduling that takes the size of the molecules into account.
+
+The cost of each record is estimated from its string (see ``estimate_cost()``), and the records are sent to the
+workers longest-first, by chunks whose cost decreases as the work goes on (guided self-scheduling): the giants are
+parsed first and alone, and the small records fill the end of the run, so that the workers finish at about the same
+time. Each worker takes a new chunk as soon as it is done with the previous one.
+
+.. code-block:: python
+
+    from osmipy import batch
+
+    with batch.BatchParser(workers=8) as parser:
+        molecules = parser.parse(records)  # in the order of the records (None for the invalid ones)
+
+    print(parser.errors)  # (index, exception)
+    print(parser.metrics.as_dict())  # utilization of the workers, latency of the records, ...
+"""
+
+import array
+import concurrent.futures
+import os
+import sys
+import time
+
+from osmipy import smiles, smiles_parser
+
+DIGITS = '0123456789'
+
+MIN_RECORDS_PER_CHUNK = 16
+
+RECURSION_LIMIT = 50000  # the parser is recursive, and a long chain needs a few frames per atom
+
+
+def estimate_cost(record):
+    """Estimate the (relative) time needed to parse a record.
+
+    The cost grows with the length of the string, with the number of branches and with the square of the number of
+    ring closures (which are checked against each other), plus a constant for the creation of the objects.
+
+    :param record: the SMILES
+    :type record: str
+    :rtype: float
+    """
+
+    rings = sum(record.count(d) for d in DIGITS) - record.count('%')
+    return 8 + len(record) + 3 * record.count('(') + rings * rings / 256
+
+
+def make_chunks(costs, workers, chunks_per_worker=4):
+    """Split the records into chunks, longest-first, with a cost that decreases along the list: each chunk
+    gets about ``1 / (workers * chunks_per_worker)`` of the remaining cost (a record that costs more is alone in its
+    chunk), but not less than the cost of ``MIN_RECORDS_PER_CHUNK`` median records.
+
+    :param costs: the cost of each record
+    :type costs: list of float
+    :param workers: number of workers
+    :type workers: int
+    :param chunks_per_worker: number of chunks per worker, at first
+    :type chunks_per_worker: int
+    :return: the chunks, as lists of indices of the records
+    :rtype: list of list of int
+    """
+
+    if not costs:
+        return []
+
+    order = sorted(range(len(costs)), key=lambda i: -costs[i])
+    remaining = float(sum(costs))
+    minimum = MIN_RECORDS_PER_CHUNK * costs[order[len(order) // 2]]  # (not too many tiny chunks at the end)
+
+    chunks = []
+    chunk = []
+    chunk_cost = 0.
+    target = 0.
+
+    for i in order:
+        if not chunk:
+            target = max(remaining / (workers * chunks_per_worker), minimum)
+
+        chunk.append(i)
+        chunk_cost += costs[i]
+        remaining -= costs[i]
+
+        if chunk_cost >= target:
+            chunks.append(chunk)
+            chunk = []
+            chunk_cost = 0.
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def _init_worker():
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+
+
+def _parse_chunk(records):
+    """Parse a chunk (in a worker)
+
+    :return: the molecules (packed by ``osmipy.smiles.dumps()``), the errors (as ``(position in the chunk, error)``),
+        the time spent on each record, the process id and the start and end time of the chunk
+    :rtype: tuple
+    """
+
+    start = time.time()
+    molecules = []
+    errors = []
+    times = array.array('d')
+
+    for i, record in enumerate(records):
+        t = time.perf_counter()
+        try:
+            molecules.append(smiles.SMILES(record))
+        except smiles_parser.ERRORS as e:
+            errors.append((i, e))
+        times.append(time.perf_counter() - t)
+
+    return smiles.dumps(molecules), errors, times, os.getpid(), start, time.time()
+
+
+def _percentile(values, p):
+    """Percentile of sorted values (nearest rank)"""
+
+    if not values:
+        return 0.
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+class Metrics:
+    """Metrics of a run of ``BatchParser.parse()``
+    """
+
+    def __init__(self):
+        self.wall_time = 0.
+        self.records = 0
+        self.chunks = 0
+        self.workers = {}  # pid -> [busy time, number of chunks, number of records, time of the end of the last chunk]
+        self.record_times = []  # time to parse each record
+        self.chunk_latencies = []  # time between the start of the run and the reception of each chunk
+
+    def as_dict(self):
+        """Get the metrics.
+
+        ``utilization`` is the fraction of the wall time during which the worker was parsing, and ``idle_tail`` is
+        the time between the moment it finished its last chunk and the end of the run.
+
+        :rtype: dict
+        """
+
+        record_times = sorted(self.record_times)
+        latencies = sorted(self.chunk_latencies)
+        wall = self.wall_time or 1.
+
+        return {
+            'wall_time': self.wall_time,
+            'records': self.records,
+            'chunks': self.chunks,
+            'workers': dict(
+                (pid, {
+                    'busy_time': busy,
+                    'utilization': busy / wall,
+                    'chunks': chunks,
+                    'records': records,
+                    'idle_tail': self.wall_time - last,
+                }) for pid, (busy, chunks, records, last) in self.workers.items()),
+            'utilization': sum(w[0] for w in self.workers.values()) / (wall * max(len(self.workers), 1)),
+            'record_time': dict(
+                ('p{}'.format(p), _percentile(record_times, p)) for p in (50, 90, 99)),
+            'record_time_max': record_times[-1] if record_times else 0.,
+            'chunk_latency': dict(
+                ('p{}'.format(p), _percentile(latencies, p)) for p in (50, 90, 99)),
+            'chunk_latency_max': latencies[-1] if latencies else 0.,
+        }
+
+
+class BatchParser:
+    """Parse records with a pool of processes (created at the first call to ``parse()``, and kept until
+    ``close()``)
+
+    :param workers: number of processes (by default, the number of CPUs)
+    :type workers: int
+    :param chunks_per_worker: number of chunks per worker, at first (see ``make_chunks()``)
+    :type chunks_per_worker: int
+    """
+
+    def __init__(self, workers=None, chunks_per_worker=4):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.executor = None
+
+        self.errors = []
+        self.metrics = Metrics()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def parse(self, records):
+        """Parse the records
+
+        :param records: the SMILES
+        :type records: list of str
+        :return: the molecules, in the order of the records (``None`` for the invalid ones, see ``errors``)
+        :rtype: list of osmipy.smiles.SMILES
+        """
+
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=_init_worker)
+
+        start = time.time()
+        metrics = self.metrics = Metrics()
+        self.errors = []
+
+        chunks = make_chunks([estimate_cost(r) for r in records], self.workers, self.chunks_per_worker)
+        futures = dict(
+            (self.executor.submit(_parse_chunk, [records[i] for i in chunk]), chunk) for chunk in chunks)
+
+        molecules = [None] * len(records)
+
+        for future in concurrent.futures.as_completed(futures):
+            chunk = futures[future]
+            buffer, errors, times, pid, chunk_start, chunk_end = future.result()
+
+            failed = set(i for i, _ in errors)
+            parsed = iter(smiles.loads(buffer))
+            for k, i in enumerate(chunk):
+                if k not in failed:
+                    molecules[i] = next(parsed)
+
+            self.errors.extend((chunk[k], e) for k, e in errors)
+
+            # metrics
+            worker = metrics.workers.setdefault(pid, [0., 0, 0, 0.])
+            worker[0] += chunk_end - chunk_start
+            worker[1] += 1
+            worker[2] += len(chunk)
+            worker[3] = max(worker[3], chunk_end - start)
+
+            metrics.record_times.extend(times)
+            metrics.chunk_latencies.append(time.time() - start)
+
+        metrics.wall_time = time.time() - start
+        metrics.records = len(records)
+        metrics.chunks = len(chunks)
+        self.errors.sort(key=lambda x: x[0])
+
+        return molecules
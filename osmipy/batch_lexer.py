@@ -0,0 +1,230 @@
+"""
+Vectorized tokenization of many SMILES at once (requires ``numpy``).
+
+The records are concatenated into a single ``uint8`` buffer (with an array of offsets), and every byte is classified
+at once through a 256-entry lookup table built from ``tokens.SYMBOLS_TR``.
+Two-letter symbols (``Cl``, ``Br``, ``se``, ``as``, ...) are resolved by testing all the pairs of consecutive
+bytes against the list of valid symbols, following the same greedy rule as ``osmipy.lexer.Lexer``.
+"""
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from osmipy import lexer, smiles
+from osmipy.tokens import *
+
+TOKEN_TYPES = (ATOM, BOND, DIGIT, LPAR, RPAR, LSPAR, RSPAR, PLUS, MINUS, DOT, WILDCARD, PERCENT, AT, COLON, EOF)
+
+TOKEN_CODES = dict((t, i) for i, t in enumerate(TOKEN_TYPES))
+
+INVALID = -1
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError('numpy is required for batch tokenization')
+
+
+def _lookup_tables():
+    """Build the tables used for the classification
+
+    :return: the byte lookup table and the (sorted) codes of the two-letters symbols
+    :rtype: tuple
+    """
+
+    lut = numpy.full(256, INVALID, dtype=numpy.int8)
+
+    for char, type_ in SYMBOLS_TR.items():
+        lut[ord(char)] = TOKEN_CODES[type_]
+
+    for i in range(10):
+        lut[ord('0') + i] = TOKEN_CODES[DIGIT]
+
+    for symbol in TOT_SYMBOLS:
+        if len(symbol) == 1:
+            lut[ord(symbol)] = TOKEN_CODES[ATOM]
+
+    pairs = numpy.array(
+        sorted(ord(s[0]) * 256 + ord(s[1]) for s in TOT_SYMBOLS if len(s) == 2), dtype=numpy.int32)
+
+    return lut, pairs
+
+
+def concatenate(records):
+    """Concatenate records into a single buffer
+
+    :param records: the SMILES strings
+    :type records: list of str
+    :return: the buffer and the offsets of the records (one more than the number of records)
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+
+    _check_numpy()
+
+    encoded = [r.encode('ascii', errors='replace') for r in records]
+    offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(e) for e in encoded], out=offsets[1:])
+
+    return numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8), offsets
+
+
+class BatchTokens:
+    """Result of the batch tokenization.
+
+    The tokens of all records are stored in flat arrays, ``types`` (code of the type in ``TOKEN_TYPES``, or
+    ``INVALID``), ``positions`` (offset of the token in the buffer) and ``lengths`` (number of bytes), and the tokens
+    of record ``i`` are found between ``token_offsets[i]`` and ``token_offsets[i + 1]``.
+
+    :param buffer: the buffer
+    :type buffer: numpy.ndarray
+    :param offsets: offsets of the records in the buffer
+    :type offsets: numpy.ndarray
+    :param types: type code of each token
+    :type types: numpy.ndarray
+    :param positions: position of each token in the buffer
+    :type positions: numpy.ndarray
+    :param lengths: length of each token
+    :type lengths: numpy.ndarray
+    :param token_offsets: offsets of the records in the token arrays
+    :type token_offsets: numpy.ndarray
+    """
+
+    def __init__(self, buffer, offsets, types, positions, lengths, token_offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.types = types
+        self.positions = positions
+        self.lengths = lengths
+        self.token_offsets = token_offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def invalid_records(self):
+        """Get which records contain an invalid character
+
+        :rtype: numpy.ndarray
+        """
+
+        invalid = numpy.zeros(len(self), dtype=bool)
+        where = numpy.searchsorted(self.token_offsets, numpy.flatnonzero(self.types == INVALID), side='right') - 1
+        invalid[where] = True
+        return invalid
+
+    def tokens(self, i):
+        """Get the tokens of record ``i``, with an ``EOF`` at the end.
+
+        :param i: record number
+        :type i: int
+        :rtype: list of osmipy.tokens.Token
+        :raise osmipy.lexer.LexerException: if the record contains an invalid character
+        """
+
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        first, last = self.token_offsets[i], self.token_offsets[i + 1]
+        buffer = self.buffer
+        tokens = []
+
+        for code, position, length in zip(
+                self.types[first:last].tolist(),
+                self.positions[first:last].tolist(),
+                self.lengths[first:last].tolist()):
+
+            char = int(buffer[position])
+            pos = position - start
+
+            if code == INVALID:
+                raise lexer.LexerException(pos, 'unknown symbol {}'.format(chr(char)))
+
+            type_ = TOKEN_TYPES[code]
+            if type_ == ATOM:
+                value = lexer.BYTES_SYMBOLS[char if length == 1 else char * 256 + int(buffer[position + 1])]
+            elif type_ == DIGIT:
+                value = char - 0x30
+            else:
+                value = lexer.BYTES_CHARS[char]
+
+            tokens.append(Token(type_, value, pos))
+
+        tokens.append(Token(EOF, None, end - start))
+        return tokens
+
+    def lexer(self, i):
+        """Get a lexer that gives back the tokens of record ``i``
+
+        :param i: record number
+        :type i: int
+        :rtype: osmipy.lexer.TokensLexer
+        """
+
+        return lexer.TokensLexer(self.tokens(i))
+
+    def smiles(self, i):
+        """Parse record ``i``
+
+        :param i: record number
+        :type i: int
+        :rtype: osmipy.smiles.SMILES
+        """
+
+        return smiles.SMILES(self.lexer(i))
+
+
+def tokenize(buffer, offsets):
+    """Tokenize all the records of a buffer at once
+
+    :param buffer: the buffer
+    :type buffer: numpy.ndarray
+    :param offsets: offsets of the records in the buffer (one more than the number of records)
+    :type offsets: numpy.ndarray
+    :rtype: BatchTokens
+    """
+
+    _check_numpy()
+
+    lut, pairs = _lookup_tables()
+    types = lut[buffer]
+
+    # two-letter symbols: a pair starts at i if (buffer[i], buffer[i + 1]) is a valid symbol in the same record
+    n = len(buffer)
+    pair_candidates = numpy.zeros(n, dtype=bool)
+    if n > 1:
+        codes = buffer[:-1].astype(numpy.int32) * 256 + buffer[1:]
+        pair_candidates[:-1] = numpy.isin(codes, pairs)
+        record_ends = offsets[1:] - 1
+        pair_candidates[record_ends[(record_ends >= 0) & (record_ends < n)]] = False
+
+    # the lexer is greedy: in a run of consecutive candidates, only every other one is a pair
+    run_starts = pair_candidates.copy()
+    run_starts[1:] &= ~pair_candidates[:-1]
+    run_start_positions = numpy.flatnonzero(run_starts)
+    run_index = numpy.cumsum(run_starts) - 1
+    pair_starts = pair_candidates.copy()
+    if len(run_start_positions) > 0:
+        candidates_positions = numpy.flatnonzero(pair_candidates)
+        pair_starts[candidates_positions] = \
+            (candidates_positions - run_start_positions[run_index[candidates_positions]]) % 2 == 0
+
+    types[pair_starts] = TOKEN_CODES[ATOM]
+
+    is_token = numpy.ones(n, dtype=bool)
+    is_token[1:] &= ~pair_starts[:-1]
+
+    positions = numpy.flatnonzero(is_token)
+    token_offsets = numpy.searchsorted(positions, offsets)
+
+    return BatchTokens(
+        buffer, offsets, types[positions], positions, numpy.where(pair_starts[positions], 2, 1), token_offsets)
+
+
+def tokenize_records(records):
+    """Concatenate and tokenize the records
+
+    :param records: the SMILES strings
+    :type records: list of str
+    :rtype: BatchTokens
+    """
+
+    return tokenize(*concatenate(records))
@@ -0,0 +1,348 @@
+"""
+Persistent cache of parsed SMILES.
+
+The cache is a SQLite database that maps the digest of a string to the result of its parsing: either the molecule
+(in the binary form of ``osmipy.array_graph``) or the error that was raised. A string that is found in the cache is not
+lexed nor parsed again:
+
+.. code-block:: python
+
+    from osmipy import cache
+
+    with cache.ParseCache('parse.cache', max_entries=10 ** 6, max_age=30 * 86400) as c:
+        molecules = c.parse_many(records, errors=errors)  # (index, error) are added to errors
+        molecule = c.parse('c1ccccc1C(=O)O')  # raises the error, if the string is not valid
+
+The entries are tied to the version of osmipy and of the binary format: when it changes, the cache is emptied.
+When the cache is over its limits (number of entries, total size, age of the entries), the least recently used
+entries are removed (see ``ParseCache.evict()``).
+
+The database is in write-ahead log mode, so that several processes can use the same file at the same time (each one
+with its own ``ParseCache`` object): the readers are not blocked, and the writes are done in (short) transactions.
+To keep the lookups cheap, the new entries and the time of the last use of the entries are written by batches, so that
+they may be lost if the process is killed before ``flush()`` or ``close()``.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+import osmipy
+from osmipy import array_graph, lexer, smiles, smiles_parser
+from osmipy.tokens import Token
+
+VERSION = '{}/{}'.format(osmipy.__version__, array_graph.VERSION)
+
+DIGEST_SIZE = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (
+    digest BLOB PRIMARY KEY,
+    graph BLOB,
+    error TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+def digest(text):
+    """Digest of a string, which is the key of its entry
+
+    :param text: the string
+    :type text: str
+    :rtype: bytes
+    """
+
+    return hashlib.blake2b(text.encode(), digest_size=DIGEST_SIZE).digest()
+
+
+def error_to_text(error):
+    """Get a textual form of a parsing error
+
+    :param error: the error
+    :type error: osmipy.lexer.LexerException|osmipy.smiles_parser.ParserException
+    :rtype: str
+    """
+
+    if isinstance(error, lexer.LexerException):
+        return json.dumps(['lexer', error.position, error.message])
+    else:
+        token = error.token
+        return json.dumps(['parser', token.type, token.value, token.position, error.message])
+
+
+def error_from_text(text):
+    """Get back an error from its textual form (as given by ``error_to_text()``)
+
+    :param text: the textual form
+    :type text: str
+    :rtype: osmipy.lexer.LexerException|osmipy.smiles_parser.ParserException
+    """
+
+    data = json.loads(text)
+    if data[0] == 'lexer':
+        return lexer.LexerException(data[1], data[2])
+    else:
+        return smiles_parser.ParserException(Token(data[1], data[2], data[3]), data[4])
+
+
+class ParseCache:
+    """Cache of parsed SMILES, stored in a SQLite database.
+
+    :param path: path to the database (created if it does not exist)
+    :type path: str
+    :param max_entries: maximum number of entries
+    :type max_entries: int
+    :param max_bytes: maximum total size of the molecules (in their binary form)
+    :type max_bytes: int
+    :param max_age: maximum time (in seconds) since an entry was created
+    :type max_age: float
+    :param flush_every: number of pending writes (new entries and uses) after which they are written
+    :type flush_every: int
+    :param timeout: time (in seconds) to wait for the lock of the database, if another process writes to it
+    :type timeout: float
+    :param version: version of the entries (by default, the one of osmipy and of the binary format)
+    :type version: str
+    """
+
+    def __init__(
+            self, path, max_entries=None, max_bytes=None, max_age=None, flush_every=1024, timeout=60.,
+            version=VERSION):
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_every = flush_every
+        self.version = version
+
+        self.hits = 0
+        self.misses = 0
+
+        self._new = {}  # digest -> (graph, error, size)
+        self._used = set()
+
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+        with self._transaction():
+            for statement in SCHEMA.split(';'):  # (executescript() would commit the transaction)
+                if statement.strip():
+                    self.connection.execute(statement)
+
+            row = self.connection.execute('SELECT value FROM metadata WHERE name = ?', ('version', )).fetchone()
+            if row is None or row[0] != version:
+                self.connection.execute('DELETE FROM entries')
+                self.connection.execute('INSERT OR REPLACE INTO metadata VALUES (?, ?)', ('version', version))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        self.flush()
+        return self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+    def close(self):
+        """Write the pending changes, remove the entries that are over the limits, and close the database
+        """
+
+        if self.connection is not None:
+            self.flush()
+            self.evict()
+            self.connection.close()
+            self.connection = None
+
+    def lookup(self, texts):
+        """Find strings in the cache
+
+        :param texts: the strings
+        :type texts: list of str
+        :return: for each string, ``None`` if it is not in the cache, otherwise ``(graph, error)``, one of them being
+            ``None``
+        :rtype: list of tuple
+        """
+
+        digests = [digest(t) for t in texts]
+        found = {}
+
+        for d in digests:
+            if d in self._new:
+                found[d] = self._new[d][:2]
+
+        missing = list(set(d for d in digests if d not in found))
+        for i in range(0, len(missing), 500):  # (maximum number of parameters)
+            part = missing[i:i + 500]
+            rows = self.connection.execute(
+                'SELECT digest, graph, error FROM entries WHERE digest IN ({})'.format(','.join('?' * len(part))),
+                part)
+            for d, graph, error in rows:
+                found[d] = (graph, error)
+
+        self._used.update(found)
+
+        results = []
+        for d in digests:
+            result = found.get(d)
+            if result is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                graph, error = result
+                results.append((
+                    None if graph is None else array_graph.ArrayGraph.from_buffer(graph),
+                    None if error is None else error_from_text(error)))
+
+        return results
+
+    def store(self, text, molecule=None, error=None):
+        """Add the result of the parsing of a string
+
+        :param text: the string
+        :type text: str
+        :param molecule: the molecule
+        :type molecule: osmipy.smiles.SMILES
+        :param error: the error (if the string is not valid)
+        :type error: osmipy.lexer.LexerException|osmipy.smiles_parser.ParserException
+        """
+
+        if molecule is not None:
+            graph = molecule.to_bytes()
+            self._new[digest(text)] = (graph, None, len(graph))
+        else:
+            self._new[digest(text)] = (None, error_to_text(error), 0)
+
+        if len(self._new) + len(self._used) >= self.flush_every:
+            self.flush()
+
+    def parse_many(self, texts, errors=None, graphs=False):
+        """Parse strings, using the cache
+
+        :param texts: the strings
+        :type texts: list of str
+        :param errors: if a list is given, ``(index, error)`` is added to it for the invalid strings (which give
+            ``None``), otherwise, the first error is raised
+        :type errors: list
+        :param graphs: give the array graphs instead of the ``SMILES`` objects (which is cheaper, since the AST of the
+            molecules found in the cache is not built)
+        :type graphs: bool
+        :rtype: list of osmipy.smiles.SMILES|list of osmipy.array_graph.ArrayGraph
+        """
+
+        molecules = []
+
+        for i, (text, result) in enumerate(zip(texts, self.lookup(texts))):
+            if result is not None:
+                molecule, error = result
+                if molecule is not None and not graphs:
+                    molecule = smiles.SMILES.from_graph(molecule)
+            else:
+                try:
+                    molecule, error = smiles.SMILES(text), None
+                except smiles_parser.ERRORS as e:
+                    molecule, error = None, e
+                self.store(text, molecule, error)
+                if molecule is not None and graphs:
+                    molecule = molecule.to_graph()
+
+            if error is not None:
+                if errors is None:
+                    raise error
+                errors.append((i, error))
+
+            molecules.append(molecule)
+
+        return molecules
+
+    def parse(self, text):
+        """Parse a string, using the cache
+
+        :param text: the string
+        :type text: str
+        :rtype: osmipy.smiles.SMILES
+        """
+
+        return self.parse_many([text])[0]
+
+    def flush(self):
+        """Write the new entries and the time of use of the entries
+        """
+
+        if not self._new and not self._used:
+            return
+
+        now = time.time()
+        with self._transaction():
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                ((d, graph, error, size, now, now) for d, (graph, error, size) in self._new.items()))
+            self.connection.executemany(
+                'UPDATE entries SET used = ? WHERE digest = ?', ((now, d) for d in self._used - self._new.keys()))
+
+        self._new.clear()
+        self._used.clear()
+
+    def evict(self):
+        """Remove the entries that are too old, then the least recently used ones until the cache is within its
+        limits
+
+        :return: the number of entries that were removed
+        :rtype: int
+        """
+
+        self.flush()
+        removed = 0
+
+        with self._transaction():
+            if self.max_age is not None:
+                removed += self.connection.execute(
+                    'DELETE FROM entries WHERE created < ?', (time.time() - self.max_age, )).rowcount
+
+            if self.max_entries is not None:
+                count = self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+                if count > self.max_entries:
+                    removed += self.connection.execute(
+                        'DELETE FROM entries WHERE digest IN (SELECT digest FROM entries ORDER BY used LIMIT ?)',
+                        (count - self.max_entries, )).rowcount
+
+            if self.max_bytes is not None:
+                total = self.connection.execute('SELECT TOTAL(size) FROM entries').fetchone()[0]
+                if total > self.max_bytes:
+                    # the oldest entries, until the remaining ones fit
+                    rows = self.connection.execute('SELECT digest, size FROM entries ORDER BY used')
+                    to_remove = []
+                    for d, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        to_remove.append((d, ))
+                        total -= size
+
+                    self.connection.executemany('DELETE FROM entries WHERE digest = ?', to_remove)
+                    removed += len(to_remove)
+
+        return removed
+
+
+class _Transaction:
+    """Write transaction (``BEGIN IMMEDIATE``, so that the lock is taken at once, or waited for)"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
@@ -0,0 +1,433 @@
+"""
+Out-of-core deduplication of SMILES files.
+
+The records (lines of the form ``SMILES [name]``) are parsed and reduced to a key, either the SMILES written back by
+the ``Interpreter`` (``key='interpreter'``, which only removes the differences of notation) or a key that does not
+depend on the order of the atoms (``key='canonical'``, see ``canonical_key()``), or given by any (picklable) function
+of a ``SMILES`` object. Then:
+
+1. the input is split into byte ranges, which are read in parallel: each record is sent, with the digest of its key,
+   to one of the ``partitions`` spill files (according to the digest), so that duplicates end up in the same
+   partition ;
+2. the partitions are deduplicated in parallel, each of them in memory (so the number of partitions should be chosen
+   so that one of them fits in memory), keeping the first record of each key ;
+3. the partitions are merged, in the order of the input.
+
+The output contains, for each key, the first record in which it was found, as ``SMILES<tab>line number<tab>name``
+(the lines being counted over all the inputs, one after the other).
+
+With ``bloom=True``, the keys seen during the first step are also put in Bloom filters, which give the keys that may
+have duplicates: the other records are certainly unique, and are passed through the second step without being kept in
+memory.
+
+.. code-block:: python
+
+    from osmipy import dedup
+
+    stats = dedup.deduplicate('library.smi', 'unique.smi', partitions=256, key='canonical', bloom=True)
+"""
+
+import concurrent.futures
+import hashlib
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+
+from osmipy import adjacency, smiles, smiles_parser, stereo
+
+DIGEST_SIZE = 16
+
+NORMALIZED_BONDS = {'-': '', '/': '', '\\': '', '=': '=', '#': '#', '$': '$', ':': ':', '': ''}
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def canonical_key(molecule):
+    """Key of a molecule that does not depend on the order of its atoms in the string.
+
+    The atoms are colored by their written form (without chirality), then the colors are refined with the ones of the
+    neighbours until they do not split the atoms anymore (Weisfeiler-Lehman). The chirality is then given relative to
+    the order of the colors of the neighbours, and only if they are all different (otherwise, the atom is not a
+    stereocenter and its chirality is ignored).
+    The configuration of the double bonds (see ``osmipy.stereo``) is given the same way, relative to the neighbours
+    with the smallest colors.
+    The key is the digest of the sorted colors.
+
+    The notation of the bonds is normalized (``C-C`` and ``CC`` have the same key, and so do ``c:c`` and ``cc``, or
+    ``C/C=C/C`` and ``C\\C=C\\C``).
+    Two different molecules have the same key only if the refinement does not distinguish them, which does not happen
+    for usual molecules.
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: str
+    """
+
+    index = molecule.adjacency()
+    n = len(index)
+
+    aromatic = [t[0].islower() or (t[0] == '[' and t.lstrip('[0123456789')[:1].islower()) for t in index.texts]
+    neighbours = [
+        [(j, '' if b == ':' and aromatic[i] and aromatic[j] else NORMALIZED_BONDS[b]) for j, b in index.neighbours[i]]
+        for i in range(n)
+    ]
+
+    colors = [_digest(t.replace('@', '') if index.references[i] is not None else t) for i, t in enumerate(index.texts)]
+    distinct = len(set(colors))
+
+    for _ in range(n):
+        colors = [
+            _digest(colors[i] + '|' + ','.join(sorted(b + colors[j] for j, b in neighbours[i]))) for i in range(n)]
+
+        refined = len(set(colors))
+        if refined == distinct:
+            break
+        distinct = refined
+
+    labels = list(colors)
+
+    for i, reference in enumerate(index.references):
+        if reference is None:
+            continue
+
+        chirality = '@@' if '@@' in index.texts[i] else '@'
+        neighbour_colors = [('' if j < 0 else colors[j]) for j in reference]
+
+        if len(set(neighbour_colors)) != len(neighbour_colors):
+            continue  # (not a stereocenter)
+
+        order = sorted(reference, key=lambda j: '' if j < 0 else colors[j])
+        if adjacency._parity(reference, order):
+            chirality = adjacency.INVERTED_CHIRALITY[chirality]
+
+        labels[i] += chirality
+
+    for (a, b), (x, y), code in stereo.double_bond_stereo(molecule):
+        if code != stereo.CIS and code != stereo.TRANS:
+            continue
+
+        cis = code == stereo.CIS
+        for atom, other, reference in ((a, b, x), (b, a, y)):
+            substituents = [j for j in index.adjacent[atom] if j != other]
+            if len(substituents) == 2:
+                if colors[substituents[0]] == colors[substituents[1]]:
+                    break  # (not stereogenic)
+                if min(substituents, key=colors.__getitem__) != reference:
+                    cis = not cis
+        else:
+            labels.append('{}={}{}'.format(*sorted((colors[a], colors[b])), 'Z' if cis else 'E'))
+
+    return _digest('\n'.join(sorted(labels)))
+
+
+def _interpreter_key(molecule):
+    return repr(molecule)
+
+
+KEYS = {
+    'interpreter': _interpreter_key,
+    'canonical': canonical_key,
+}
+
+
+class BloomFilter:
+    """Bloom filter on the digests of the keys
+
+    :param size: number of bits
+    :type size: int
+    :param hashes: number of bits set per key
+    :type hashes: int
+    """
+
+    def __init__(self, size=1 << 23, hashes=5):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def _positions(self, digest):
+        h1, h2 = int(digest[:16], 16), int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest):
+        """Add a digest, and tell whether it was (maybe) already there
+
+        :param digest: the digest (hexadecimal)
+        :type digest: str
+        :rtype: bool
+        """
+
+        bits = self.bits
+        present = True
+        for p in self._positions(digest):
+            byte, bit = p >> 3, 1 << (p & 7)
+            if not bits[byte] & bit:
+                present = False
+                bits[byte] |= bit
+
+        return present
+
+    def __contains__(self, digest):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def union(self, other):
+        """Bits set in one of the filters
+
+        :rtype: BloomFilter
+        """
+
+        return self._combine(int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little'))
+
+    def intersection(self, other):
+        """Bits set in both filters
+
+        :rtype: BloomFilter
+        """
+
+        return self._combine(int.from_bytes(self.bits, 'little') & int.from_bytes(other.bits, 'little'))
+
+    def _combine(self, value):
+        result = BloomFilter(self.size, self.hashes)
+        result.bits = bytearray(value.to_bytes(len(self.bits), 'little'))
+        return result
+
+
+def split_ranges(path, n):
+    """Split a file into (at most) ``n`` byte ranges that start at the beginning of a line
+
+    :param path: path to the file
+    :type path: str
+    :param n: number of ranges
+    :type n: int
+    :rtype: list of tuple(int, int)
+    """
+
+    size = os.path.getsize(path)
+    bounds = [0]
+
+    with open(path, 'rb') as f:
+        for k in range(1, n):
+            position = max(size * k // n, bounds[-1])
+            if position >= size:
+                break
+
+            f.seek(position)
+            if position > 0:
+                f.seek(position - 1)
+                f.readline()  # (go to the start of the next line)
+
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _spill_path(workdir, partition, task):
+    return os.path.join(workdir, 'part-{:05d}-{:05d}.spill'.format(partition, task))
+
+
+def _spill(path, start, end, task, workdir, partitions, key, bloom):
+    """Read a byte range, and send each record to its partition (first step)
+
+    :return: the number of lines, the number of records, the invalid records (as ``(line in the range, error)``) and
+        the Bloom filters of the keys seen, and of the keys seen more than once
+    :rtype: tuple
+    """
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 50000))  # (long chains)
+
+    key = KEYS.get(key, key)
+    files = [open(_spill_path(workdir, p, task), 'w') for p in range(partitions)]
+    seen, duplicated = (BloomFilter(*bloom), BloomFilter(*bloom)) if bloom else (None, None)
+
+    lines = records = 0
+    invalid = []
+
+    try:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            position = start
+
+            while position < end:
+                line = f.readline()
+                if not line:
+                    break
+
+                position += len(line)
+                lines += 1
+
+                parts = line.decode('utf-8', errors='replace').split(None, 1)
+                if not parts:
+                    continue
+
+                records += 1
+                try:
+                    digest = _digest(key(smiles.SMILES(parts[0])))
+                except smiles_parser.ERRORS as e:
+                    invalid.append((lines, e))
+                    continue
+
+                if seen is not None and seen.add(digest):
+                    duplicated.add(digest)
+
+                files[int(digest[:8], 16) % partitions].write('{}\t{}\t{}\t{}\n'.format(
+                    digest, lines, parts[0], parts[1].strip() if len(parts) > 1 else ''))
+    finally:
+        for file in files:
+            file.close()
+
+    return lines, records, invalid, seen, duplicated
+
+
+def _deduplicate_partition(workdir, partition, tasks, line_offsets, duplicated):
+    """Keep the first record of each key of a partition, and write them in the order of the input (second step)
+
+    :return: the number of records that were kept
+    :rtype: int
+    """
+
+    first = {}
+    kept = []
+
+    for task in range(tasks):
+        path = _spill_path(workdir, partition, task)
+        with open(path) as f:
+            for line in f:
+                digest, number, record = line.rstrip('\n').split('\t', 2)
+                number = int(number) + line_offsets[task]
+
+                if duplicated is not None and digest not in duplicated:
+                    kept.append((number, record))  # certainly unique
+                elif digest not in first or first[digest][0] > number:
+                    first[digest] = (number, record)
+
+        os.remove(path)
+
+    kept.extend(first.values())
+    kept.sort()
+
+    with open(os.path.join(workdir, 'part-{:05d}.out'.format(partition)), 'w') as f:
+        for number, record in kept:
+            f.write('{}\t{}\n'.format(number, record))
+
+    return len(kept)
+
+
+def _read_partition(path):
+    with open(path) as f:
+        for line in f:
+            number, smi, name = line.rstrip('\n').split('\t', 2)
+            yield int(number), smi, name
+
+
+def _executor(workers):
+    if workers == 1:
+        return _InlineExecutor()
+    return concurrent.futures.ProcessPoolExecutor(workers)
+
+
+class _InlineExecutor:
+    """Run the tasks in the current process (when there is only one worker)"""
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self):
+        pass
+
+
+def deduplicate(
+        inputs, output, partitions=64, key='interpreter', bloom=False, workers=None, workdir=None,
+        ranges_per_worker=4):
+    """Deduplicate SMILES files
+
+    :param inputs: path to the input file (or list of paths, which are read one after the other)
+    :type inputs: str|list of str
+    :param output: path to the output file
+    :type output: str
+    :param partitions: number of partitions
+    :type partitions: int
+    :param key: the key (``'interpreter'``, ``'canonical'``, or a function of a ``SMILES`` object giving a string)
+    :type key: str|callable
+    :param bloom: use Bloom filters (``True``, or the number of bits and of hashes of the filters)
+    :type bloom: bool|tuple
+    :param workers: number of processes (by default, the number of CPUs)
+    :type workers: int
+    :param workdir: directory for the spill files (by default, a temporary directory)
+    :type workdir: str
+    :param ranges_per_worker: number of byte ranges per worker and per file, in the first step
+    :type ranges_per_worker: int
+    :return: statistics (number of records, of invalid records, of unique records and the invalid records as
+        ``(path, line number, error)``)
+    :rtype: dict
+    """
+
+    if type(inputs) is str:
+        inputs = [inputs]
+    if bloom is True:
+        bloom = (1 << 23, 5)
+
+    workers = workers or os.cpu_count() or 1
+    own_workdir = workdir is None
+    if own_workdir:
+        workdir = tempfile.mkdtemp(prefix='osmipy-dedup-')
+
+    executor = _executor(workers)
+
+    try:
+        # 1. spill
+        tasks = [
+            (path, start, end) for path in inputs for start, end in split_ranges(path, workers * ranges_per_worker)]
+        futures = [
+            executor.submit(_spill, path, start, end, task, workdir, partitions, key, bloom)
+            for task, (path, start, end) in enumerate(tasks)]
+
+        results = [future.result() for future in futures]
+
+        offsets = []  # number of lines before each range (in the order of the files)
+        file_starts = {}
+        stats = {'records': 0, 'invalid': [], 'unique': 0}
+        seen = duplicated = None
+        total = 0
+
+        for (path, _, _), (lines, records, invalid, task_seen, task_duplicated) in zip(tasks, results):
+            file_starts.setdefault(path, total)
+            offsets.append(total)
+            stats['records'] += records
+            stats['invalid'].extend((path, total - file_starts[path] + number, e) for number, e in invalid)
+            total += lines
+
+            if task_seen is not None:
+                if seen is None:
+                    seen, duplicated = task_seen, task_duplicated
+                else:
+                    duplicated = duplicated.union(task_duplicated).union(seen.intersection(task_seen))
+                    seen = seen.union(task_seen)
+
+        # 2. deduplicate each partition
+        futures = [
+            executor.submit(_deduplicate_partition, workdir, p, len(tasks), offsets, duplicated)
+            for p in range(partitions)]
+
+        stats['unique'] = sum(future.result() for future in futures)
+
+        # 3. merge
+        streams = [_read_partition(os.path.join(workdir, 'part-{:05d}.out'.format(p))) for p in range(partitions)]
+        with open(output, 'w') as f:
+            for number, smi, name in heapq.merge(*streams):
+                f.write('{}\t{}\t{}\n'.format(smi, number, name) if name else '{}\t{}\n'.format(smi, number))
+
+        return stats
+
+    finally:
+        executor.shutdown()
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,258 @@
+"""
+Columnar export of batches of molecules, as tables of atoms and of bonds (requires ``numpy``).
+
+The tables are ``numpy`` structured arrays, with one row per atom:
+
+.. code-block:: text
+
+    molecule | atom_id | symbol | isotope | charge | hcount | klass
+
+and one row per bond (the dots, which are not bonds, are not included):
+
+.. code-block:: text
+
+    molecule | source | target | order | is_ring
+
+where ``molecule`` is the index of the molecule in the batch, ``symbol`` is the index of the symbol in ``SYMBOLS``,
+``source`` and ``target`` are atom ids, ``order`` is 1.5 for aromatic bonds (explicit, or implicit between two aromatic
+atoms) and ``is_ring`` tells whether the bond closes a ring (ring bond).
+The bonds of each molecule are given in the order of the string, followed by its ring bonds.
+
+The tables are built from the binary form of the molecules (see ``osmipy.array_graph``), all the records at once, so
+that no Python object is created per atom or bond:
+
+.. code-block:: python
+
+    from osmipy import export
+
+    atoms, bonds = export.tables(molecules)  # a list of SMILES or array graphs, a buffer given by dumps(), or a store
+    export.write_parquet('library', atoms, bonds)  # library.atoms.parquet and library.bonds.parquet (pyarrow)
+"""
+
+import mmap
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+from osmipy import array_graph, store
+from osmipy.tokens import AROMATIC_SYMBOLS, BOND_ORDER
+
+SYMBOLS = array_graph.SYMBOLS
+
+ATOM_FIELDS = (
+    ('molecule', '<i4'), ('atom_id', '<i4'), ('symbol', 'u1'), ('isotope', '<u2'), ('charge', 'i1'),
+    ('hcount', 'u1'), ('klass', '<i4'))
+
+BOND_FIELDS = (('molecule', '<i4'), ('source', '<i4'), ('target', '<i4'), ('order', '<f4'), ('is_ring', '?'))
+
+AROMATIC_ORDER = 1.5
+
+HEADER_FIELDS = (
+    ('magic', 'S4'), ('version', '<u2'), ('flags', '<u2'), ('next_atom_id', '<i4'), ('atoms', '<u4'),
+    ('ring_bonds', '<u4'))
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError('numpy is required for the columnar export')
+
+
+def _check_pyarrow():
+    if pyarrow is None:
+        raise ImportError('pyarrow is required to write Arrow tables or Parquet files')
+
+
+def _lookup_tables():
+    """Build the tables of the aromaticity of the symbols, and of the order and the reverse of the bonds
+
+    :rtype: tuple
+    """
+
+    aromatic = numpy.array([s in AROMATIC_SYMBOLS for s in SYMBOLS], dtype=bool)
+    order = numpy.array([
+        AROMATIC_ORDER if b == ':' else BOND_ORDER.get(b, 1) for b in array_graph.BONDS], dtype=numpy.float32)
+    reverse = numpy.array([
+        array_graph.BOND_CODES[{'/': '\\', '\\': '/'}.get(b, b)] for b in array_graph.BONDS], dtype=numpy.uint8)
+
+    return aromatic, order, reverse
+
+
+def _gather(data, starts, counts, dtype):
+    """Gather the items of a column of all the records
+
+    :param data: the buffer, as bytes
+    :type data: numpy.ndarray
+    :param starts: the position of the column in each record
+    :type starts: numpy.ndarray
+    :param counts: the number of items in each record
+    :type counts: numpy.ndarray
+    :param dtype: the type of the items
+    :rtype: numpy.ndarray
+    """
+
+    dtype = numpy.dtype(dtype)
+    total = int(counts.sum())
+    if total == 0:
+        return numpy.zeros(0, dtype)
+
+    before = numpy.cumsum(counts) - counts
+    positions = numpy.repeat(starts - before * dtype.itemsize, counts) + numpy.arange(total) * dtype.itemsize
+    return data[(positions[:, None] + numpy.arange(dtype.itemsize)).ravel()].view(dtype)
+
+
+def _columns(buffer, offsets):
+    """Read the columns of the records of a buffer
+
+    :param buffer: the buffer
+    :param offsets: the offsets of the records
+    :type offsets: numpy.ndarray
+    :return: the number of atoms and of ring bonds of each record, and the columns (for all the records)
+    :rtype: tuple
+    """
+
+    data = numpy.frombuffer(buffer, dtype=numpy.uint8)
+    offsets = offsets.astype(numpy.int64)
+
+    header = numpy.dtype(list(HEADER_FIELDS))
+    headers = data[(offsets[:, None] + numpy.arange(header.itemsize)).ravel()].view(header)
+
+    if len(headers) > 0:
+        if (headers['magic'] != array_graph.MAGIC).any():
+            raise array_graph.ArrayGraphException('not a graph record')
+        if (headers['version'] != array_graph.VERSION).any():
+            raise array_graph.ArrayGraphException('unsupported version')
+
+    n_atoms = headers['atoms'].astype(numpy.int64)
+    n_ring_bonds = headers['ring_bonds'].astype(numpy.int64)
+
+    columns = {}
+    position = offsets + header.itemsize
+    for column in array_graph.COLUMNS:
+        counts = n_ring_bonds if column in array_graph.RING_BONDS_COLUMNS else n_atoms
+        dtype = numpy.dtype(array_graph.TYPECODES[column]).newbyteorder('<')
+        columns[column] = _gather(data, position, counts, dtype)
+        position = position + counts * dtype.itemsize
+
+    return n_atoms, n_ring_bonds, columns
+
+
+def _tables(buffer, offsets):
+    """Build the tables from the records of a buffer
+
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+
+    n_atoms, n_ring_bonds, c = _columns(buffer, offsets)
+    aromatic, order, reverse = _lookup_tables()
+    molecules = numpy.arange(len(offsets), dtype=numpy.int32)
+
+    # atoms
+    atoms = numpy.zeros(len(c['atom_id']), dtype=list(ATOM_FIELDS))
+    atoms['molecule'] = numpy.repeat(molecules, n_atoms)
+    for name in ('atom_id', 'symbol', 'isotope', 'charge', 'hcount', 'klass'):
+        atoms[name] = c[name]
+
+    first_atom = numpy.cumsum(n_atoms) - n_atoms  # (index of the first atom of each molecule in the table)
+
+    # bonds of the tree
+    is_bond = (c['link'] != array_graph.LINK_ROOT) & (c['bond'] != array_graph.BOND_CODES['.'])
+    targets = numpy.flatnonzero(is_bond)
+    sources = (c['parent'].astype(numpy.int64) + numpy.repeat(first_atom, n_atoms))[targets]
+    codes = c['bond'][targets]
+
+    # ring bonds: both sides are stored, the bond may be given on any of them
+    rb_offset = numpy.repeat(first_atom, n_ring_bonds)
+    owners = c['rb_owner'].astype(numpy.int64) + rb_offset
+    others = c['rb_target'].astype(numpy.int64) + rb_offset
+    valid = c['rb_target'] > -1
+    opening = numpy.flatnonzero(valid & (owners < others))
+    closing = numpy.flatnonzero(valid & (owners > others))
+
+    total = max(len(atoms), 1)
+    closing = closing[numpy.argsort(others[closing] * total + owners[closing])]
+    keys = others[closing] * total + owners[closing]
+    matches = closing[numpy.searchsorted(keys, owners[opening] * total + others[opening])]
+
+    ring_codes = c['rb_bond'][opening]
+    ring_codes = numpy.where(ring_codes != 0, ring_codes, reverse[c['rb_bond'][matches]])
+
+    sources = numpy.concatenate([sources, owners[opening]])
+    targets = numpy.concatenate([targets, others[opening]])
+    codes = numpy.concatenate([codes, ring_codes])
+
+    bonds = numpy.zeros(len(sources), dtype=list(BOND_FIELDS))
+    bonds['molecule'] = atoms['molecule'][sources]
+    bonds['source'] = atoms['atom_id'][sources]
+    bonds['target'] = atoms['atom_id'][targets]
+    bonds['order'] = numpy.where(
+        (codes == 0) & aromatic[atoms['symbol'][sources]] & aromatic[atoms['symbol'][targets]],
+        AROMATIC_ORDER, order[codes])
+    bonds['is_ring'][len(sources) - len(opening):] = True
+
+    return atoms, bonds[numpy.argsort(bonds['molecule'], kind='stable')]
+
+
+def tables(molecules):
+    """Get the tables of the atoms and of the bonds of a batch of molecules
+
+    :param molecules: the molecules, as a list of ``SMILES`` or of array graphs, a buffer given by
+        ``osmipy.smiles.dumps()`` (or ``osmipy.array_graph.dumps()``), or a store
+    :type molecules: list|bytes|osmipy.store.MoleculeStore
+    :return: the atoms and the bonds
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+
+    _check_numpy()
+
+    if isinstance(molecules, store.MoleculeStore):
+        return _tables(molecules.buffer, numpy.array(molecules.index[:len(molecules)], dtype=numpy.int64))
+
+    if not isinstance(molecules, (bytes, bytearray, memoryview, mmap.mmap)):
+        molecules = array_graph.dumps(list(molecules))
+
+    magic, version, _, n = array_graph.BATCH_HEADER.unpack_from(molecules, 0)
+    if magic != array_graph.BATCH_MAGIC:
+        raise array_graph.ArrayGraphException('not a batch of graphs')
+    if version != array_graph.VERSION:
+        raise array_graph.ArrayGraphException('unsupported version {}'.format(version))
+
+    offsets = numpy.frombuffer(molecules, dtype='<u8', count=n, offset=array_graph.BATCH_HEADER.size)
+    return _tables(molecules, offsets)
+
+
+def to_arrow(table):
+    """Get an Arrow table from a table of atoms or of bonds (requires ``pyarrow``)
+
+    :param table: the table
+    :type table: numpy.ndarray
+    :rtype: pyarrow.Table
+    """
+
+    _check_pyarrow()
+    names = table.dtype.names
+    return pyarrow.Table.from_arrays([pyarrow.array(numpy.ascontiguousarray(table[n])) for n in names], names=names)
+
+
+def write_parquet(prefix, atoms, bonds):
+    """Write the tables as Parquet files, ``<prefix>.atoms.parquet`` and ``<prefix>.bonds.parquet`` (requires
+    ``pyarrow``)
+
+    :param prefix: prefix of the paths
+    :type prefix: str
+    :param atoms: the atoms
+    :type atoms: numpy.ndarray
+    :param bonds: the bonds
+    :type bonds: numpy.ndarray
+    """
+
+    _check_pyarrow()
+    pyarrow.parquet.write_table(to_arrow(atoms), '{}.atoms.parquet'.format(prefix))
+    pyarrow.parquet.write_table(to_arrow(bonds), '{}.bonds.parquet'.format(prefix))
@@ -0,0 +1,291 @@
+"""
+Deterministic generation of random (valid) SMILES, for load testing and fuzzing.
+
+.. code-block:: python
+
+    from osmipy import generate
+
+    g = generate.Generator(seed=42, ring_density=.2, percent_fraction=.5)
+    for s in g.stream(1000000):
+        ...
+
+The molecules are built as random trees of atoms (with branches up to a given depth, and DOT-separated
+fragments), on top of which ring closures are added, and then turned into an AST (see ``osmipy.array_graph``) which is
+written by the ``Interpreter``.
+Only the syntax is valid: no attention is paid to the valences.
+
+``Generator.invalid()`` gives strings that are mutated in order to trigger a given error of the lexer or the parser
+(see ``MUTATIONS``).
+"""
+
+import random
+
+from osmipy import array_graph, lexer, smiles_parser
+from osmipy.smiles import Interpreter
+from osmipy.tokens import *
+
+BRACKET_SYMBOLS = [
+    'C', 'N', 'O', 'S', 'P', 'c', 'n', 'o', 's', 'se', 'as', 'Fe', 'Cu', 'Zn', 'Na', 'K', 'Pt', 'Si', 'H']
+
+BONDS = ['=', '#', '$', ':', '/', '\\']
+
+
+def _insert(rng, s, c):
+    """Insert ``c`` at a random position"""
+    i = rng.randint(0, len(s))
+    return s[:i] + c + s[i:]
+
+
+def _append(what):
+    return lambda rng, s: s + what
+
+
+# kind of error -> (mutation, exception that it raises)
+MUTATIONS = {
+    'unknown_symbol': (lambda rng, s: _insert(rng, s, rng.choice('&!?<>{}')), lexer.LexerException),
+    'invalid_atomic_symbol': (lambda rng, s: _insert(rng, s, rng.choice('JQ')), lexer.LexerException),
+    'unclosed_bracket': (_append('[C'), smiles_parser.ParserException),
+    'unclosed_branch': (_append('(C'), smiles_parser.ParserException),
+    'unexpected_rpar': (_append(')'), smiles_parser.ParserException),
+    'empty_bracket': (_append('[]'), smiles_parser.ParserException),
+    'invalid_hcount': (_append('[CO]'), smiles_parser.ParserException),
+    'invalid_class': (_append('[C:]'), smiles_parser.ParserException),
+    'should_be_bracketed': (_append('.Zn'), smiles_parser.ParserException),
+    'unexpected_token_in_atom': (_append('(=)'), smiles_parser.ParserException),
+    'invalid_percent': (_append('.C%C'), smiles_parser.ParserException),
+    'ring_bond_mismatch': (_append('.C-1CC=1'), smiles_parser.ParserException),
+    'ring_bond_same_atom': (_append('.C11'), smiles_parser.ParserException),
+    'ring_bond_twice': (_append('.C12CCC12'), smiles_parser.ParserException),
+    'bond_without_chain': (_append('='), smiles_parser.ParserException),
+    'unmatched_ring_id': (_append('.C1CC'), smiles_parser.ParserException),
+    'direct_pair': (_append('.C1C1'), smiles_parser.ParserException),
+}
+
+
+class Generator:
+    """Generator of random SMILES
+
+    :param seed: seed of the random number generator
+    :param min_atoms: minimum number of atoms
+    :type min_atoms: int
+    :param max_atoms: maximum number of atoms
+    :type max_atoms: int
+    :param max_depth: maximum depth of the branches
+    :type max_depth: int
+    :param branch_probability: probability for an atom to hold a branch
+    :type branch_probability: float
+    :param ring_density: number of ring closures per atom
+    :type ring_density: float
+    :param bracket_fraction: fraction of bracketed atoms
+    :type bracket_fraction: float
+    :param aromatic_fraction: fraction of aromatic atoms
+    :type aromatic_fraction: float
+    :param bond_probability: probability for a bond to be explicit (and not single)
+    :type bond_probability: float
+    :param dot_probability: probability to start a new fragment
+    :type dot_probability: float
+    :param percent_fraction: fraction of ring ids that are written with ``%nn``
+    :type percent_fraction: float
+    """
+
+    def __init__(
+            self,
+            seed=None,
+            min_atoms=5,
+            max_atoms=30,
+            max_depth=3,
+            branch_probability=.2,
+            ring_density=.1,
+            bracket_fraction=.1,
+            aromatic_fraction=.2,
+            bond_probability=.1,
+            dot_probability=.02,
+            percent_fraction=0.):
+
+        self.rng = random.Random(seed)
+
+        self.min_atoms = min_atoms
+        self.max_atoms = max_atoms
+        self.max_depth = max_depth
+        self.branch_probability = branch_probability
+        self.ring_density = ring_density
+        self.bracket_fraction = bracket_fraction
+        self.aromatic_fraction = aromatic_fraction
+        self.bond_probability = bond_probability
+        self.dot_probability = dot_probability
+        self.percent_fraction = percent_fraction
+
+    def _bond(self):
+        if self.rng.random() < self.bond_probability:
+            return array_graph.BOND_CODES[self.rng.choice(BONDS)]
+        return 0
+
+    def _atom(self, g):
+        """Add the properties of a random atom to the graph"""
+
+        rng = self.rng
+        isotope, chirality, hcount, charge, klass = 0, None, 0, 0, 0
+
+        if rng.random() < self.bracket_fraction:
+            symbol = rng.choice(BRACKET_SYMBOLS)
+            if rng.random() < .2:
+                isotope = rng.randint(1, 250)
+            if rng.random() < .2:
+                chirality = rng.choice(['@', '@@'])
+            if symbol != 'H' and rng.random() < .5:
+                hcount = rng.randint(1, 4)
+            if rng.random() < .3:
+                charge = rng.choice([-1, 1, -2, 2, 3])
+            if rng.random() < .1:
+                klass = rng.randint(1, 99)
+
+            if symbol in ORGANIC_SUBSET and not (isotope or chirality or hcount or charge or klass):
+                hcount = 1  # otherwise, it would not be bracketed
+        elif rng.random() < self.aromatic_fraction:
+            symbol = rng.choice(AROMATIC_SYMBOLS)
+        else:
+            symbol = rng.choice(['C', 'C', 'C', 'C', 'N', 'O', 'S', 'P', 'F', 'Cl', 'Br', 'B', '*'])
+
+        g.symbol.append(array_graph.SYMBOL_CODES[symbol])
+        g.isotope.append(isotope)
+        g.chirality.append(array_graph.CHIRALITY_CODES[chirality])
+        g.hcount.append(hcount)
+        g.charge.append(charge)
+        g.klass.append(klass)
+
+    def graph(self):
+        """Generate a random molecule, as an array graph
+
+        :rtype: osmipy.array_graph.ArrayGraph
+        """
+
+        rng = self.rng
+        g = array_graph.ArrayGraph()
+        n = rng.randint(self.min_atoms, self.max_atoms)
+
+        # tree (in the order of the string)
+        stack = [(-1, array_graph.LINK_ROOT, 0, 0)]  # (parent, link, bond, depth)
+        neighbours = []
+
+        while stack and len(g.atom_id) < n:
+            parent, link, bond, depth = stack.pop()
+            index = len(g.atom_id)
+
+            g.atom_id.append(index)
+            g.parent.append(parent)
+            g.link.append(link)
+            g.bond.append(bond)
+            g.ring_bonds.append(0)
+            self._atom(g)
+
+            neighbours.append(set())
+            if parent > -1:  # (also for DOT, otherwise the parser would see a "direct pair")
+                neighbours[parent].add(index)
+                neighbours[index].add(parent)
+
+            if not stack or rng.random() < .9:
+                next_bond = array_graph.BOND_CODES['.'] if rng.random() < self.dot_probability else self._bond()
+                stack.append((index, array_graph.LINK_CHAIN, next_bond, depth))
+
+            if depth < self.max_depth:
+                while rng.random() < self.branch_probability:
+                    stack.append((index, array_graph.LINK_BRANCH, self._bond(), depth + 1))
+
+        n = len(g.atom_id)
+        g.next_atom_id = n
+
+        # ring closures, between atoms that are not bonded yet
+        pairs = set()
+        for _ in range(int(self.ring_density * n)):
+            for _ in range(10):  # (a few attempts)
+                i, j = rng.randrange(n), rng.randrange(n)
+                if i > j:
+                    i, j = j, i
+                if i != j and j not in neighbours[i] and (i, j) not in pairs:
+                    pairs.add((i, j))
+                    break
+
+        # ring ids, attributed in the order of the string
+        openings = dict((i, []) for i in range(n))
+        closings = dict((i, []) for i in range(n))
+        for i, j in sorted(pairs):
+            openings[i].append(j)
+
+        free_ids = list(range(1, 10))
+        free_percent_ids = list(range(10, 100))
+        open_rings = {}  # (i, j) -> ring id
+        ring_bonds = [[] for _ in range(n)]  # (ring id, bond, other)
+
+        for k in range(n):
+            released = []
+            for i in closings[k]:
+                ring_id = open_rings.pop((i, k))
+                ring_bonds[k].append((ring_id, 0, i))
+                released.append(ring_id)
+
+            for j in openings[k]:
+                use_percent = not free_ids or rng.random() < self.percent_fraction
+                pool = free_percent_ids if use_percent and free_percent_ids else free_ids
+                if not pool:
+                    continue  # no more ids available
+
+                ring_id = pool.pop(0)
+                open_rings[(k, j)] = ring_id
+                closings[j].append(k)
+                ring_bonds[k].append((ring_id, self._bond(), j))
+
+            for ring_id in released:
+                (free_ids if ring_id < 10 else free_percent_ids).append(ring_id)
+                (free_ids if ring_id < 10 else free_percent_ids).sort()
+
+        for k in range(n):
+            g.ring_bonds[k] = len(ring_bonds[k])
+            for ring_id, bond, other in ring_bonds[k]:
+                g.rb_owner.append(k)
+                g.rb_target.append(other)
+                g.rb_ring_id.append(ring_id)
+                g.rb_bond.append(bond)
+
+        return g
+
+    def ast(self):
+        """Generate a random molecule, as an AST
+
+        :rtype: osmipy.smiles_ast.Chain
+        """
+
+        return self.graph().to_ast()[0]
+
+    def smiles(self):
+        """Generate a random SMILES
+
+        :rtype: str
+        """
+
+        return Interpreter(self.ast()).interpret()
+
+    def stream(self, n):
+        """Generate ``n`` random SMILES
+
+        :param n: number of SMILES
+        :type n: int
+        :rtype: collections.Iterable[str]
+        """
+
+        for _ in range(n):
+            yield self.smiles()
+
+    def invalid(self, kind=None):
+        """Generate an invalid SMILES, by mutation of a valid one
+
+        :param kind: the kind of error (see ``MUTATIONS``), random if not given
+        :type kind: str
+        :return: the SMILES, the kind of error and the exception that it should raise
+        :rtype: tuple(str, str, type)
+        """
+
+        if kind is None:
+            kind = self.rng.choice(sorted(MUTATIONS))
+
+        mutation, exception = MUTATIONS[kind]
+        return mutation(self.rng, self.smiles()), kind, exception
@@ -0,0 +1,316 @@
+"""
+Conversion between implicit and explicit hydrogens, on the array representation of the molecules (see
+``osmipy.array_graph``).
+
+``add_hydrogens()`` writes the hydrogens of each atom (the implicit ones of the atoms of the organic subset, and the
+``H`` of the bracketed atoms) as ``[H]`` atoms, in branches that follow their atom, while ``remove_hydrogens()`` does
+the opposite (the atoms go back to the organic subset when their valence allows it):
+
+.. code-block:: python
+
+    from osmipy import smiles
+
+    s = smiles.SMILES('C[C@@H](O)N')
+    s.add_hydrogens()  # C([H])([H])([H])[C@@]([H])(O([H]))N([H])([H])
+    s.add_hydrogens().remove_hydrogens()  # C[C@@H](O)N
+
+Both are done in a single pass over the atoms, the atom ids being renumbered in the order of the string, and the
+chirality of the atoms being adapted to the new order of their neighbours.
+Hydrogens that cannot be implicit (isotopes, charged, with a class, bonded to another hydrogen or to more than one
+atom, ...) are kept.
+
+.. warning::
+
+    The AST does not record whether an atom was written between brackets: it is deduced from its properties (as the
+    ``Interpreter`` does to write it). Therefore, a bracketed atom of the organic subset without any hydrogen, charge,
+    isotope, chirality or (positive) class, such as ``[C]``, ``[O]`` or ``[C:0]``, is handled as ``C`` or ``O``, and
+    gets implicit hydrogens (``[C]`` gives ``C([H])([H])([H])([H])``).
+"""
+
+from osmipy import adjacency, array_graph
+from osmipy.tokens import *
+
+H = array_graph.SYMBOL_CODES['H']
+
+DOT_CODE = array_graph.BOND_CODES[DOT]
+SINGLE_CODES = frozenset((0, array_graph.BOND_CODES['-']))
+
+ORGANIC = frozenset(array_graph.SYMBOL_CODES[s] for s in ORGANIC_SUBSET)
+AROMATIC = frozenset(array_graph.SYMBOL_CODES[s] for s in AROMATIC_SYMBOLS)
+VALENCES = dict((array_graph.SYMBOL_CODES[s], NORMAL_VALENCES[s.title()]) for s in ORGANIC_SUBSET)
+
+BOND_ORDERS = tuple(1 if b is None else (1.5 if b == COLON else BOND_ORDER[b]) for b in array_graph.BONDS)
+
+INVERTED_CHIRALITY = array_graph.INVERTED_CHIRALITY_CODES  # (on the codes)
+
+IMPLICIT_H = -1  # (in the order of the neighbours)
+
+
+def _bond_order(code, a, b, symbols):
+    if code == 0 and symbols[a] in AROMATIC and symbols[b] in AROMATIC:
+        return 1.5
+    return BOND_ORDERS[code]
+
+
+def _is_bracketed(graph, i):
+    """Whether atom ``i`` is written between brackets"""
+
+    return graph.isotope[i] > 0 or graph.chirality[i] != 0 or graph.hcount[i] != 0 or graph.charge[i] != 0 or \
+        graph.klass[i] > 0 or graph.symbol[i] not in ORGANIC and array_graph.SYMBOLS[graph.symbol[i]] != WILDCARD
+
+
+def _can_be_organic(graph, i):
+    """Whether atom ``i`` could be written without brackets (given the right number of hydrogens)"""
+
+    return graph.symbol[i] in ORGANIC and graph.isotope[i] == 0 and graph.chirality[i] == 0 and \
+        graph.charge[i] == 0 and graph.klass[i] <= 0
+
+
+def _valence_hcount(symbol, total):
+    """Number of implicit hydrogens of an atom of the organic subset, given the sum of its bond orders"""
+
+    total = int(total)
+    for v in VALENCES[symbol]:
+        if v >= total:
+            return v - total
+
+    return 0
+
+
+class _Structure:
+    """Neighbours of the atoms of a graph, in the order of the string, and sums of the bond orders
+
+    :param graph: the graph
+    :type graph: osmipy.array_graph.ArrayGraph
+    """
+
+    def __init__(self, graph):
+        n = len(graph)
+        symbols = graph.symbol.tolist() if hasattr(graph.symbol, 'tolist') else list(graph.symbol)
+        parents = graph.parent.tolist() if hasattr(graph.parent, 'tolist') else list(graph.parent)
+
+        self.preceding = [-1] * n  # (atom before, if bonded)
+        self.branches = [[] for _ in range(n)]  # (bonded children)
+        self.chain = [-1] * n
+        self.dot_children = [0] * n
+        self.rings = [[] for _ in range(n)]
+        self.totals = [0.] * n  # (sum of the bond orders)
+
+        for i, (parent, link, bond) in enumerate(zip(parents, graph.link, graph.bond)):
+            if link == array_graph.LINK_ROOT:
+                continue
+            if bond == DOT_CODE:
+                self.dot_children[parent] += 1
+                continue
+
+            self.preceding[i] = parent
+            if link == array_graph.LINK_BRANCH:
+                self.branches[parent].append(i)
+            else:
+                self.chain[parent] = i
+
+            order = _bond_order(bond, i, parent, symbols)
+            self.totals[i] += order
+            self.totals[parent] += order
+
+        # ring bonds (the bond may be given on either side)
+        ring_bonds = list(zip(graph.rb_owner, graph.rb_target, graph.rb_bond))
+        bonds = {}
+        for owner, target, bond in ring_bonds:
+            if target > -1 and bond != 0:
+                bonds[(owner, target) if owner < target else (target, owner)] = bond
+
+        for owner, target, bond in ring_bonds:
+            if target > -1:
+                self.rings[owner].append(target)
+                self.totals[owner] += _bond_order(
+                    bonds.get((owner, target) if owner < target else (target, owner), 0), owner, target, symbols)
+
+    def degree(self, i):
+        return (self.preceding[i] > -1) + len(self.branches[i]) + (self.chain[i] > -1) + len(self.rings[i])
+
+    def order(self, i, hcount, removed=frozenset()):
+        """Order of the neighbours of an atom (``IMPLICIT_H`` for the implicit hydrogens), without the atoms that
+        are removed, which become implicit
+        """
+
+        order = []
+        if self.preceding[i] > -1:
+            order.append(IMPLICIT_H if self.preceding[i] in removed else self.preceding[i])
+
+        order.extend([IMPLICIT_H] * hcount)
+        order.extend(self.rings[i])
+        order.extend(IMPLICIT_H if j in removed else j for j in self.branches[i])
+        if self.chain[i] > -1:
+            order.append(IMPLICIT_H if self.chain[i] in removed else self.chain[i])
+
+        return order
+
+
+def implicit_hydrogens(graph):
+    """Number of hydrogens of each atom that are not written as atoms (implicit hydrogens of the atoms of the organic
+    subset, and ``H`` of the bracketed atoms). Bracketed atoms without hydrogens such as ``[C]`` are not distinguished
+    from the atoms of the organic subset (see the module documentation).
+
+    :param graph: the graph
+    :type graph: osmipy.array_graph.ArrayGraph
+    :rtype: list of int
+    """
+
+    structure = _Structure(graph)
+
+    return [
+        (graph.hcount[i] if _is_bracketed(graph, i) else (
+            _valence_hcount(graph.symbol[i], structure.totals[i]) if graph.symbol[i] in ORGANIC else 0))
+        for i in range(len(graph))
+    ]
+
+
+def _append_atom(result, atom_id, parent, link, bond, symbol, isotope, chirality, hcount, charge, klass, ring_bonds):
+    result.atom_id.append(atom_id)
+    result.parent.append(parent)
+    result.link.append(link)
+    result.bond.append(bond)
+    result.symbol.append(symbol)
+    result.isotope.append(isotope)
+    result.chirality.append(chirality)
+    result.hcount.append(hcount)
+    result.charge.append(charge)
+    result.klass.append(klass)
+    result.ring_bonds.append(ring_bonds)
+
+
+def _copy_ring_bonds(graph, result, indices):
+    for owner, target, ring_id, bond in zip(graph.rb_owner, graph.rb_target, graph.rb_ring_id, graph.rb_bond):
+        result.rb_owner.append(indices[owner])
+        result.rb_target.append(-1 if target < 0 else indices[target])
+        result.rb_ring_id.append(ring_id)
+        result.rb_bond.append(bond)
+
+
+def add_hydrogens(graph):
+    """Get a graph where all the hydrogens are written as atoms.
+
+    The hydrogens of a bracketed atom of the organic subset that would get a different number of implicit hydrogens
+    without them (*e.g.*, ``[CH2]``) are kept.
+
+    :param graph: the graph
+    :type graph: osmipy.array_graph.ArrayGraph
+    :rtype: osmipy.array_graph.ArrayGraph
+    """
+
+    structure = _Structure(graph)
+    result = array_graph.ArrayGraph()
+    indices = []
+
+    for i, (parent, link, bond, symbol, isotope, chirality, hcount, charge, klass, ring_bonds) in enumerate(zip(
+            graph.parent, graph.link, graph.bond, graph.symbol, graph.isotope, graph.chirality, graph.hcount,
+            graph.charge, graph.klass, graph.ring_bonds)):
+
+        if _is_bracketed(graph, i):
+            added = hcount
+            if added > 0 and _can_be_organic(graph, i) and \
+                    _valence_hcount(symbol, structure.totals[i] + added) != 0:
+                added = 0  # (would get implicit hydrogens)
+        else:
+            added = _valence_hcount(symbol, structure.totals[i]) if symbol in ORGANIC else 0
+
+        if added > 0:
+            hcount = 0
+            if chirality != 0 and added == 1 and len(structure.rings[i]) % 2 == 1:
+                chirality = INVERTED_CHIRALITY[chirality]  # (the hydrogens now come after the ring bonds)
+
+        index = len(result)
+        indices.append(index)
+        _append_atom(
+            result, index, -1 if parent < 0 else indices[parent], link, bond, symbol, isotope, chirality, hcount,
+            charge, klass, ring_bonds)
+
+        for _ in range(added):
+            _append_atom(result, len(result), index, array_graph.LINK_BRANCH, 0, H, 0, 0, 0, 0, -1, 0)
+
+    _copy_ring_bonds(graph, result, indices)
+    result.next_atom_id = len(result)
+
+    return result
+
+
+def remove_hydrogens(graph):
+    """Get a graph where the hydrogens are implicit, when possible: hydrogen atoms without isotope, charge, class or
+    hydrogens, bonded (by a single bond) to exactly one atom that is not a hydrogen, and without a dot after them
+
+    :param graph: the graph
+    :type graph: osmipy.array_graph.ArrayGraph
+    :rtype: osmipy.array_graph.ArrayGraph
+    """
+
+    structure = _Structure(graph)
+    n = len(graph)
+
+    # hydrogens that are removed
+    removed = set()
+    for i in range(n):
+        if graph.symbol[i] != H or graph.isotope[i] or graph.chirality[i] or graph.hcount[i] or graph.charge[i] or \
+                graph.klass[i] > 0:
+            continue
+        if structure.degree(i) != 1 or structure.dot_children[i] > 0 or structure.rings[i]:
+            continue
+
+        neighbour = structure.preceding[i]
+        bond = graph.bond[i]
+        if neighbour < 0:
+            neighbour = structure.branches[i][0] if structure.branches[i] else structure.chain[i]
+            bond = graph.bond[neighbour]
+
+        if graph.symbol[neighbour] != H and bond in SINGLE_CODES:
+            removed.add(i)
+
+    added = [0] * n
+    for i in removed:
+        added[structure.preceding[i] if structure.preceding[i] > -1 else (
+            structure.branches[i] or [structure.chain[i]])[0]] += 1
+
+    # new graph
+    result = array_graph.ArrayGraph()
+    indices = [-1] * n
+
+    for i, (parent, link, bond, symbol, isotope, chirality, hcount, charge, klass, ring_bonds) in enumerate(zip(
+            graph.parent, graph.link, graph.bond, graph.symbol, graph.isotope, graph.chirality, graph.hcount,
+            graph.charge, graph.klass, graph.ring_bonds)):
+
+        if i in removed:
+            continue
+
+        if parent in removed:  # (the hydrogen was the first atom of its fragment)
+            parent, link, bond = graph.parent[parent], graph.link[parent], graph.bond[parent]
+
+        if added[i] > 0:
+            total = hcount if _is_bracketed(graph, i) else (
+                _valence_hcount(symbol, structure.totals[i]) if symbol in ORGANIC else 0)
+            total += added[i]
+
+            if chirality != 0 and total == 1:
+                old = structure.order(i, hcount, removed)  # (with the hydrogen where it was)
+                new = [j for j in old if j != IMPLICIT_H]
+                if structure.preceding[i] > -1 and structure.preceding[i] not in removed:
+                    new.insert(1, IMPLICIT_H)
+                else:
+                    new.insert(0, IMPLICIT_H)
+
+                if adjacency._parity(old, new):
+                    chirality = INVERTED_CHIRALITY[chirality]
+
+            hcount = total
+            if _can_be_organic(graph, i) and _valence_hcount(symbol, structure.totals[i] - added[i]) == total:
+                hcount = 0
+
+        index = len(result)
+        indices[i] = index
+        _append_atom(
+            result, index, -1 if parent < 0 else indices[parent], link, bond, symbol, isotope, chirality, hcount,
+            charge, klass, ring_bonds)
+
+    _copy_ring_bonds(graph, result, indices)
+    result.next_atom_id = len(result)
+
+    return result
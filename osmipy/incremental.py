@@ -0,0 +1,224 @@
+"""
+Incremental re-parsing of edited SMILES.
+
+A molecule parsed by ``parse()`` keeps its string, the position of its branches and its ring closures (its
+``source``). After an edit, ``reparse()`` only re-lexes and re-parses the smallest branch that contains the edit and
+does not share any ring closure with the rest of the molecule, and puts the new branch in place of the old one: the
+rest of the tree is reused as is, and only the atom ids that come after the branch are shifted.
+
+.. code-block:: python
+
+    from osmipy import incremental
+
+    s = incremental.parse('CC(C)(C)C(=O)Nc1ccccc1')
+    s = incremental.reparse(s, 'CC(CO)(C)C(=O)Nc1ccccc1', 3, 5)  # "C" -> "CO" in the first branch
+
+The result is the same as a full parse of the new string (which is done when the edit is not inside such a branch,
+*e.g.* if it is in the main chain or changes the parentheses, or if the molecule was not obtained from this module).
+Since its tree is reused, the previous molecule is emptied by ``reparse()``.
+"""
+
+from osmipy import array_graph, lexer, smiles, smiles_parser
+from osmipy.tokens import *
+
+
+class Source:
+    """String of a molecule, with what is needed to re-parse part of it
+
+    :param text: the string
+    :type text: str
+    :param spans: the branches, as ``(start, end, branch)``, where ``text[start:end]`` is the branch, parentheses
+        included
+    :type spans: list
+    :param rings: the ring closures, as ``(ring_id, id of the first atom, id of the second atom)``
+    :type rings: list
+    """
+
+    def __init__(self, text, spans, rings):
+        self.text = text
+        self.spans = spans
+        self.rings = rings
+
+
+def _rings(parser):
+    """Ring closures found by a parser"""
+
+    return [
+        (rb.ring_id, rb1.parent.atom.atom_id, rb.parent.atom.atom_id)
+        for rb1, rb in parser.ring_bond_pairs
+    ]
+
+
+def parse(text):
+    """Parse a string, and keep its source so that it can be re-parsed with ``reparse()``
+
+    :param text: the string
+    :type text: str
+    :rtype: osmipy.smiles.SMILES
+    """
+
+    parser = smiles_parser.Parser(lexer.Lexer(text))
+    parser.branch_spans = []
+
+    obj = smiles.SMILES.__new__(smiles.SMILES)
+    obj.node = parser.smiles()
+    obj.atom_ids = smiles.AtomIds(parser.atom_ids)
+    obj.next_atom_id = parser.next_atom_id
+    obj.source = Source(text, parser.branch_spans, _rings(parser))
+    obj._adjacency = None
+    obj._components = parser.components
+
+    return obj
+
+
+def _parse_branch(text):
+    """Parse a (self-contained) branch
+
+    :return: the branch, the parser, or ``None`` if the text is not a branch with all its ring ids matched
+    :rtype: tuple
+    """
+
+    parser = smiles_parser.Parser(lexer.Lexer(text))
+    parser.branch_spans = []
+
+    try:
+        if parser.current_token.type != LPAR:
+            return None, None
+        branch = parser.branch()
+        parser.eat(EOF)
+        parser.final_checks()
+    except smiles_parser.ERRORS:
+        return None, None
+
+    return branch, parser
+
+
+def reparse(previous, text, start, end):
+    """Parse an edited version of a molecule, reusing what did not change.
+
+    The edit replaced the part of the previous string that starts at ``start`` by ``text[start:end]`` (so that
+    ``text[end:]`` is the end of the previous string).
+
+    :param previous: the molecule before the edit (which is emptied if its tree is reused)
+    :type previous: osmipy.smiles.SMILES
+    :param text: the edited string
+    :type text: str
+    :param start: start of the edit
+    :type start: int
+    :param end: end of the edit, in the edited string
+    :type end: int
+    :rtype: osmipy.smiles.SMILES
+    """
+
+    source = previous.source
+    if source is None or previous.node is None:
+        return parse(text)
+
+    old = source.text
+    delta = len(text) - len(old)
+    old_end = end - delta
+
+    if not (0 <= start <= end <= len(text) and start <= old_end) or \
+            text[:start] != old[:start] or text[end:] != old[old_end:]:
+        return parse(text)
+
+    # smallest self-contained branch around the edit
+    candidates = sorted(
+        (span for span in source.spans if span[0] < start and old_end < span[1]), key=lambda x: x[1] - x[0])
+
+    for span in candidates:
+        s, e, branch = span
+        first = branch.chain.left.atom.atom_id
+        count = sum(1 for _ in array_graph.walk(branch.chain))
+        last = first + count
+
+        if any((first <= a < last) != (first <= b < last) for _, a, b in source.rings):
+            continue  # shares a ring closure with the rest of the molecule
+
+        new_branch, parser = _parse_branch(text[s:e + delta])
+        if new_branch is None:
+            return parse(text)
+
+        # ring ids must not be the ones that are open around the branch
+        crossing = set(i for i, a, b in source.rings if a < first and b >= last)
+        if crossing and any(i in crossing for i, _, _ in _rings(parser)):
+            return parse(text)
+
+        return _splice(previous, text, span, count, new_branch, parser)
+
+    return parse(text)
+
+
+def _splice(previous, text, span, count, new_branch, parser):
+    """Put the new branch in place of the old one
+
+    :rtype: osmipy.smiles.SMILES
+    """
+
+    s, e, branch = span
+    source = previous.source
+    delta = len(text) - len(source.text)
+
+    atoms = previous.atom_ids.atoms
+    first = branch.chain.left.atom.atom_id
+    last = first + count
+    new_atoms = parser.atom_ids
+    shift = len(new_atoms) - count
+
+    owner = branch.parent
+    owner.branches[next(i for i, b in enumerate(owner.branches) if b is branch)] = new_branch
+    new_branch.parent = owner
+
+    # atom ids
+    for atom in new_atoms:
+        atom.atom_id += first
+
+    tail = atoms[last:]
+    if shift != 0:
+        for atom in tail:
+            atom.atom_id += shift
+
+    atoms[first:] = new_atoms
+    atoms.extend(tail)
+
+    # positions and ring closures
+    spans = []
+    for span_ in source.spans:
+        s_, e_, b_ = span_
+        if e_ <= s:
+            spans.append(span_)
+        elif s_ >= e:
+            spans.append((s_ + delta, e_ + delta, b_))
+        elif s_ < s:  # around
+            spans.append((s_, e_ + delta, b_))
+
+    spans.extend((s_ + s, e_ + s, b_) for s_, e_, b_ in parser.branch_spans)
+
+    rings = []
+    for ring_id, a, b in source.rings:
+        if b < first:
+            rings.append((ring_id, a, b))
+        elif a >= last:
+            rings.append((ring_id, a + shift, b + shift))
+        elif a < first:  # around
+            rings.append((ring_id, a, b + shift))
+
+    rings.extend(_rings(parser))  # (ids are already shifted)
+
+    obj = smiles.SMILES.__new__(smiles.SMILES)
+    obj.node = previous.node
+    obj.atom_ids = smiles.AtomIds(atoms)
+    obj.next_atom_id = len(atoms)
+    obj.source = Source(text, spans, rings)
+    obj._adjacency = None
+    obj._components = None
+
+    # the tree now belongs to the new molecule
+    previous.node = None
+    previous.atom_ids = smiles.AtomIds()
+    previous.next_atom_id = 0
+    previous.source = None
+    previous._adjacency = None
+    previous._components = None
+
+    return obj
@@ -0,0 +1,237 @@
+"""
+Library of molecules in which identical subtrees are stored once.
+
+Each molecule is stored as a tree of immutable ``Node`` (an atom, with its ring bonds, branches and the rest of its
+chain, which is thus a ``Chain`` of the AST).
+The subtrees that do not contain any ring bond (substituents, counter-ions, the end of a chain, ...) do not depend on
+the rest of the molecule: they are interned in the library, so that they are shared by all the molecules (and all
+the places in a molecule) where they appear, and two of them are equal if and only if they are the same object.
+The other nodes are specific to their molecule.
+
+Since shared nodes cannot hold the atom ids, those are kept per molecule, in the order of the atoms in the string
+(nothing is stored if the atom ids are ``0, 1, 2, ...``, which is the case after parsing).
+
+.. code-block:: python
+
+    from osmipy import interning
+
+    library = interning.Library()
+    for s in strings:
+        library.add(smiles.SMILES(s))
+
+    molecule = library[42]  # a SMILES object
+"""
+
+import array
+
+from osmipy import array_graph, smiles
+
+
+class Node:
+    """Node of a tree of the library: an atom, its ring bonds, its branches and the rest of its chain.
+
+    ``hash`` is computed from the content of the node and of its children, so that it can be computed once.
+
+    :param atom: the atom, as ``(symbol, isotope, chirality, hcount, charge, klass)`` codes (see ``array_graph``)
+    :type atom: tuple
+    :param ring_bonds: the ring bonds, as ``(ring_id, bond, index of the target atom)``
+    :type ring_bonds: tuple
+    :param branches: the branches, as ``(bond, node)``
+    :type branches: tuple
+    :param bond: bond with the rest of the chain
+    :type bond: int
+    :param right: the rest of the chain
+    :type right: Node
+    :param interned: whether the node is shared (thus without any ring bond)
+    :type interned: bool
+    """
+
+    __slots__ = ('atom', 'ring_bonds', 'branches', 'bond', 'right', 'interned', 'hash', 'size')
+
+    def __init__(self, atom, ring_bonds=(), branches=(), bond=0, right=None, interned=False):
+        self.atom = atom
+        self.ring_bonds = ring_bonds
+        self.branches = branches
+        self.bond = bond
+        self.right = right
+        self.interned = interned
+
+        self.hash = hash((
+            atom, ring_bonds, tuple((b, n.hash) for b, n in branches), bond, None if right is None else right.hash))
+        self.size = 1 + sum(n.size for _, n in branches) + (0 if right is None else right.size)
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not Node or self.hash != other.hash or (self.interned and other.interned):
+            return False
+
+        return self.atom == other.atom and \
+            self.ring_bonds == other.ring_bonds and \
+            self.bond == other.bond and \
+            self.branches == other.branches and \
+            self.right == other.right
+
+
+class Library:
+    """Library of molecules, with shared subtrees
+    """
+
+    def __init__(self):
+        self.atoms = {}
+        self.nodes = {}
+        self.roots = []
+        self.atom_ids = []  # overlay of atom ids for each molecule (or ``None``)
+        self.next_atom_ids = []
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __getitem__(self, item):
+        return self.smiles(item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.smiles(i)
+
+    def number_of_nodes(self):
+        """Number of shared nodes
+
+        :rtype: int
+        """
+
+        return len(self.nodes)
+
+    def add(self, molecule):
+        """Add a molecule
+
+        :param molecule: the molecule
+        :type molecule: osmipy.smiles.SMILES|osmipy.array_graph.ArrayGraph
+        :return: the index of the molecule in the library
+        :rtype: int
+        """
+
+        if type(molecule) is not array_graph.ArrayGraph:
+            molecule = molecule.to_graph()
+
+        atom_ids = molecule.atom_id.tolist()
+        self.roots.append(self.intern(molecule))
+        self.atom_ids.append(None if atom_ids == list(range(len(atom_ids))) else array.array('i', atom_ids))
+        self.next_atom_ids.append(molecule.next_atom_id)
+
+        return len(self.roots) - 1
+
+    def intern(self, graph):
+        """Get the tree of a molecule, with its ring-free subtrees interned
+
+        :param graph: the molecule
+        :type graph: osmipy.array_graph.ArrayGraph
+        :rtype: Node
+        """
+
+        n = len(graph)
+        if n == 0:
+            return None
+
+        branches = [[] for _ in range(n)]
+        chain_child = [-1] * n
+        ring_bonds = [[] for _ in range(n)]
+
+        parents, links, bonds = graph.parent.tolist(), graph.link.tolist(), graph.bond.tolist()
+
+        for i in range(1, n):
+            if links[i] == array_graph.LINK_CHAIN:
+                chain_child[parents[i]] = i
+            else:
+                branches[parents[i]].append(i)
+
+        for owner, target, ring_id, bond in zip(
+                graph.rb_owner.tolist(), graph.rb_target.tolist(), graph.rb_ring_id.tolist(), graph.rb_bond.tolist()):
+            ring_bonds[owner].append((ring_id, bond, target))
+
+        atoms = self.atoms
+        table = self.nodes
+        nodes = [None] * n
+
+        # children come after their parent in the arrays, so the tree is built from the end
+        for i, atom in zip(reversed(range(n)), reversed(list(zip(
+                *(getattr(graph, c).tolist() for c in ('symbol', 'isotope', 'chirality', 'hcount', 'charge', 'klass'))
+        )))):
+            atom = atoms.setdefault(atom, atom)
+            rb = tuple(ring_bonds[i])
+            br = tuple((bonds[c], nodes[c]) for c in branches[i])
+            right, bond = (None, 0) if chain_child[i] < 0 else (nodes[chain_child[i]], bonds[chain_child[i]])
+
+            shareable = not rb and all(node.interned for _, node in br) and (right is None or right.interned)
+
+            if shareable:
+                key = (atom, tuple((b, id(node)) for b, node in br), bond, id(right))
+                node = table.get(key)
+                if node is None:
+                    node = table[key] = Node(atom, (), br, bond, right, interned=True)
+            else:
+                node = Node(atom, rb, br, bond, right)
+
+            nodes[i] = node
+
+        return nodes[0]
+
+    def graph(self, i):
+        """Get molecule ``i`` as an array graph
+
+        :param i: index of the molecule
+        :type i: int
+        :rtype: osmipy.array_graph.ArrayGraph
+        """
+
+        g = array_graph.ArrayGraph(self.next_atom_ids[i])
+        root = self.roots[i]
+        if root is None:
+            return g
+
+        atom_ids = self.atom_ids[i]
+        stack = [(root, -1, array_graph.LINK_ROOT, 0)]
+
+        while stack:
+            node, parent, link, bond = stack.pop()
+            index = len(g.atom_id)
+
+            symbol, isotope, chirality, hcount, charge, klass = node.atom
+            g.atom_id.append(index if atom_ids is None else atom_ids[index])
+            g.parent.append(parent)
+            g.link.append(link)
+            g.bond.append(bond)
+            g.symbol.append(symbol)
+            g.isotope.append(isotope)
+            g.chirality.append(chirality)
+            g.hcount.append(hcount)
+            g.charge.append(charge)
+            g.klass.append(klass)
+            g.ring_bonds.append(len(node.ring_bonds))
+
+            for ring_id, rb_bond, target in node.ring_bonds:
+                g.rb_owner.append(index)
+                g.rb_target.append(target)
+                g.rb_ring_id.append(ring_id)
+                g.rb_bond.append(rb_bond)
+
+            if node.right is not None:
+                stack.append((node.right, index, array_graph.LINK_CHAIN, node.bond))
+
+            for b, branch in reversed(node.branches):
+                stack.append((branch, index, array_graph.LINK_BRANCH, b))
+
+        return g
+
+    def smiles(self, i):
+        """Get molecule ``i``
+
+        :param i: index of the molecule
+        :type i: int
+        :rtype: osmipy.smiles.SMILES
+        """
+
+        return smiles.SMILES.from_graph(self.graph(i))
@@ -7,6 +7,9 @@ class LexerException(Exception):
         self.position = position
         self.message = msg
 
+    def __reduce__(self):  # (so that it can be sent back by a worker process)
+        return type(self), (self.position, self.message)
+
 
 class Lexer:
     """Lexer
@@ -70,3 +73,113 @@ class Lexer:
                 raise LexerException(pos, 'unknown symbol {}'.format(self.current_char))
 
         yield Token(EOF, None, self.pos)
+
+
+BYTES_TR = dict((ord(k), v) for k, v in SYMBOLS_TR.items())
+
+BYTES_CHARS = tuple(chr(i) for i in range(256))
+
+BYTES_ALPHA = frozenset(range(ord('a'), ord('z') + 1)) | frozenset(range(ord('A'), ord('Z') + 1))
+
+BYTES_SYMBOLS = dict(
+    (ord(s[0]) if len(s) == 1 else ord(s[0]) * 256 + ord(s[1]), s) for s in TOT_SYMBOLS)
+
+
+class BytesLexer(Lexer):
+    """Lexer working directly on an ASCII buffer (``bytes``, ``bytearray``, ``mmap`` or ``memoryview``),
+    between two byte offsets.
+
+    No intermediate ``str`` is built: the characters are classified from their byte value, and the token values are
+    taken from pre-built tables (so nothing is actually decoded). The position of the tokens are given relative to
+    ``start``.
+
+    :param input_: the buffer
+    :param start: offset of the first character
+    :type start: int
+    :param end: offset after the last character (if ``None``, the end of the buffer)
+    :type end: int
+    """
+
+    def __init__(self, input_, start=0, end=None):
+        self.start = start
+        self.end = len(input_) if end is None else end
+        super().__init__(input_)
+
+        self.pos = start
+        self.current_char = None if self.pos >= self.end else self.input[self.pos]
+
+    def next(self):
+        """Go to the next character
+        """
+        self.pos += 1
+        self.current_char = None if self.pos >= self.end else self.input[self.pos]
+
+    def atom(self):
+        """Consume and return an atomic symbol from the input.
+
+        :return: str
+        """
+
+        result = self.current_char
+        pos = self.pos
+        self.next()
+
+        if self.current_char is not None and self.current_char in BYTES_ALPHA:
+            nresult = result * 256 + self.current_char
+            if nresult in BYTES_SYMBOLS:
+                self.next()
+                return BYTES_SYMBOLS[nresult]
+
+        if result in BYTES_SYMBOLS:
+            return BYTES_SYMBOLS[result]
+        else:
+            raise LexerException(pos - self.start, '{} is not a valid atomic symbol'.format(chr(result)))
+
+    def tokenize(self):
+        """Tokenize the input
+        """
+
+        while self.current_char is not None:
+            pos = self.pos - self.start
+            if self.current_char in BYTES_TR:
+                yield Token(BYTES_TR[self.current_char], BYTES_CHARS[self.current_char], pos)
+                self.next()
+                continue
+
+            elif 0x30 <= self.current_char <= 0x39:
+                yield Token(DIGIT, self.current_char - 0x30, pos)
+                self.next()
+                continue
+
+            elif self.current_char in BYTES_ALPHA:
+                yield Token(ATOM, self.atom(), pos)
+                continue
+
+            else:
+                raise LexerException(pos, 'unknown symbol {}'.format(chr(self.current_char)))
+
+        yield Token(EOF, None, self.pos - self.start)
+
+
+class TokensLexer(Lexer):
+    """Lexer that gives back tokens that were obtained by another mean (*e.g.* a batch tokenization), so that
+    the parser only has to handle the grammar.
+
+    :param tokens: the tokens (if the last one is not ``EOF``, it is added)
+    :type tokens: list of osmipy.tokens.Token
+    """
+
+    def __init__(self, tokens):
+        super().__init__('')
+        self.tokens = tokens
+
+    def tokenize(self):
+        """Give back the tokens
+        """
+
+        last = None
+        for last in self.tokens:
+            yield last
+
+        if last is None or last.type != EOF:
+            yield Token(EOF, None, last.position + 1 if last is not None else 0)
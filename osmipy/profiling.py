@@ -0,0 +1,171 @@
+"""
+Opt-in instrumentation of the lexer, parser and validators.
+
+.. code-block:: python
+
+    import osmipy
+    from osmipy import smiles
+
+    with osmipy.profile() as stats:
+        for s in strings:
+            smiles.SMILES(s)
+
+    print(stats.as_dict())
+
+When no profiling is active, the instrumented code only checks (once per molecule or per call) that ``active()``
+is ``None``.
+
+The statistics that are recorded are the ones of the ``profile()`` block of the current context (a
+``contextvars.ContextVar``): threads do not record into the block of another thread (the parses done in the thread
+executor of ``osmipy.aio``, which does not copy the context, are not recorded).
+
+The recorded stages are ``lexer.tokenize``, ``parser.chain``, ``parser.consolidate_ring_bonds``,
+``parser.final_checks`` (unmatched ring ids and direct pairs) and ``validator.atom_ids`` (``AtomIdCheckAndUpdate``).
+Since the lexer is called by the parser when it needs a new token, the stages are nested: for each stage, ``time`` is
+the total time spent in it, while ``self_time`` excludes the time spent in the inner stages.
+"""
+
+import contextlib
+import contextvars
+import time
+
+_active = contextvars.ContextVar('osmipy_profiling', default=None)
+
+
+def active():
+    """Get the statistics of the current ``profile()`` block
+
+    :return: the statistics, or ``None`` if no profiling is active
+    :rtype: Stats
+    """
+
+    return _active.get()
+
+
+class Stats:
+    """Statistics recorded during profiling
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.errors = {}
+        self._stack = []
+
+    def start(self, stage):
+        """Start a stage
+
+        :param stage: name of the stage
+        :type stage: str
+        """
+
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def stop(self):
+        """Stop the last stage that was started
+        """
+
+        stage, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+
+        if stage not in self.stages:
+            self.stages[stage] = [0, 0.0, 0.0]
+
+        s = self.stages[stage]
+        s[0] += 1
+        s[1] += elapsed
+        s[2] += elapsed - children
+
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def depth(self):
+        return len(self._stack)
+
+    def unwind(self, depth):
+        """Stop all stages that were started after the stack had the given depth (*e.g.* after an exception)
+
+        :param depth: depth
+        :type depth: int
+        """
+
+        while len(self._stack) > depth:
+            self.stop()
+
+    def count(self, counter, n=1):
+        """Increment a counter
+
+        :param counter: name of the counter
+        :type counter: str
+        :param n: increment
+        :type n: int
+        """
+
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def error(self, e):
+        """Count an error
+
+        :param e: the exception
+        :type e: Exception
+        """
+
+        name = type(e).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def timed_iterator(self, stage, iterator, counter=None):
+        """Wrap an iterator so that the time spent to get each item is recorded
+
+        :param stage: name of the stage
+        :type stage: str
+        :param iterator: the iterator
+        :param counter: the counter to increment for each item, if any
+        :type counter: str
+        """
+
+        while True:
+            self.start(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+
+            if counter is not None:
+                self.count(counter)
+
+            yield item
+
+    def as_dict(self):
+        """Get the statistics
+
+        :rtype: dict
+        """
+
+        return {
+            'stages': dict(
+                (name, {'calls': s[0], 'time': s[1], 'self_time': s[2]}) for name, s in self.stages.items()),
+            'counters': dict(self.counters),
+            'errors': dict(self.errors)
+        }
+
+
+@contextlib.contextmanager
+def profile(hook=None):
+    """Activate the profiling inside a ``with`` block.
+
+    :param hook: function called with the statistics (as given by ``Stats.as_dict()``) at the end of the block
+    :type hook: callable
+    :rtype: Stats
+    """
+
+    stats = Stats()
+    token = _active.set(stats)
+
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+        if hook is not None:
+            hook(stats.as_dict())
@@ -0,0 +1,277 @@
+"""
+Removal of the salts (counter-ions, solvents) of the records: only the largest component is kept.
+
+The components of a record are found without lexing nor parsing it: the record is cut at the dots that are not in a
+branch, and the pieces that are linked by a ring bond (*e.g.* ``c1cc2ccc1.Cl2``) are merged.
+The pieces are then described by a few regular expressions (number of atoms, of carbon atoms, ring ids), and only the
+component that is kept is actually parsed:
+
+.. code-block:: python
+
+    from osmipy import salts
+
+    salts.strip_salts('CC(=O)[O-].[Na+]')  # SMILES of CC(=O)[O-]
+
+    stripper = salts.SaltStripper(salts.DEFAULT_SALTS | {'CS(=O)(=O)O'})
+    molecules = stripper.strip_many(records, errors=errors)  # (index, error) are added to errors
+
+The component that is kept is the largest (in number of atoms other than hydrogens) of the ones that are not known
+salts, those that contain carbon atoms being preferred. The known salts are compared on their normalized text (in
+which ``+1`` and ``-1`` charges are written ``+`` and ``-``). If every component is a known salt, the largest one is
+kept.
+
+Only the component that is kept is checked: an error in another one (*e.g.* an invalid symbol) is not detected.
+"""
+
+import re
+
+from osmipy import smiles, smiles_parser
+from osmipy.tokens import *
+
+BRACKET_ATOMS = re.compile(r'\[\d*([A-Za-z][a-z]?)[^\]]*\]')
+ORGANIC_ATOMS = re.compile(r'Cl|Br|[BCNOSPFI]|[bcnosp]|\*')
+RING_IDS = re.compile(r'%\d\d|\d')
+UNIT_CHARGES = re.compile(r'([+-])1(?=[\]:])')
+
+DEFAULT_SALTS = frozenset((
+    # cations
+    '[Li+]', '[Na+]', '[K+]', '[Rb+]', '[Cs+]', '[Mg+2]', '[Ca+2]', '[Zn+2]', '[Al+3]', '[NH4+]', '[H+]',
+    # anions
+    '[F-]', '[Cl-]', '[Br-]', '[I-]', '[OH-]', '[O-]N(=O)=O', '[O-][N+](=O)[O-]', 'OS(=O)(=O)O', 'OS(=O)(=O)[O-]',
+    '[O-]S(=O)(=O)[O-]', 'OP(=O)(O)O', '[O-]P(=O)([O-])[O-]', '[O-]Cl(=O)(=O)=O',
+    # acids and solvents
+    'F', 'Cl', 'Br', 'I', 'O', 'N', 'OC(=O)C(F)(F)F', 'CC(=O)O', 'OC(=O)C(=O)O', 'OC=O', 'CO', 'CCO',
+))
+
+
+def normalize(text):
+    """Normalized text of a component, for the comparison with the known salts
+
+    :param text: the component
+    :type text: str
+    :rtype: str
+    """
+
+    return UNIT_CHARGES.sub(r'\1', text)
+
+
+class Component:
+    """Component of a record (pieces of the record between dots, linked by ring bonds)
+
+    :param text: the text of the component (its pieces, joined by dots)
+    :type text: str
+    :param atoms: number of atoms (other than hydrogens)
+    :type atoms: int
+    :param carbons: number of carbon atoms
+    :type carbons: int
+    """
+
+    __slots__ = ('text', 'atoms', 'carbons')
+
+    def __init__(self, text, atoms, carbons):
+        self.text = text
+        self.atoms = atoms
+        self.carbons = carbons
+
+    def __repr__(self):
+        return 'Component({!r}, atoms={}, carbons={})'.format(self.text, self.atoms, self.carbons)
+
+
+def _pieces(text):
+    """Cut a record at the dots that are not in a branch
+
+    :return: the positions of the pieces
+    :rtype: list of tuple(int, int)
+    """
+
+    pieces = []
+    start = position = depth = 0
+
+    for part in text.split(DOT):
+        end = position + len(part)
+        depth += part.count(LPAR) - part.count(RPAR)
+        if depth == 0:
+            pieces.append((start, end))
+            start = end + 1
+        position = end + 1
+
+    if depth != 0:  # (not valid, the parser will tell)
+        return [(0, len(text))]
+
+    return pieces
+
+
+def components(text):
+    """Find the components of a record (without parsing it)
+
+    :param text: the record
+    :type text: str
+    :return: the components, in the order of the string
+    :rtype: list of Component
+    """
+
+    if DOT not in text:
+        pieces = [(0, len(text))]
+    else:
+        pieces = _pieces(text)
+
+    groups = list(range(len(pieces)))  # (union-find, the root being the first piece of the group)
+    opened = {}
+    counts = []
+
+    for i, (start, end) in enumerate(pieces):
+        piece = text[start:end]
+        bracket_atoms = BRACKET_ATOMS.findall(piece)
+        rest = BRACKET_ATOMS.sub('', piece)
+        organic_atoms = ORGANIC_ATOMS.findall(rest)
+
+        counts.append((
+            len(organic_atoms) + sum(1 for s in bracket_atoms if s != 'H'),
+            sum(1 for s in organic_atoms if s in ('C', 'c')) + sum(1 for s in bracket_atoms if s in ('C', 'c'))))
+
+        if len(pieces) > 1:
+            for ring_id in RING_IDS.findall(rest):
+                other = opened.pop(ring_id, None)
+                if other is None:
+                    opened[ring_id] = i
+                elif other != i:
+                    smiles_parser.union(groups, other, i)
+
+    result = []
+    by_root = {}
+
+    for i, (start, end) in enumerate(pieces):
+        root = smiles_parser.find(groups, i)
+        atoms, carbons = counts[i]
+        if root in by_root:
+            component = by_root[root]
+            component.text += DOT + text[start:end]
+            component.atoms += atoms
+            component.carbons += carbons
+        else:
+            component = by_root[root] = Component(text[start:end], atoms, carbons)
+            result.append(component)
+
+    return result
+
+
+class SaltStripper:
+    """Keep the largest component of records
+
+    :param salts: the known salts
+    :type salts: collections.Iterable[str]
+    :param prefer_organic: prefer the components that contain carbon atoms
+    :type prefer_organic: bool
+    """
+
+    def __init__(self, salts=DEFAULT_SALTS, prefer_organic=True):
+        self.salts = frozenset(normalize(s) for s in salts)
+        self.prefer_organic = prefer_organic
+
+        # (a component with more atoms cannot be a known salt)
+        self._max_atoms = max((c.atoms for s in self.salts for c in components(s)), default=0)
+
+    def is_salt(self, component):
+        """Whether a component is a known salt
+
+        :param component: the component
+        :type component: Component
+        :rtype: bool
+        """
+
+        return component.atoms <= self._max_atoms and normalize(component.text) in self.salts
+
+    def select(self, text):
+        """Find the component of a record that is kept (without parsing it)
+
+        :param text: the record
+        :type text: str
+        :rtype: str
+        """
+
+        if DOT not in text:
+            return text
+
+        found = components(text)
+        return found[self._choose(found)].text
+
+    def _choose(self, found):
+        """Choose the component that is kept
+
+        :param found: the components
+        :type found: list of Component
+        :return: its index
+        :rtype: int
+        """
+
+        candidates = [i for i, c in enumerate(found) if not self.is_salt(c)] or range(len(found))
+
+        if self.prefer_organic:
+            return max(candidates, key=lambda i: (found[i].carbons > 0, found[i].atoms))
+        else:
+            return max(candidates, key=lambda i: found[i].atoms)
+
+    def strip(self, text):
+        """Parse the component of a record that is kept
+
+        :param text: the record
+        :type text: str
+        :rtype: osmipy.smiles.SMILES
+        """
+
+        kept = self.select(text)
+        molecule = smiles.SMILES(kept)
+
+        if DOT in kept and max(molecule.components(), default=0) > 0:  # (dots in a branch)
+            fragments = molecule.fragments()
+            molecule = fragments[self._choose([components(repr(f))[0] for f in fragments])]
+
+        return molecule
+
+    def strip_many(self, texts, errors=None):
+        """Parse the component of records that is kept
+
+        :param texts: the records
+        :type texts: collections.Iterable[str]
+        :param errors: if a list is given, ``(index, error)`` is added to it for the invalid records (which give
+            ``None``), otherwise, the first error is raised
+        :type errors: list
+        :rtype: list of osmipy.smiles.SMILES
+        """
+
+        molecules = []
+
+        for i, text in enumerate(texts):
+            try:
+                molecules.append(self.strip(text))
+            except smiles_parser.ERRORS as e:
+                if errors is None:
+                    raise
+                errors.append((i, e))
+                molecules.append(None)
+
+        return molecules
+
+
+_default_stripper = None
+
+
+def strip_salts(text, salts=None):
+    """Parse the largest component of a record that is not a known salt
+
+    :param text: the record
+    :type text: str
+    :param salts: the known salts (by default, ``DEFAULT_SALTS``)
+    :type salts: collections.Iterable[str]
+    :rtype: osmipy.smiles.SMILES
+    """
+
+    global _default_stripper
+
+    if salts is not None:
+        return SaltStripper(salts).strip(text)
+
+    if _default_stripper is None:
+        _default_stripper = SaltStripper()
+
+    return _default_stripper.strip(text)
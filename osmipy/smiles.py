@@ -1,7 +1,9 @@
 import copy
+import random
 
 import osmipy.smiles_ast
-from osmipy import smiles_parser, lexer, visitor
+from osmipy import smiles_parser, lexer, visitor, array_graph, profiling, adjacency, topology, hydrogens, stereo, \
+    subgraph
 from osmipy.tokens import *
 
 
@@ -28,10 +30,31 @@ class Interpreter(visitor.NodeVisitor):
         if node.right is not None:
             if node.bond is not None:
                 r += self.visit(node.bond)
+            elif self._would_merge(node.left, node.right.left):
+                r += MINUS
             r += self.visit(node.right)
 
         return r
 
+    @staticmethod
+    def _would_merge(left, right):
+        """Check if two consecutive atoms would be read as a single symbol (*e.g.* ``C`` and ``n`` in ``Cn``), in
+        which case an explicit single bond is required.
+
+        :param left: left atom
+        :type left: BranchedAtom
+        :param right: right atom
+        :type right: BranchedAtom
+        :rtype: bool
+        """
+
+        return len(left.atom.symbol) == 1 and \
+            len(left.ring_bonds) == 0 and \
+            len(left.branches) == 0 and \
+            not left.atom.is_bracketed() and \
+            not right.atom.is_bracketed() and \
+            left.atom.symbol + right.atom.symbol[0] in TOT_SYMBOLS
+
     def visit_branchedatom(self, node):
         """
 
@@ -54,22 +77,25 @@ class Interpreter(visitor.NodeVisitor):
         :type node: qcip_tools.smiles.Atom
         :rtype: str
         """
-        bracketed = node.is_bracketed()
+        spec = node.spec
+        if not spec.bracketed:
+            return spec.symbol
+
         charge = ''
-        if node.charge != 0:
-            charge = '+' if node.charge > 0 else '-'
-            if node.charge > 1 or node.charge < -1:
-                charge += str(node.charge)
+        if spec.charge != 0:
+            charge = '+' if spec.charge > 0 else '-'
+            if spec.charge > 1 or spec.charge < -1:
+                charge += str(abs(spec.charge))
 
         return '{}{}{}{}{}{}{}{}'.format(
-            LSPAR if bracketed else '',
-            node.isotope if node.isotope > 0 else '',
-            node.symbol,
-            node.chirality if node.chirality is not None else '',
-            ('H' + (str(node.hcount) if node.hcount > 1 else '')) if node.hcount > 0 else '',
+            LSPAR,
+            spec.isotope if spec.isotope > 0 else '',
+            spec.symbol,
+            spec.chirality if spec.chirality is not None else '',
+            ('H' + (str(spec.hcount) if spec.hcount > 1 else '')) if spec.hcount > 0 else '',
             charge,
-            '{}{}'.format(COLON, node.klass) if node.klass > 0 else '',
-            RSPAR if bracketed else '')
+            '{}{}'.format(COLON, spec.klass) if spec.klass > 0 else '',
+            RSPAR)
 
     def visit_branch(self, node):
         """
@@ -112,10 +138,125 @@ class UnicityException(Exception):
     pass
 
 
+class AtomIds:
+    """Atoms of a molecule, indexed by their id.
+
+    Behaves as a (read-only) dictionary ``atom_id -> atom``, but the atoms are stored in a list in which the position
+    of an atom is its id (ids that are not used give ``None``), so that the lookup and the iteration in the order of
+    the ids do not need any hashing.
+
+    :param atoms: the list of atoms, where the position of each atom is its id
+    :type atoms: list
+    """
+
+    def __init__(self, atoms=None):
+        self.atoms = [] if atoms is None else atoms
+        self._count = None
+
+    @classmethod
+    def from_atoms(cls, atoms):
+        """Create the list from atoms in any order (those with a negative id are skipped)
+
+        :param atoms: the atoms
+        :type atoms: collections.Iterable[osmipy.smiles_ast.Atom]
+        :rtype: AtomIds
+        """
+
+        atoms = list(atoms)
+        if all(a.atom_id == i for i, a in enumerate(atoms)):
+            return cls(atoms)
+
+        obj = cls()
+        for atom in atoms:
+            if atom.atom_id > -1:
+                obj.add(atom)
+
+        return obj
+
+    def add(self, atom):
+        """Add an atom
+
+        :param atom: the atom
+        :type atom: osmipy.smiles_ast.Atom
+        """
+
+        atom_id = atom.atom_id
+        atoms = self.atoms
+
+        if atom_id >= len(atoms):
+            atoms.extend([None] * (atom_id - len(atoms) + 1))
+        elif atoms[atom_id] is not None:
+            raise UnicityException('two atoms share the same id: {}!'.format(atom_id))
+
+        atoms[atom_id] = atom
+        self._count = None
+
+    def update(self, other):
+        """Add the atoms of another list
+
+        :param other: the other list
+        :type other: AtomIds|dict
+        """
+
+        for atom in other.values():
+            self.add(atom)
+
+    def __len__(self):
+        if self._count is None:
+            self._count = len(self.atoms) - self.atoms.count(None)
+        return self._count
+
+    def __getitem__(self, atom_id):
+        try:
+            atom = self.atoms[atom_id] if atom_id >= 0 else None
+        except (IndexError, TypeError):
+            atom = None
+
+        if atom is None:
+            raise KeyError(atom_id)
+
+        return atom
+
+    def get(self, atom_id, default=None):
+        try:
+            return self[atom_id]
+        except KeyError:
+            return default
+
+    def __contains__(self, atom_id):
+        return self.get(atom_id) is not None
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        return (i for i, a in enumerate(self.atoms) if a is not None)
+
+    def values(self):
+        return (a for a in self.atoms if a is not None)
+
+    def items(self):
+        return ((i, a) for i, a in enumerate(self.atoms) if a is not None)
+
+    def __eq__(self, other):
+        return dict(self.items()) == dict(other.items())
+
+    def attribute(self, name, default=None):
+        """Get an attribute of all the atoms, in the order of the ids
+
+        :param name: name of the attribute (``symbol``, ``charge``, ...)
+        :type name: str
+        :param default: value for the ids that are not used
+        :rtype: list
+        """
+
+        return [default if a is None else getattr(a.spec, name) for a in self.atoms]
+
+
 class AtomIdCheckAndUpdate(visitor.ASTVisitor):
     """Visitor that
 
-    Keeps a dictionary of the atoms id, ``atom_ids``, and check that they are all uniques.
+    Keeps the atoms by id, ``atom_ids`` (see ``AtomIds``), and check that the ids are all uniques.
     In other words,  it does the job of the parser for nodes that may have been constructed from scratch.
 
     :param node: the node
@@ -124,7 +265,7 @@ class AtomIdCheckAndUpdate(visitor.ASTVisitor):
     def __init__(self, node):
         super().__init__(node)
 
-        self.atom_ids = {}
+        self.atom_ids = AtomIds()
         self.next_atom_id = 0
 
     def validate(self, shift_id=0):
@@ -134,9 +275,22 @@ class AtomIdCheckAndUpdate(visitor.ASTVisitor):
         :type shift_id: int
         """
         if self.node is not None:
-            self.atom_ids = {}
+            self.atom_ids = AtomIds()
             self.next_atom_id = 0
-            self._start(shift_id=shift_id)
+
+            stats = profiling.active()
+            if stats is None:
+                self._start(shift_id=shift_id)
+            else:
+                depth = stats.depth()
+                stats.start('validator.atom_ids')
+                try:
+                    self._start(shift_id=shift_id)
+                except Exception as e:
+                    stats.error(e)
+                    raise
+                finally:
+                    stats.unwind(depth)
 
     def visit_atom(self, node, shift_id=0, *args, **kwargs):
         """Just update the list of ids
@@ -153,12 +307,9 @@ class AtomIdCheckAndUpdate(visitor.ASTVisitor):
             if shift_id != 0:
                 node.atom_id += shift_id
 
-            if node.atom_id not in self.atom_ids:
-                self.atom_ids[node.atom_id] = node
-                if self.next_atom_id <= node.atom_id:
-                    self.next_atom_id = node.atom_id + 1
-            else:
-                raise UnicityException('two atoms share the same id: {}!'.format(node.atom_id))
+            self.atom_ids.add(node)
+            if self.next_atom_id <= node.atom_id:
+                self.next_atom_id = node.atom_id + 1
 
     def update(self, fragment):
         """Update the validator with a new fragment
@@ -173,21 +324,177 @@ class AtomIdCheckAndUpdate(visitor.ASTVisitor):
         self.next_atom_id = validator.next_atom_id
 
 
+def copy_tree(node):
+    """Copy an AST (through its array representation, which is faster than ``copy.deepcopy()``)
+
+    :param node: the AST
+    :type node: Chain
+    :return: the copy, and its atoms in the order of the string
+    :rtype: tuple(Chain, list)
+    """
+
+    try:
+        return array_graph.ArrayGraph.from_ast(node).to_ast()
+    except array_graph.ArrayGraphException:
+        node = copy.deepcopy(node)
+        return node, [ba.atom for ba, _, _, _ in array_graph.walk(node)]
+
+
+def component_labels(node):
+    """Label the connected components of an AST (the atoms are connected by the bonds and the ring bonds, not by the
+    dots), in the order of the string
+
+    :param node: the AST
+    :type node: Chain
+    :return: the label of each atom, in the order of their ids (``None`` for the ids that are not used)
+    :rtype: list
+    """
+
+    parents = []
+    indices = {}
+    atom_ids = []
+    ring_bonds = []
+
+    for index, (ba, parent, _, bond) in enumerate(array_graph.walk(node)):
+        parents.append(index)
+        indices[id(ba.atom)] = index
+        atom_ids.append(ba.atom.atom_id)
+        ring_bonds.extend(rb for rb in ba.ring_bonds if rb.target is not None)
+
+        if parent > -1 and (bond is None or bond.symbol != DOT):
+            smiles_parser.union(parents, parent, index)
+
+    for rb in ring_bonds:
+        smiles_parser.union(parents, indices[id(rb.parent.atom)], indices[id(rb.target.atom)])
+
+    labels = [None] * (max(atom_ids, default=-1) + 1)
+    for atom_id, label in zip(atom_ids, smiles_parser.component_labels(parents)):
+        if atom_id > -1:
+            labels[atom_id] = label
+
+    return labels
+
+
+def _node(cls, **children):
+    """Create an AST element that shares its children with another tree: only the children that do not belong to a tree
+    yet get it as parent
+
+    :rtype: osmipy.smiles_ast.AST
+    """
+
+    node = cls.__new__(cls)
+    node.parent = None
+
+    for name, value in children.items():
+        setattr(node, name, value)
+        if isinstance(value, osmipy.smiles_ast.AST) and value.parent is None:
+            value.parent = node
+
+    for branch in children.get('branches', ()):
+        if branch.parent is None:
+            branch.parent = node
+
+    return node
+
+
+def _join(parts):
+    """Join chains with dots (the main chain of all of them but the last one is copied)
+
+    :param parts: the chains
+    :type parts: list of Chain
+    :rtype: Chain
+    """
+
+    result = parts[-1]
+
+    for part in reversed(parts[:-1]):
+        spine = []
+        c = part
+        while c is not None:
+            spine.append(c)
+            c = c.right
+
+        result = _node(osmipy.smiles_ast.Chain, left=spine[-1].left, right=result, bond=osmipy.smiles_ast.Bond(DOT))
+        for c in reversed(spine[:-1]):
+            result = _node(osmipy.smiles_ast.Chain, left=c.left, right=result, bond=c.bond)
+
+    return result
+
+
+def _split(node, labels):
+    """Split an AST by connected components.
+
+    The elements whose subtree only contains atoms of one component are shared with the original tree, and only the
+    ones on the path to a dot that separates two components are re-created (without copying the atoms).
+
+    :param node: the AST
+    :type node: Chain
+    :param labels: the label of the component of each atom, by id
+    :type labels: list of int
+    :return: the tree of each component (present in the tree)
+    :rtype: dict
+    """
+
+    spine = []
+    c = node
+    while c is not None:
+        spine.append(c)
+        c = c.right
+
+    rest = {}  # (trees of the part of the chain on the right of the current atom)
+
+    for c in reversed(spine):
+        ba = c.left
+        label = labels[ba.atom.atom_id]
+        others = {}  # label -> trees that come from the branches of this atom, in the order of the string
+        branches = []
+
+        for branch in ba.branches:
+            for other, tree in _split(branch.chain, labels).items():
+                if other != label:
+                    others.setdefault(other, []).append(tree)
+                elif tree is branch.chain:
+                    branches.append(branch)
+                else:
+                    branches.append(_node(osmipy.smiles_ast.Branch, chain=tree, bond=branch.bond))
+
+        if len(branches) != len(ba.branches) or any(a is not b for a, b in zip(branches, ba.branches)):
+            ba = _node(osmipy.smiles_ast.BranchedAtom, atom=ba.atom, ring_bonds=ba.ring_bonds, branches=branches)
+
+        right = rest.get(label)
+        if ba is c.left and right is c.right:
+            tree = c
+        else:
+            tree = _node(osmipy.smiles_ast.Chain, left=ba, right=right, bond=None if right is None else c.bond)
+
+        rest[label] = tree
+        for other, trees in others.items():
+            if other in rest:
+                trees.append(rest[other])
+            rest[other] = _join(trees)
+
+    return rest
+
+
 class SMILES:
     """SMILES object
 
     This object is immutable.
 
-    :param input_: input
-    :type input_: Chain|str
+    :param input_: input (a lexer can be given, *e.g.* to parse from a buffer)
+    :type input_: Chain|str|osmipy.lexer.Lexer
     """
     def __init__(self, input_=''):
         self.node = None
-        if type(input_) is str:
-            parser_obj = smiles_parser.Parser(lexer.Lexer(input_))
+        self.source = None  # see ``osmipy.incremental``
+        self._adjacency = None
+        self._components = None
+        if type(input_) is str or isinstance(input_, lexer.Lexer):
+            parser_obj = smiles_parser.Parser(lexer.Lexer(input_) if type(input_) is str else input_)
             self.node = parser_obj.smiles()
-            self.atom_ids = parser_obj.atom_ids
+            self.atom_ids = AtomIds(parser_obj.atom_ids)
             self.next_atom_id = parser_obj.next_atom_id
+            self._components = parser_obj.components
         elif type(input_) is osmipy.smiles_ast.Chain:
             self.node = input_
             validator = AtomIdCheckAndUpdate(self.node)
@@ -210,24 +517,45 @@ class SMILES:
         :rtype: SMILES
         """
 
-        ns = copy.deepcopy(self)
+        ns = SMILES.__new__(SMILES)
+        ns.source = None
+        ns._adjacency = None
+        ns._components = None
+        ns.node, atoms = copy_tree(self.node)
+        ns.atom_ids = AtomIds.from_atoms(atoms)
+        ns.next_atom_id = self.next_atom_id
+        atoms = ns.atom_ids.atoms
+
         c = ns.node
         while c.right is not None:
             c = c.right
 
         if type(other) is SMILES:
-            node = copy.deepcopy(other.node)
+            node, other_atoms = copy_tree(other.node)
+            other_atoms = AtomIds.from_atoms(other_atoms).atoms
         else:
-            node = copy.deepcopy(other)
+            node, other_atoms = copy.deepcopy(other), None
 
         c.right = node
         node.parent = c
         c.bond = osmipy.smiles_ast.Bond('.')
 
         if validate:
-            updater = AtomIdCheckAndUpdate(node)
-            updater.validate(shift_id=self.next_atom_id)
-            ns.atom_ids.update(updater.atom_ids)
+            if other_atoms is not None:  # ids are known: just shift them
+                shift = self.next_atom_id
+                for atom in other_atoms:
+                    if atom is not None:
+                        atom.atom_id += shift
+
+                atoms.extend([None] * (shift - len(atoms)))
+                atoms.extend(other_atoms)
+                ns.atom_ids = AtomIds(atoms)
+                ns.next_atom_id = shift + other.next_atom_id
+            else:
+                updater = AtomIdCheckAndUpdate(node)
+                updater.validate(shift_id=self.next_atom_id)
+                ns.atom_ids.update(updater.atom_ids)
+                ns.next_atom_id = max(ns.next_atom_id, updater.next_atom_id)
 
         return ns
 
@@ -242,4 +570,230 @@ class SMILES:
         :rtype: qcip_tools.smiles.Atom
         """
 
-        return self.atom_ids[atom_id]
+        atoms = self.atom_ids.atoms
+        if 0 <= atom_id < len(atoms) and atoms[atom_id] is not None:
+            return atoms[atom_id]
+
+        raise KeyError(atom_id)
+
+    def __iter__(self):
+        """Iterate over the atoms, in the order of their ids"""
+
+        return self.atom_ids.values()
+
+    def symbols(self):
+        """Get the symbols of the atoms, in the order of their ids (``None`` for the ids that are not used)
+
+        :rtype: list of str
+        """
+
+        return self.atom_ids.attribute('symbol')
+
+    def charges(self):
+        """Get the charges of the atoms, in the order of their ids (``0`` for the ids that are not used)
+
+        :rtype: list of int
+        """
+
+        return self.atom_ids.attribute('charge', 0)
+
+    def components(self):
+        """Get the label of the connected component (the fragments being separated by dots, unless a ring bond joins
+        them) of each atom, in the order of their ids (``None`` for the ids that are not used).
+        The components are numbered in the order of the string.
+
+        The labels are given by the parser, or computed at the first call.
+
+        :rtype: list
+        """
+
+        if self._components is None:
+            self._components = component_labels(self.node)
+
+        return list(self._components)
+
+    def fragments(self):
+        """Get the connected components of the molecule, as separate molecules (in the order of the string).
+
+        The fragments are views of the molecule: they share its atoms and the elements of its tree (which should
+        therefore not be modified), and only the elements that lead to a dot between two fragments are re-created.
+        The atoms keep their ids.
+
+        :rtype: list of SMILES
+        """
+
+        if self.node is None:
+            return []
+
+        labels = self.components()
+        n = max((label for label in labels if label is not None), default=0) + 1
+        if n == 1:
+            return [self]
+
+        trees = _split(self.node, labels)
+        ids = [[] for _ in range(n)]
+        for atom_id, label in enumerate(labels):
+            if label is not None:
+                ids[label].append(atom_id)
+
+        atoms = self.atom_ids.atoms
+        fragments = []
+
+        for label in range(n):
+            size = ids[label][-1] + 1
+            fragment_atoms, fragment_labels = [None] * size, [None] * size
+            for atom_id in ids[label]:
+                fragment_atoms[atom_id] = atoms[atom_id]
+                fragment_labels[atom_id] = 0
+
+            obj = SMILES.__new__(SMILES)
+            obj.node = trees[label]
+            obj.atom_ids = AtomIds(fragment_atoms)
+            obj.next_atom_id = self.next_atom_id
+            obj.source = None
+            obj._adjacency = None
+            obj._components = fragment_labels
+            fragments.append(obj)
+
+        return fragments
+
+    def adjacency(self):
+        """Get the adjacency index of the molecule (built at the first call)
+
+        :rtype: osmipy.adjacency.AdjacencyIndex
+        """
+
+        if self._adjacency is None:
+            self._adjacency = adjacency.AdjacencyIndex.from_smiles(self)
+
+        return self._adjacency
+
+    def distance_matrix(self):
+        """Get the matrix of the topological distances between the atoms (computed at the first call, requires
+        ``numpy``, see ``osmipy.topology``)
+
+        :rtype: numpy.ndarray
+        """
+
+        return topology.distance_matrix(self)
+
+    def double_bond_stereo(self):
+        """Get the configuration (cis or trans) of the double bonds, given by the directional bonds (computed at the
+        first call, see ``osmipy.stereo``)
+
+        :rtype: osmipy.stereo.DoubleBondStereo
+        """
+
+        return stereo.double_bond_stereo(self)
+
+    def randomized(self, n, seed=None):
+        """Get ``n`` distinct random SMILES of the molecule (random root atom and order of the branches).
+
+        Less than ``n`` SMILES are given if the molecule does not have that many different spellings.
+
+        :param n: number of SMILES
+        :type n: int
+        :param seed: seed of the random number generator
+        :rtype: list of str
+        """
+
+        return list(self.adjacency().randomized(n, random.Random(seed)))
+
+    def add_hydrogens(self):
+        """Get the molecule with all its hydrogens written as atoms (see ``osmipy.hydrogens``).
+
+        Since the AST does not record the brackets, atoms such as ``[C]`` or ``[O]`` are handled as ``C`` or ``O``
+        (they get implicit hydrogens).
+
+        :rtype: SMILES
+        """
+
+        return SMILES.from_graph(hydrogens.add_hydrogens(self.to_graph()))
+
+    def remove_hydrogens(self):
+        """Get the molecule with implicit hydrogens, when possible (see ``osmipy.hydrogens``)
+
+        :rtype: SMILES
+        """
+
+        return SMILES.from_graph(hydrogens.remove_hydrogens(self.to_graph()))
+
+    def subgraph(self, atom_ids, wildcards=False):
+        """Get the subgraph given by some atoms, as a new molecule (see ``osmipy.subgraph``)
+
+        :param atom_ids: ids of the atoms of the subgraph
+        :type atom_ids: collections.Iterable[int]
+        :param wildcards: replace the cut bonds by bonds to wildcard atoms (rather than by implicit hydrogens)
+        :type wildcards: bool
+        :rtype: SMILES
+        """
+
+        return subgraph.subgraph(self, atom_ids, wildcards)
+
+    def to_graph(self):
+        """Get the array representation of the molecule
+
+        :rtype: osmipy.array_graph.ArrayGraph
+        """
+
+        return array_graph.ArrayGraph.from_ast(self.node, self.next_atom_id)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Create a SMILES object from its array representation (without any parsing or validation)
+
+        :param graph: the graph
+        :type graph: osmipy.array_graph.ArrayGraph
+        :rtype: SMILES
+        """
+
+        obj = cls.__new__(cls)
+        obj.node, atoms = graph.to_ast()
+        obj.atom_ids = AtomIds.from_atoms(atoms)
+        obj.next_atom_id = graph.next_atom_id
+        obj.source = None
+        obj._adjacency = None
+        obj._components = None
+
+        return obj
+
+    def to_bytes(self):
+        """Get the binary representation of the molecule (see ``osmipy.array_graph``)
+
+        :rtype: bytes
+        """
+
+        return self.to_graph().to_bytes()
+
+    @classmethod
+    def from_bytes(cls, buffer, offset=0):
+        """Create a SMILES object from its binary representation
+
+        :param buffer: the buffer
+        :param offset: offset of the record in the buffer
+        :type offset: int
+        :rtype: SMILES
+        """
+
+        return cls.from_graph(array_graph.ArrayGraph.from_buffer(buffer, offset))
+
+
+def dumps(smiles):
+    """Get the binary representation of a list of molecules
+
+    :param smiles: the molecules
+    :type smiles: list of SMILES
+    :rtype: bytes
+    """
+
+    return array_graph.dumps(smiles)
+
+
+def loads(buffer):
+    """Get back the molecules from their binary representation (as given by ``dumps()``)
+
+    :param buffer: the buffer
+    :rtype: list of SMILES
+    """
+
+    return [SMILES.from_graph(g) for g in array_graph.iter_loads(buffer)]
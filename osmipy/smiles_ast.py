@@ -1,13 +1,85 @@
+import contextlib
 import warnings
+import weakref
 
 from osmipy.tokens import *
 
+weak_links = False
+
+
+@contextlib.contextmanager
+def use_weak_links(enabled=True):
+    """Inside a ``with`` block, the ``parent`` (and ``RingBond.target``) links of the AST elements created or modified
+    are weak references, so that a molecule does not contain any reference cycle and is freed as soon as it is not
+    used anymore (without the help of the cyclic garbage collector).
+
+    The links are still read through the ``parent`` and ``target`` attributes, but they give ``None`` if the element
+    they refer to was freed (*e.g.* the parent of an atom that is kept while its molecule is not).
+
+    :param enabled: use weak references
+    :type enabled: bool
+    """
+
+    global weak_links
+
+    previous = weak_links
+    weak_links = enabled
+
+    try:
+        yield
+    finally:
+        weak_links = previous
+
+
+def _link(value):
+    """Store a link, as a weak reference if required"""
+    return weakref.ref(value) if weak_links and value is not None else value
+
+
+def _follow(link):
+    """Follow a link"""
+    return link() if type(link) is weakref.ref else link
+
+
+def _slots(cls):
+    """All the slots of a class (and of its parents)"""
+    return tuple(n for c in reversed(cls.__mro__) for n in getattr(c, '__slots__', ()) if n != '__weakref__')
+
 
 class AST:
     """AST element
     """
+
+    __slots__ = ('_parent', '__weakref__')
+
     def __init__(self):
-        self.parent = None
+        self._parent = None
+
+    @property
+    def parent(self):
+        return _follow(self._parent)
+
+    @parent.setter
+    def parent(self, value):
+        self._parent = _link(value)
+
+    def __getstate__(self):
+        # weak references cannot be copied or pickled: give the objects instead
+        state = dict((name, getattr(self, name)) for name in _slots(type(self)) if hasattr(self, name))
+        for name in ('_parent', '_target'):
+            if type(state.get(name)) is weakref.ref:
+                state[name] = state[name]()
+                state.setdefault('_weak', []).append(name)
+
+        return state
+
+    def __setstate__(self, state):
+        for name in state.pop('_weak', []):
+            if state[name] is not None:
+                state[name] = weakref.ref(state[name])
+
+        for name, value in state.items():
+            setattr(self, name, value)
 
 
 class Chain(AST):
@@ -20,6 +92,9 @@ class Chain(AST):
     :param bond: bond
     :type bond: Bond
     """
+
+    __slots__ = ('left', 'right', 'bond')
+
     def __init__(self, left, right=None, bond=None):
         super().__init__()
         self.left = left
@@ -44,6 +119,9 @@ class BranchedAtom(AST):
     :param branches: branches
     :type branches: list of Branch
     """
+
+    __slots__ = ('atom', 'ring_bonds', 'branches')
+
     def __init__(self, atom, ring_bonds=None, branches=None):
         super().__init__()
         self.atom = atom
@@ -165,6 +243,9 @@ class Branch(AST):
     :param bond: bond
     :type bond: Bond
     """
+
+    __slots__ = ('chain', 'bond')
+
     def __init__(self, chain, bond=None):
         super().__init__()
         self.chain = chain
@@ -186,6 +267,9 @@ class RingBond(AST):
     :param target: the other atom
     :type target: BranchedAtom
     """
+
+    __slots__ = ('ring_id', 'bond', '_target')
+
     def __init__(self, ring_id, bond=None, target=None):
         super().__init__()
         self.ring_id = ring_id
@@ -195,10 +279,99 @@ class RingBond(AST):
         if self.bond is not None:
             self.bond.parent = self
 
+    @property
+    def target(self):
+        return _follow(self._target)
+
+    @target.setter
+    def target(self, value):
+        self._target = _link(value)
+
+
+class AtomSpec:
+    """Properties of an atom (immutable, so that it can be shared by many atoms, see ``atom_spec()``).
+
+    Whether the atom should be bracketed, is organic or aromatic is computed once.
+    """
+
+    __slots__ = ('symbol', 'isotope', 'chirality', 'hcount', 'charge', 'klass', 'bracketed', 'organic', 'aromatic')
+
+    def __init__(self, symbol, isotope=0, chirality=None, hcount=0, charge=0, klass=0):
+        set_ = object.__setattr__
+        set_(self, 'symbol', symbol)
+        set_(self, 'isotope', isotope)
+        set_(self, 'chirality', chirality)
+        set_(self, 'hcount', hcount)
+        set_(self, 'charge', charge)
+        set_(self, 'klass', klass)
+
+        set_(self, 'organic', symbol in ORGANIC_SUBSET)
+        set_(self, 'aromatic', symbol in AROMATIC_SYMBOLS)
+        set_(self, 'bracketed', isotope > 0 or chirality is not None or hcount != 0 or charge != 0 or klass > 0 or (
+            not self.organic and symbol != WILDCARD))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('AtomSpec is immutable')
+
+    def __reduce__(self):
+        return atom_spec, (self.symbol, self.isotope, self.chirality, self.hcount, self.charge, self.klass)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def replace(self, **kwargs):
+        """Get the spec with some properties changed
+
+        :rtype: AtomSpec
+        """
+
+        properties = dict((name, getattr(self, name)) for name in ATOM_PROPERTIES)
+        properties.update(kwargs)
+        return atom_spec(**properties)
+
+
+ATOM_PROPERTIES = ('symbol', 'isotope', 'chirality', 'hcount', 'charge', 'klass')
+
+_default_atom_specs = {}
+
+
+def atom_spec(symbol, isotope=0, chirality=None, hcount=0, charge=0, klass=0):
+    """Get the spec of an atom: atoms with the default properties (no isotope, chirality, hydrogens, charge or
+    class, thus most of the atoms of the organic subset) share the same object.
+
+    :rtype: AtomSpec
+    """
+
+    if isotope == 0 and chirality is None and hcount == 0 and charge == 0 and klass == 0:
+        spec = _default_atom_specs.get(symbol)
+        if spec is None:
+            spec = _default_atom_specs[symbol] = AtomSpec(symbol)
+        return spec
+
+    return AtomSpec(symbol, isotope, chirality, hcount, charge, klass)
+
+
+def _spec_property(name):
+    """Property that reads in the spec, and replaces the spec when written"""
+
+    def getter(self):
+        return getattr(self.spec, name)
+
+    def setter(self, value):
+        self.spec = self.spec.replace(**{name: value})
+
+    return property(getter, setter)
+
 
 class Atom(AST):
     """AST element: Atom (``atom``)
 
+    The properties of the atom are stored in a (possibly shared) ``AtomSpec``, while its position in the molecule
+    (``atom_id`` and ``parent``) is stored in the atom itself.
+
     :param symbol: atomic symbol
     :type symbol: str
     :param isotope: isotope
@@ -212,83 +385,149 @@ class Atom(AST):
     :param klass: class
     :type klass: int
     """
+
+    __slots__ = ('spec', 'atom_id')
+
     def __init__(self, symbol, isotope=0, chirality=None, hcount=0, charge=0, klass=0, atom_id=-1):
         super().__init__()
-        self.symbol = symbol
-        self.isotope = isotope
-        self.chirality = chirality
-        self.hcount = hcount
-        self.charge = charge
-        self.klass = klass
+        self.spec = atom_spec(symbol, isotope, chirality, hcount, charge, klass)
         self.atom_id = atom_id
 
+    @classmethod
+    def from_spec(cls, spec, atom_id=-1):
+        """Create an atom from its spec
+
+        :param spec: the spec
+        :type spec: AtomSpec
+        :param atom_id: atom id
+        :type atom_id: int
+        :rtype: Atom
+        """
+
+        atom = cls.__new__(cls)
+        atom._parent = None
+        atom.spec = spec
+        atom.atom_id = atom_id
+        return atom
+
+    symbol = _spec_property('symbol')
+    isotope = _spec_property('isotope')
+    chirality = _spec_property('chirality')
+    hcount = _spec_property('hcount')
+    charge = _spec_property('charge')
+    klass = _spec_property('klass')
+
     def is_bracketed(self):
         """Should this atom be bracketed?
 
         :rtype: bool
         """
-        return self.isotope > 0 or \
-            self.chirality is not None or \
-            self.hcount != 0 or \
-            self.charge != 0 or \
-            self.klass > 0 or \
-            self.symbol not in ORGANIC_SUBSET + [WILDCARD]
+        return self.spec.bracketed
 
     def is_organic(self):
         """
 
         :rtype: bool
         """
-        return self.symbol in ORGANIC_SUBSET
+        return self.spec.organic
 
     def is_aromatic(self):
         """
 
         :rtype: bool
         """
-        return self.symbol in AROMATIC_SYMBOLS
+        return self.spec.aromatic
 
     def atom_symbol(self):
-        if self.is_aromatic():
+        if self.spec.aromatic:
             return self.symbol.title()
         else:
             return self.symbol
 
 
+class BondSpec:
+    """Properties of a bond (immutable and shared, see ``BOND_SPECS``): its symbol, its index in ``BOND_SYMBOLS``, its
+    order, the index of its equivalence class (``/`` and ``\\`` are equivalent) and whether it is equivalent to
+    an implicit bond.
+    """
+
+    __slots__ = ('symbol', 'code', 'order', 'equivalence', 'single')
+
+    def __init__(self, symbol):
+        set_ = object.__setattr__
+        set_(self, 'symbol', symbol)
+        set_(self, 'code', BOND_SYMBOLS.index(symbol) if symbol in BOND_SYMBOLS else -1)
+        set_(self, 'order', 1 if symbol is None else BOND_ORDER.get(symbol, 0))
+        set_(self, 'equivalence', BOND_SYMBOLS.index('/') if symbol in ['/', '\\'] else (
+            self.code if self.code > -1 else symbol))
+        set_(self, 'single', symbol in ['-', '/', '\\'])
+
+    def __setattr__(self, key, value):
+        raise AttributeError('BondSpec is immutable')
+
+    def __reduce__(self):
+        return bond_spec, (self.symbol, )
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+BOND_SYMBOLS = (None, '-', '=', '#', '$', ':', '/', '\\', '.')
+
+BOND_SPECS = dict((symbol, BondSpec(symbol)) for symbol in BOND_SYMBOLS)
+
+
+def bond_spec(symbol):
+    """Get the (shared) spec of a bond
+
+    :rtype: BondSpec
+    """
+
+    spec = BOND_SPECS.get(symbol)
+    return spec if spec is not None else BondSpec(symbol)
+
+
 class Bond(AST):
     """AST element: Bond (``bond | DOT``)
 
     :param symbol: bond symbol
     :type symbol: str
     """
+
+    __slots__ = ('spec', )
+
     def __init__(self, symbol=None):
         super().__init__()
-        self.symbol = symbol
+        self.spec = bond_spec(symbol)
+
+    @property
+    def symbol(self):
+        return self.spec.symbol
+
+    @symbol.setter
+    def symbol(self, value):
+        self.spec = bond_spec(value)
 
     def bond_order(self):
-        if self.symbol is None:
-            return 1
-        try:
-            return BOND_ORDER[self.symbol]
-        except KeyError:
-            return 0
+        return self.spec.order
 
     def __eq__(self, other):
         if other is None:
-            symbol = None
+            return self.spec.single
         elif type(other) is Bond:
-            symbol = other.symbol
+            other = other.spec
         elif type(other) is str:
-            symbol = other
+            other = bond_spec(other)
         else:
             raise TypeError(other)
 
-        if symbol is None:
-            return self.symbol in ['-', '/', '\\']
-        if self.symbol in ['/', '\\'] and symbol in ['/', '\\']:
-            return True
-        else:
-            return self.symbol == symbol
+        if other.symbol is None:
+            return self.spec.single
+
+        return self.spec.equivalence == other.equivalence
 
     @staticmethod
     def invsign(s):
@@ -0,0 +1,154 @@
+import array
+import mmap
+
+from osmipy import lexer, smiles
+
+
+def index_lines(buffer, start=0, end=None):
+    """Build the line-offset index of a SMILES file buffer.
+
+    Returns two arrays, with the offset of the first character of each record and the offset of its end (the
+    line terminator, ``\\r\\n`` or ``\\n``, is not included). Blank lines are skipped.
+
+    :param buffer: the buffer (any object with a ``find()`` method, such as ``bytes`` or ``mmap``)
+    :param start: where to start the indexing
+    :type start: int
+    :param end: where to stop the indexing (if ``None``, the end of the buffer)
+    :type end: int
+    :rtype: tuple(array.array, array.array)
+    """
+
+    starts = array.array('q')
+    ends = array.array('q')
+
+    if end is None:
+        end = len(buffer)
+
+    pos = start
+    while pos < end:
+        eol = buffer.find(b'\n', pos, end)
+        if eol < 0:
+            eol = end
+
+        line_end = eol
+        if line_end > pos and buffer[line_end - 1] == 0x0d:  # \r
+            line_end -= 1
+
+        if line_end > pos:
+            starts.append(pos)
+            ends.append(line_end)
+
+        pos = eol + 1
+
+    return starts, ends
+
+
+class SMILESFile:
+    """Random access to the records of a SMILES file (one record per line, of the form ``SMILES [name]``), through a
+    read-only memory map of the file.
+
+    Records are lexed from their byte offsets by a ``BytesLexer``, so that no ``str`` is built per line.
+    The index can be given to avoid rebuilding it (*e.g.* in worker processes that share the same file, and thus the
+    same pages of the mapping).
+
+    :param path: path to the file
+    :type path: str
+    :param index: line-offset index, as returned by ``index_lines()``
+    :type index: tuple(array.array, array.array)
+    """
+
+    def __init__(self, path, index=None):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            try:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                self.buffer = b''
+
+        if index is None:
+            index = index_lines(self.buffer)
+
+        self.starts, self.ends = index
+
+    @property
+    def index(self):
+        return self.starts, self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, item):
+        return self.smiles(item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.smiles(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if type(self.buffer) is mmap.mmap:
+            self.buffer.close()
+
+    def span(self, i):
+        """Get the byte offsets of the SMILES part of record ``i`` (up to the first whitespace)
+
+        :param i: record number
+        :type i: int
+        :rtype: tuple(int, int)
+        """
+
+        start, end = self.starts[i], self.ends[i]
+        pos = start
+        while pos < end and self.buffer[pos] not in (0x20, 0x09):
+            pos += 1
+
+        return start, pos
+
+    def lexer(self, i):
+        """Get a lexer for record ``i``
+
+        :param i: record number
+        :type i: int
+        :rtype: osmipy.lexer.BytesLexer
+        """
+
+        start, end = self.span(i)
+        return lexer.BytesLexer(self.buffer, start, end)
+
+    def smiles(self, i):
+        """Parse record ``i``
+
+        :param i: record number
+        :type i: int
+        :rtype: osmipy.smiles.SMILES
+        """
+
+        return smiles.SMILES(self.lexer(i))
+
+    def text(self, i):
+        """Get the SMILES part of record ``i`` as a string
+
+        :param i: record number
+        :type i: int
+        :rtype: str
+        """
+
+        start, end = self.span(i)
+        return self.buffer[start:end].decode('ascii')
+
+    def name(self, i):
+        """Get the name of record ``i`` (everything after the SMILES, stripped), if any
+
+        :param i: record number
+        :type i: int
+        :rtype: str
+        """
+
+        end = self.span(i)[1]
+        return self.buffer[end:self.ends[i]].decode('utf-8').strip()
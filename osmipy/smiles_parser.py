@@ -1,4 +1,5 @@
 import osmipy.tokens
+from osmipy import lexer, profiling
 from osmipy.smiles_ast import Chain, BranchedAtom, Branch, RingBond, Atom, Bond
 from osmipy.tokens import *
 
@@ -9,10 +10,74 @@ class ParserException(Exception):
         self.token = token
         self.message = msg
 
+    def __reduce__(self):  # (so that it can be sent back by a worker process)
+        return type(self), (self.token, self.message)
+
+
+# errors given by invalid SMILES (while lexing or parsing)
+ERRORS = (lexer.LexerException, ParserException)
+
+
+def find(parents, i):
+    """Find the representative of the set of ``i`` in a union-find forest (with path halving)
+
+    :param parents: the parent of each element
+    :type parents: list of int
+    :param i: the element
+    :type i: int
+    :rtype: int
+    """
+
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+
+    return i
+
+
+def union(parents, i, j):
+    """Merge the sets of ``i`` and ``j`` in a union-find forest
+
+    :param parents: the parent of each element
+    :type parents: list of int
+    :param i: an element
+    :type i: int
+    :param j: another element
+    :type j: int
+    """
+
+    i, j = find(parents, i), find(parents, j)
+    if i != j:
+        parents[max(i, j)] = min(i, j)  # (the representative is the first element of the set)
+
+
+def component_labels(parents):
+    """Label the sets of a union-find forest, in the order of their first element
+
+    :param parents: the parent of each element
+    :type parents: list of int
+    :return: the label of each element
+    :rtype: list of int
+    """
+
+    labels = [0] * len(parents)
+    roots = {}
+
+    for i in range(len(parents)):
+        root = find(parents, i)
+        label = roots.get(root)
+        if label is None:
+            label = roots[root] = len(roots)
+        labels[i] = label
+
+    return labels
+
 
 class Parser:
     """Parser (generate and AST from the tokens).
 
+    If the profiling is active (see ``osmipy.profiling``), the time spent in the different stages is recorded.
+
     :type lexer: Lexer
     :param lexer: The lexer
     """
@@ -20,17 +85,27 @@ class Parser:
     def __init__(self, lexer):
         self.lexer = lexer
         self.tokenizer = lexer.tokenize()
+        self.stats = profiling.active()
+
+        if self.stats is not None:
+            self.tokenizer = self.stats.timed_iterator('lexer.tokenize', self.tokenizer, 'tokens')
+
         self.current_token = None
         self.previous_tokens = []
         self.use_previous = 0
 
         self.next_atom_id = 0
-        self.atom_ids = {}
+        self.atom_ids = []  # (the id of an atom is its position)
+
+        self._components = []  # union-find forest of the atoms, over the bonds and ring bonds (not the dots)
+        self.components = None  # label of the connected component of each atom, set at the end
 
         self._ring_ids = {}
         self._ring_pairs_pid = []
         self.ring_bond_pairs = []
 
+        self.branch_spans = None  # set to a list to record the position of the branches
+
         self.next()
 
     def eat(self, token_type):
@@ -144,7 +219,8 @@ class Parser:
             atom = self.bracket_atom()
         elif self.current_token.type == ATOM:
             if self.current_token.value not in ORGANIC_SUBSET:
-                raise ParserException(self.current_token.position, '{} should be bracketed!')
+                raise ParserException(
+                    self.current_token, '{} should be bracketed!'.format(self.current_token.value))
             atom = Atom(symbol=self.current_token.value)
             self.next()
         elif self.current_token.type == WILDCARD:
@@ -154,7 +230,8 @@ class Parser:
             raise ParserException(self.current_token, 'unexpected token in atom')
 
         atom.atom_id = self.next_atom_id
-        self.atom_ids[self.next_atom_id] = atom
+        self.atom_ids.append(atom)
+        self._components.append(self.next_atom_id)
         self.next_atom_id += 1
 
         return atom
@@ -165,6 +242,7 @@ class Parser:
         :rtype: osmipy.smiles_ast.Branch
         """
 
+        start = self.current_token.position
         self.eat(LPAR)
 
         bond = None
@@ -175,9 +253,14 @@ class Parser:
 
         chain = self.chain()
 
+        end = self.current_token.position + 1
         self.eat(RPAR)
 
-        return Branch(chain=chain, bond=bond)
+        node = Branch(chain=chain, bond=bond)
+        if self.branch_spans is not None:
+            self.branch_spans.append((start, end, node))
+
+        return node
 
     def ring_bond(self):
         """
@@ -223,6 +306,25 @@ class Parser:
         :type ring_bonds: list[osmipy.smiles_ast.RingBond]
         """
 
+        if len(ring_bonds) == 0:
+            return
+
+        if self.stats is None:
+            self._connect_ring_bonds(ring_bonds)
+        else:
+            self.stats.start('parser.consolidate_ring_bonds')
+            try:
+                self._connect_ring_bonds(ring_bonds)
+            finally:
+                self.stats.stop()
+
+    def _connect_ring_bonds(self, ring_bonds):
+        """Actually do the job of ``_consolidate_ring_bonds()``
+
+        :param ring_bonds: list of ring bonds to consolidate
+        :type ring_bonds: list[osmipy.smiles_ast.RingBond]
+        """
+
         for rb in ring_bonds:
             i = rb.ring_id
             if i not in self._ring_ids:
@@ -248,6 +350,7 @@ class Parser:
 
                 # if everything is ok, do the connection
                 rb.target, other_rb.target = other_rb.parent, rb.parent
+                union(self._components, rb.parent.atom.atom_id, other_rb.parent.atom.atom_id)
 
                 del self._ring_ids[i]
                 self.ring_bond_pairs.append((other_rb, rb))  # 'til the end
@@ -303,8 +406,8 @@ class Parser:
         ring_bonds_to_consolidate = []
 
         while self.current_token.type in [PERCENT, DIGIT]:
-            if bond is None and bond.symbol != DOT:
-                raise ParserException(self.current_token, 'ring_id requires a bond in this position')
+            if bond is not None and bond.symbol == DOT:
+                raise ParserException(self.current_token, 'ring_id cannot follow a DOT')
 
             ring_bond = self.ring_bond()
             ring_bond.bond = bond
@@ -322,15 +425,22 @@ class Parser:
 
         if bond is None:
             while self.current_token.type == LPAR:
-                left.branches.append(self.branch())
+                branch = self.branch()
+                branch.parent = left
+                left.branches.append(branch)
+
+                if branch.bond is None or branch.bond.symbol != DOT:
+                    union(self._components, left.atom.atom_id, branch.chain.left.atom.atom_id)
 
             # needs to get an eventual new bond
             if self.current_token.type in BONDS_TYPE + [DOT]:
                 bond = Bond(self.current_token.value)
                 self.next()
 
-        if self.current_token.type in [ATOM, LSPAR]:
+        if self.current_token.type in [ATOM, LSPAR, WILDCARD]:
             right = self.chain()
+            if bond is None or bond.symbol != DOT:
+                union(self._components, left.atom.atom_id, right.left.atom.atom_id)
         elif bond is not None:
             raise ParserException(self.current_token, 'bond but no chain')
 
@@ -342,22 +452,65 @@ class Parser:
         :rtype: Chain
         """
 
+        if self.stats is None:
+            return self._smiles()
+
+        stats = self.stats
+        depth = stats.depth()
+        stats.count('molecules')
+
+        try:
+            node = self._smiles()
+        except Exception as e:
+            stats.unwind(depth)
+            stats.error(e)
+            raise
+
+        stats.count('atoms', self.next_atom_id)
+        stats.count('ring_closures', len(self.ring_bond_pairs))
+
+        return node
+
+    def _smiles(self):
+        """Actually do the job of ``smiles()``
+
+        :rtype: Chain
+        """
+
         node = None
 
+        if self.stats is not None:
+            self.stats.start('parser.chain')
+
         if self.current_token.type != EOF:
             node = self.chain()
 
         self.eat(EOF)
 
+        if self.stats is not None:
+            self.stats.stop()
+            self.stats.start('parser.final_checks')
+
+        self.final_checks()
+        self.components = component_labels(self._components)
+
+        if self.stats is not None:
+            self.stats.stop()
+
+        return node
+
+    def final_checks(self):
+        """Check that all ring ids are matched and that there is no direct pair
+        """
+
         # check for unmatched ring bonds
         if len(self._ring_ids) != 0:
             raise ParserException(
                 self.current_token,
                 'unmatched ring ids left: {}'.format(','.join(str(i) for i in self._ring_ids.keys())))
 
-        # check for direct pair
+        # check for direct pair (atoms that follow each other, but not through a dot)
         for rb1, rb2 in self.ring_bond_pairs:
-            if id(rb1.parent.parent) == id(rb2.parent.parent.parent):
+            chain = rb2.parent.parent.parent
+            if id(rb1.parent.parent) == id(chain) and (chain.bond is None or chain.bond.symbol != DOT):
                 raise ParserException(self.current_token, 'ring id {}: direct pair is not allowed'.format(rb1.ring_id))
-
-        return node
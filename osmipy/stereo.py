@@ -0,0 +1,211 @@
+"""
+Configuration (cis or trans) of the double bonds, given by the directional bonds (``/`` and ``\\``).
+
+The perception is done in a single pass over the adjacency index of the molecule (see ``osmipy.adjacency``), where
+the directional bonds are already given as written when going from one atom to the other (including ring bonds and
+branches), so that ``F/C=C/F``, ``C(\\F)=C/F`` and ``F/C=C/1.F1`` give the same configuration:
+
+.. code-block:: python
+
+    from osmipy import smiles, stereo
+
+    s = smiles.SMILES('F/C=C/C=C\\Cl')
+    db = s.double_bond_stereo()  # (cached on the molecule)
+    db.bonds  # [(1, 2), (3, 4)]
+    db.codes  # array('b', [2, 1]), TRANS then CIS
+
+The configuration of a double bond ``a=b`` is given relative to a neighbour of each of its atoms (``references``):
+the first neighbour of ``a`` and of ``b`` with a directional bond.
+Only the double bonds whose atoms both have one or two other neighbours (bonded by single bonds) are stereogenic.
+
+Two kinds of problems are reported: conflicting marks (two neighbours of the same atom on the same side, or a ring
+bond with different directions on both sides), which give ``CONFLICT``, and redundant marks (directional bonds that do
+not give the configuration of any double bond, *e.g.* ``C/C=C``).
+"""
+
+import array
+import collections
+
+UNSPECIFIED = 0
+CIS = 1
+TRANS = 2
+CONFLICT = 3
+
+CODES = ('unspecified', 'cis', 'trans', 'conflict')
+
+DIRECTIONAL = frozenset(('/', '\\'))
+SINGLE = frozenset(('', '-', '/', '\\'))
+
+
+class DoubleBondStereo:
+    """Configuration of the stereogenic double bonds of a molecule
+
+    :param bonds: the double bonds, as pairs of atoms (in the order of the string)
+    :type bonds: list of tuple(int, int)
+    :param references: for each double bond, the neighbours of its atoms that the configuration refers to (``-1`` if
+        there is none)
+    :type references: list of tuple(int, int)
+    :param codes: for each double bond, its configuration (``UNSPECIFIED``, ``CIS``, ``TRANS`` or ``CONFLICT``)
+    :type codes: array.array
+    :param redundant: the directional bonds that do not give any configuration, as pairs of atoms
+    :type redundant: list of tuple(int, int)
+    """
+
+    __slots__ = ('bonds', 'references', 'codes', 'redundant')
+
+    def __init__(self, bonds, references, codes, redundant):
+        self.bonds = bonds
+        self.references = references
+        self.codes = codes
+        self.redundant = redundant
+
+    def __len__(self):
+        return len(self.bonds)
+
+    def __iter__(self):
+        return zip(self.bonds, self.references, self.codes)
+
+    def configuration(self, a, b):
+        """Get the configuration of a double bond
+
+        :param a: one of the atoms
+        :type a: int
+        :param b: the other atom
+        :type b: int
+        :return: the code and the references (as neighbours of ``a`` then of ``b``)
+        :rtype: tuple(int, tuple(int, int))
+        :raise KeyError: if the bond is not a stereogenic double bond
+        """
+
+        for (i, j), (x, y), code in self:
+            if (i, j) == (a, b):
+                return code, (x, y)
+            if (j, i) == (a, b):
+                return code, (y, x)
+
+        raise KeyError((a, b))
+
+    def counts(self):
+        """Count the double bonds by configuration (and the redundant marks)
+
+        :rtype: collections.Counter
+        """
+
+        counter = collections.Counter(CODES[c] for c in self.codes)
+        counter['redundant'] = len(self.redundant)
+        return counter
+
+
+def _substituents(index, a, b):
+    """Neighbours of atom ``a`` of the double bond ``a=b`` (``None`` if the bond is not stereogenic on this side)
+
+    :rtype: list of int
+    """
+
+    others = [j for j, bond in index.neighbours[a] if j != b]
+    if not 0 < len(others) < 3 or any(index.bonds[a][j] not in SINGLE for j in others):
+        return None
+
+    return others
+
+
+def _side(index, a, others, conflicts):
+    """Directional bond on one side of a double bond
+
+    :return: the reference neighbour and its direction (``None`` if there is no mark), and whether the marks conflict
+    :rtype: tuple
+    """
+
+    marks = [(j, index.bonds[a][j]) for j in others if index.bonds[a][j] in DIRECTIONAL]
+    if not marks:
+        return None, False
+
+    conflict = any((a, j) in conflicts or (j, a) in conflicts for j, _ in marks)
+    if len(marks) == 2 and marks[0][1] == marks[1][1]:
+        conflict = True
+
+    return marks[0], conflict
+
+
+def perceive(index):
+    """Find the configuration of the double bonds of a molecule
+
+    :param index: adjacency index of the molecule
+    :type index: osmipy.adjacency.AdjacencyIndex
+    :rtype: DoubleBondStereo
+    """
+
+    conflicts = set(index.ring_bond_conflicts)
+    bonds = []
+    references = []
+    codes = array.array('b')
+    used = set()
+
+    for a, neighbours in enumerate(index.neighbours):
+        for b, bond in neighbours:
+            if bond != '=' or b < a:
+                continue
+
+            others_a, others_b = _substituents(index, a, b), _substituents(index, b, a)
+            if others_a is None or others_b is None:
+                continue
+
+            (mark_a, conflict_a), (mark_b, conflict_b) = _side(index, a, others_a, conflicts), \
+                _side(index, b, others_b, conflicts)
+
+            code = UNSPECIFIED
+            if mark_a is not None and mark_b is not None:
+                if conflict_a or conflict_b:
+                    code = CONFLICT
+                else:
+                    code = CIS if mark_a[1] == mark_b[1] else TRANS
+
+                used.update((a, j) if a < j else (j, a) for j in others_a if index.bonds[a][j] in DIRECTIONAL)
+                used.update((b, j) if b < j else (j, b) for j in others_b if index.bonds[b][j] in DIRECTIONAL)
+
+            bonds.append((a, b))
+            references.append((-1 if mark_a is None else mark_a[0], -1 if mark_b is None else mark_b[0]))
+            codes.append(code)
+
+    redundant = [
+        (i, j) for i, neighbours in enumerate(index.neighbours) for j, bond in neighbours
+        if i < j and bond in DIRECTIONAL and (i, j) not in used]
+
+    return DoubleBondStereo(bonds, references, codes, redundant)
+
+
+def double_bond_stereo(molecule):
+    """Get the configuration of the double bonds of a molecule (cached on the molecule)
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: DoubleBondStereo
+    """
+
+    index = molecule.adjacency()
+    if index.double_bonds is None:
+        index.double_bonds = perceive(index)
+
+    return index.double_bonds
+
+
+def report(molecules):
+    """Perceive the configuration of the double bonds of a batch of molecules, and count them
+
+    :param molecules: the molecules
+    :type molecules: collections.Iterable[osmipy.smiles.SMILES]
+    :return: the counts of the configurations (and of the redundant marks) over the batch, and the indices of the
+        molecules that have conflicting marks
+    :rtype: tuple(collections.Counter, list of int)
+    """
+
+    counter = collections.Counter(dict.fromkeys(CODES + ('redundant', ), 0))
+    conflicting = []
+
+    for i, molecule in enumerate(molecules):
+        result = double_bond_stereo(molecule)
+        counter.update(result.counts())
+        if CONFLICT in result.codes:
+            conflicting.append(i)
+
+    return counter, conflicting
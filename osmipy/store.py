@@ -0,0 +1,201 @@
+"""
+On-disk store of pre-parsed molecules.
+
+The store is a single file, with a header, the records (the binary representation of ``osmipy.array_graph``, each
+aligned on 8 bytes) and an index of the offsets of the records:
+
+.. code-block:: text
+
+    header | record 0 | record 1 | ... | index (count + 1 offsets)
+
+The file is opened through a read-only memory map, so that opening is (nearly) instantaneous whatever the size of
+the store, and record ``i`` is read as an array graph that is a view of the mapping.
+
+Writes are append-only: new records are written after the end of the file, followed by the new index, and the header is
+updated at the very end (so that an interrupted write leaves the previous content readable).
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+from osmipy import array_graph, smiles
+
+VERSION = 1
+MAGIC = b'OSMS'
+HEADER = struct.Struct('<4sHHQQ')  # magic, version, flags, number of records, offset of the index
+
+
+class StoreException(Exception):
+    pass
+
+
+def _read_header(f):
+    f.seek(0)
+    data = f.read(HEADER.size)
+    if len(data) != HEADER.size:
+        raise StoreException('file is too short to be a store')
+
+    magic, version, _, count, index_offset = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise StoreException('not a molecule store')
+    if version != VERSION:
+        raise StoreException('unsupported version {}'.format(version))
+
+    return count, index_offset
+
+
+def _index_from_buffer(buffer, count, index_offset):
+    index = memoryview(buffer)[index_offset:index_offset + (count + 1) * 8].cast('Q')
+    if sys.byteorder == 'big':
+        index = array.array('Q', index)
+        index.byteswap()
+
+    return index
+
+
+class MoleculeStore:
+    """Read a store of molecules.
+
+    Graphs given by this object are views of the mapping of the file, so they must not be used after ``close()``.
+
+    :param path: path to the store
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            self.count, index_offset = _read_header(f)
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.index = _index_from_buffer(self.buffer, self.count, index_offset)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, item):
+        return self.graph(item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.graph(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if type(self.index) is memoryview:
+            self.index.release()
+        self.buffer.close()
+
+    def graph(self, i):
+        """Get record ``i`` as an array graph (view of the file, nothing is copied)
+
+        :param i: record number
+        :type i: int
+        :rtype: osmipy.array_graph.ArrayGraph
+        """
+
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+
+        return array_graph.ArrayGraph.from_buffer(self.buffer, self.index[i])
+
+    def smiles(self, i):
+        """Get record ``i`` as a SMILES object
+
+        :param i: record number
+        :type i: int
+        :rtype: osmipy.smiles.SMILES
+        """
+
+        return smiles.SMILES.from_graph(self.graph(i))
+
+
+class StoreWriter:
+    """Append molecules to a store (which is created if it does not exist).
+
+    Nothing is visible to the readers until ``close()`` (or the end of the ``with`` block) is reached.
+
+    :param path: path to the store
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, 0, 0, HEADER.size))
+                f.write(struct.pack('<Q', HEADER.size))
+
+        self.file = open(path, 'r+b')
+        count, index_offset = _read_header(self.file)
+
+        self.file.seek(index_offset)
+        self.index = array.array('Q', self.file.read((count + 1) * 8))
+        if sys.byteorder == 'big':
+            self.index.byteswap()
+
+        # start after everything, so that the current index stays valid until the header is updated
+        self.position = self.file.seek(0, os.SEEK_END)
+        self.position += (-self.position) % 8
+        self.index[-1] = self.position
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, molecule):
+        """Add a molecule
+
+        :param molecule: the molecule
+        :type molecule: osmipy.smiles.SMILES|osmipy.array_graph.ArrayGraph
+        :return: the record number of the molecule
+        :rtype: int
+        """
+
+        if type(molecule) is not array_graph.ArrayGraph:
+            molecule = molecule.to_graph()
+
+        record = molecule.to_bytes()
+        record += b'\0' * ((-len(record)) % 8)
+
+        self.file.seek(self.position)
+        self.file.write(record)
+        self.position += len(record)
+        self.index.append(self.position)
+
+        return len(self.index) - 2
+
+    def close(self):
+        """Write the index and update the header
+        """
+
+        if self.file.closed:
+            return
+
+        index = array.array('Q', self.index)
+        if sys.byteorder == 'big':
+            index.byteswap()
+
+        self.file.seek(self.position)
+        self.file.write(index.tobytes())
+        self.file.truncate()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, len(self.index) - 1, self.position))
+        self.file.close()
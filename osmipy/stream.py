@@ -0,0 +1,269 @@
+"""
+Push-style parsing of SMILES records that arrive by chunks (from a socket, a compressed file, ...).
+
+The records are the lines of the input (``SMILES [name]``, the name being ignored, and the empty records skipped),
+and they can be split anywhere between two chunks, including in the middle of a two-letter symbol (``C`` + ``l``) or
+of a ``%nn`` ring id.
+The lexer keeps its state between the chunks, and the tokens of the current record are handed to the parser as soon
+as its line terminator arrives, so that only one record is kept in memory:
+
+.. code-block:: python
+
+    from osmipy import stream
+
+    parser = stream.PushParser()
+    for chunk in chunks:
+        for s in parser.feed(chunk):
+            ...  # a SMILES object
+
+    for s in parser.close():  # last record, if not terminated
+        ...
+
+Chunks can be ``str`` or ASCII ``bytes``.
+"""
+
+from osmipy import lexer, smiles, smiles_parser
+from osmipy.tokens import *
+
+TERMINATORS = frozenset(c for c, t in SYMBOLS_TR.items() if t == EOF)
+
+SYMBOLS = frozenset(TOT_SYMBOLS)
+
+
+class RecordLexer(lexer.TokensLexer):
+    """Lexer that gives back the tokens of a record, then raises the error that was found after them, if any (so
+    that the parser raises the same error as it would with ``osmipy.lexer.Lexer``)
+
+    :param tokens: the tokens
+    :type tokens: list of osmipy.tokens.Token
+    :param error: the error
+    :type error: osmipy.lexer.LexerException
+    """
+
+    def __init__(self, tokens, error=None):
+        super().__init__(tokens)
+        self.error = error
+
+    def tokenize(self):
+        """Give back the tokens
+        """
+
+        yield from self.tokens
+
+        if self.error is not None:
+            raise self.error
+
+
+class PushLexer:
+    """Lexer that is fed with chunks of text.
+
+    ``feed()`` gives the records that are complete, as ``RecordLexer`` objects, with the positions relative to the
+    start of the record.
+    The tokens are the same as the ones of ``osmipy.lexer.Lexer``, and so are the errors.
+    """
+
+    def __init__(self):
+        self.tokens = []
+        self.error = None
+        self.position = 0
+        self.length = None  # length of the SMILES part of the record, once it is over
+        self.pending = None  # letter that may be the first one of a two-letter symbol
+
+    def _symbol(self, letter, position):
+        """Add a one-letter atomic symbol"""
+
+        if letter in SYMBOLS:
+            self.tokens.append(Token(ATOM, letter, position))
+        else:
+            self.error = lexer.LexerException(position, '{} is not a valid atomic symbol'.format(letter))
+
+    def _end_of_smiles(self, position):
+        """The SMILES part of the record is over"""
+
+        if self.pending is not None:
+            self._symbol(self.pending, position - 1)
+            self.pending = None
+
+        self.length = position
+
+    def _record(self, position):
+        """Give the record, and reset the state
+
+        :return: the record, or ``None`` if it is empty (blank line, or only a name)
+        :rtype: RecordLexer
+        """
+
+        if self.length is None:
+            self._end_of_smiles(position)
+
+        tokens, error, length = self.tokens, self.error, self.length
+        self.tokens = []
+        self.error = None
+        self.length = None
+
+        if not tokens and error is None:
+            return None
+
+        if error is None:
+            tokens.append(Token(EOF, None, length))
+
+        return RecordLexer(tokens, error)
+
+    def feed(self, chunk):
+        """Lex a chunk
+
+        :param chunk: the chunk
+        :type chunk: str|bytes
+        :return: the complete records
+        :rtype: list of RecordLexer
+        """
+
+        if type(chunk) is not str:
+            chunk = bytes(chunk).decode('latin-1')  # (anything that is not ASCII is an unknown symbol)
+
+        records = []
+        position = self.position
+        pending, self.pending = self.pending, None  # (kept in a local variable during the loop)
+        skip = self.length is not None or self.error is not None  # (in the name, or after an error)
+        append = self.tokens.append
+
+        for c in chunk:
+            if c == '\n':
+                self.pending = pending
+                record = self._record(position)
+                self.pending = None
+                if record is not None:
+                    records.append(record)
+
+                position, pending, skip, append = 0, None, False, self.tokens.append
+                continue
+
+            if skip:
+                position += 1
+                continue
+
+            if pending is not None:
+                letters = pending + c
+                pending = None
+                if letters in SYMBOLS:
+                    append(Token(ATOM, letters, position - 1))
+                    position += 1
+                    continue
+
+                self._symbol(letters[0], position - 1)
+                if self.error is not None:
+                    skip = True
+                    position += 1
+                    continue
+
+            if c in SYMBOLS_TR:
+                if c in TERMINATORS:
+                    self._end_of_smiles(position)
+                    skip = True
+                else:
+                    append(Token(SYMBOLS_TR[c], c, position))
+            elif c.isdigit():
+                append(Token(DIGIT, int(c), position))
+            elif c.isalpha():
+                pending = c
+            else:
+                self.error = lexer.LexerException(position, 'unknown symbol {}'.format(c))
+                skip = True
+
+            position += 1
+
+        self.pending = pending
+        self.position = position
+        return records
+
+    def close(self):
+        """End of the input
+
+        :return: the last record, if any
+        :rtype: list of RecordLexer
+        """
+
+        record = self._record(self.position)
+        self.position = 0
+        return [] if record is None else [record]
+
+
+class PushParser:
+    """Parser that is fed with chunks of text, and gives the ``SMILES`` objects as soon as their record is complete.
+
+    If ``skip_errors`` is set, the invalid records are skipped, and their number and error are stored in ``errors``.
+    Otherwise, the error is raised, and the molecules that were completed in the same chunk (before or after the
+    invalid record) are given by the next call to ``feed()`` (which can be given an empty chunk) or ``close()``.
+
+    :param skip_errors: skip the invalid records
+    :type skip_errors: bool
+    """
+
+    def __init__(self, skip_errors=False):
+        self.lexer = PushLexer()
+        self.skip_errors = skip_errors
+        self.errors = []
+        self.records = 0  # number of records that were read
+        self._waiting = []
+        self._ready = []
+
+    def _parse(self, records):
+        """Parse the records (keeping the ones that come after an error, if it is raised)
+
+        :rtype: list of osmipy.smiles.SMILES
+        """
+
+        records = self._waiting + records
+        molecules = self._ready
+        self._waiting = []
+        self._ready = []
+
+        for i, record in enumerate(records):
+            self.records += 1
+            try:
+                molecules.append(smiles.SMILES(record))
+            except smiles_parser.ERRORS as e:
+                if not self.skip_errors:
+                    self._waiting = records[i + 1:]
+                    self._ready = molecules
+                    raise
+                self.errors.append((self.records - 1, e))
+
+        return molecules
+
+    def feed(self, chunk):
+        """Parse a chunk
+
+        :param chunk: the chunk
+        :type chunk: str|bytes
+        :return: the molecules whose record was completed
+        :rtype: list of osmipy.smiles.SMILES
+        """
+
+        return self._parse(self.lexer.feed(chunk))
+
+    def close(self):
+        """End of the input
+
+        :return: the remaining molecules (including the last one, if its record was not terminated)
+        :rtype: list of osmipy.smiles.SMILES
+        """
+
+        return self._parse(self.lexer.close())
+
+
+def iter_chunks(chunks, skip_errors=False):
+    """Parse the records of a stream of chunks
+
+    :param chunks: the chunks
+    :type chunks: collections.Iterable[str|bytes]
+    :param skip_errors: skip the invalid records (see ``PushParser``)
+    :type skip_errors: bool
+    :rtype: collections.Iterable[osmipy.smiles.SMILES]
+    """
+
+    parser = PushParser(skip_errors)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+    yield from parser.close()
@@ -0,0 +1,229 @@
+"""
+Extraction of subgraphs (scaffolds, side chains, neighbourhoods, ...) given by atom ids, as new molecules.
+
+The subgraph is written in a single depth-first traversal of the adjacency index of the molecule (see
+``osmipy.adjacency``), directly as an array graph (see ``osmipy.array_graph``), so that the AST of the molecule is not
+touched and the index is built only once for all the subgraphs of a molecule:
+
+.. code-block:: python
+
+    from osmipy import smiles, subgraph
+
+    s = smiles.SMILES('OC(=O)[C@@H](N)Cc1ccccc1')
+    s.subgraph([1, 2, 3, 4])  # C(=O)[CH2]N, with hydrogens in place of the cut bonds
+    s.subgraph([1, 2, 3, 4], wildcards=True)  # C(*)(=O)[C@@H](N)*, with attachment points
+
+    selections = [subgraph.neighbourhood(s, i, 1) for i in range(len(s.atom_ids))]
+    pieces = subgraph.subgraphs(s, selections)
+
+The atoms keep their ids (the wildcards get new ones), ring closures get the lowest free digit, and the chirality of
+the atoms is adapted to the new order of their neighbours.
+A cut bond becomes implicit hydrogens (as many as its order) or a bond to a wildcard (``*``) atom.
+Hydrogens are only added to the bracketed atoms, the implicit hydrogens of the other atoms following their valence
+(since the brackets are not recorded, atoms such as ``[C]`` are not considered as bracketed, see ``osmipy.hydrogens``).
+"""
+
+import heapq
+
+from osmipy import adjacency, array_graph, hydrogens
+from osmipy.tokens import *
+
+WILDCARD_CODE = array_graph.SYMBOL_CODES[WILDCARD]
+DOT_CODE = array_graph.BOND_CODES[DOT]
+
+
+def _bond_code(bond):
+    return array_graph.BOND_CODES[bond] if bond else 0
+
+
+def extract(index, atom_ids, wildcards=False):
+    """Write the subgraph given by some atoms of a molecule
+
+    :param index: adjacency index of the molecule
+    :type index: osmipy.adjacency.AdjacencyIndex
+    :param atom_ids: ids of the atoms of the subgraph
+    :type atom_ids: collections.Iterable[int]
+    :param wildcards: replace the cut bonds by bonds to wildcard atoms (rather than by implicit hydrogens)
+    :type wildcards: bool
+    :rtype: osmipy.array_graph.ArrayGraph
+    :raise KeyError: if an atom id is not in the molecule
+    :raise osmipy.adjacency.RingClosureException: if more than ``MAX_RING_ID`` ring closures are open at the same time
+    """
+
+    graph = index.graph
+    selected = set(index.positions[a] for a in atom_ids)
+    neighbours = index.neighbours
+
+    # 1. DFS, to get the spanning tree (with the wildcards as leaves) and the ring closures
+    roots = []
+    from_atom = {}
+    children = {}
+    rings = {}
+    cuts = {}
+    closures = set()
+
+    for root in sorted(selected):
+        if root in from_atom:
+            continue
+
+        roots.append(root)
+        from_atom[root] = -1
+        children[root], rings[root], cuts[root] = [], [], []
+        stack = [(root, iter(neighbours[root]))]
+
+        while stack:
+            i, candidates = stack[-1]
+            for j, _ in candidates:
+                if j not in selected:
+                    cuts[i].append(j)
+                    if wildcards:
+                        children[i].append(-2 - j)  # (the wildcard that replaces ``j``)
+                elif j not in from_atom:
+                    from_atom[j] = i
+                    children[i].append(j)
+                    children[j], rings[j], cuts[j] = [], [], []
+                    stack.append((j, iter(neighbours[j])))
+                    break
+                elif j != from_atom[i] and (j, i) not in closures:
+                    closures.add((i, j))
+                    rings[i].append(j)
+                    rings[j].append(i)
+            else:
+                stack.pop()
+
+    # 2. write, in the same order
+    result = array_graph.ArrayGraph()
+    bonds = index.bonds
+    indices = {}
+    free_ids = list(range(1, adjacency.MAX_RING_ID + 1))
+    open_rings = {}
+    ring_bonds = []
+    next_atom_id = graph.next_atom_id
+
+    for root in roots:
+        to_write = [(root, -1, array_graph.LINK_ROOT, 0)]
+        if len(result) > 0:
+            to_write = [(root, len(result) - 1, array_graph.LINK_CHAIN, DOT_CODE)]
+
+        while to_write:
+            i, parent, link, bond = to_write.pop()
+            position = len(result)
+
+            if i < -1:  # wildcard
+                hydrogens._append_atom(
+                    result, next_atom_id, parent, link, bond, WILDCARD_CODE, 0, 0, 0, 0, -1, 0)
+                next_atom_id += 1
+                continue
+
+            indices[i] = position
+            ring_partners = [j for j in rings[i] if j in indices] + [j for j in rings[i] if j not in indices]
+            chirality = graph.chirality[i]
+            hcount = graph.hcount[i]
+
+            if cuts[i] and not wildcards and hydrogens._is_bracketed(graph, i):
+                hcount += sum(BOND_ORDER.get(bonds[i][j], 1) for j in cuts[i])
+
+            if chirality != 0:
+                if hcount > 1 and hcount != graph.hcount[i]:  # (not a stereocenter anymore)
+                    chirality = 0
+                else:
+                    replaced = dict((j, -2 - j if wildcards else -1) for j in cuts[i])
+                    reference = [replaced.get(j, j) for j in index.references[i]]
+                    order = [] if from_atom[i] < 0 else [from_atom[i]]
+                    if hcount > 0:
+                        order.append(-1)
+                    order.extend(ring_partners)
+                    order.extend(children[i])
+                    if adjacency._parity(reference, order):
+                        chirality = hydrogens.INVERTED_CHIRALITY[chirality]
+
+            hydrogens._append_atom(
+                result, graph.atom_id[i], parent, link, bond, graph.symbol[i], graph.isotope[i], chirality, hcount,
+                graph.charge[i], graph.klass[i], len(rings[i]))
+
+            released = []
+            for j in ring_partners:  # (the closures first)
+                if (j, i) in open_rings:
+                    row, ring_id = open_rings.pop((j, i))
+                    ring_bonds[row][1] = position
+                    ring_bonds.append([position, indices[j], ring_id, 0])
+                    released.append(ring_id)
+                else:
+                    ring_id = adjacency._next_ring_id(free_ids)
+                    open_rings[(i, j)] = len(ring_bonds), ring_id
+                    ring_bonds.append([position, -1, ring_id, _bond_code(bonds[i][j])])
+
+            for ring_id in released:
+                heapq.heappush(free_ids, ring_id)
+
+            c = children[i]
+            for k, j in enumerate(reversed(c)):
+                to_write.append((
+                    j, position, array_graph.LINK_BRANCH if k > 0 else array_graph.LINK_CHAIN,
+                    _bond_code(bonds[i][-2 - j if j < -1 else j])))
+
+    for owner, target, ring_id, bond in ring_bonds:
+        result.rb_owner.append(owner)
+        result.rb_target.append(target)
+        result.rb_ring_id.append(ring_id)
+        result.rb_bond.append(bond)
+
+    result.next_atom_id = next_atom_id
+
+    return result
+
+
+def subgraph(molecule, atom_ids, wildcards=False):
+    """Get the subgraph given by some atoms of a molecule
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :param atom_ids: ids of the atoms of the subgraph
+    :type atom_ids: collections.Iterable[int]
+    :param wildcards: replace the cut bonds by bonds to wildcard atoms (rather than by implicit hydrogens)
+    :type wildcards: bool
+    :rtype: osmipy.smiles.SMILES
+    """
+
+    return molecule.from_graph(extract(molecule.adjacency(), atom_ids, wildcards))
+
+
+def subgraphs(molecule, selections, wildcards=False):
+    """Get many subgraphs of a molecule (the adjacency index is built once)
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :param selections: for each subgraph, the ids of its atoms
+    :type selections: collections.Iterable[collections.Iterable[int]]
+    :param wildcards: replace the cut bonds by bonds to wildcard atoms (rather than by implicit hydrogens)
+    :type wildcards: bool
+    :rtype: list of osmipy.smiles.SMILES
+    """
+
+    index = molecule.adjacency()
+    return [molecule.from_graph(extract(index, atom_ids, wildcards)) for atom_ids in selections]
+
+
+def neighbourhood(molecule, atom_id, radius):
+    """Get the atoms that are at most ``radius`` bonds away from an atom (breadth-first search)
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :param atom_id: id of the atom
+    :type atom_id: int
+    :param radius: the radius
+    :type radius: int
+    :return: the ids of the atoms, in the order of the string
+    :rtype: list of int
+    """
+
+    index = molecule.adjacency()
+    frontier = [index.positions[atom_id]]
+    seen = set(frontier)
+
+    for _ in range(radius):
+        frontier = [j for i in frontier for j in index.adjacent[i] if j not in seen and not seen.add(j)]
+        if not frontier:
+            break
+
+    return [index.graph.atom_id[i] for i in sorted(seen)]
@@ -0,0 +1,253 @@
+"""
+Topological distances between the atoms, and the indices derived from them (requires ``numpy``).
+
+The distances are computed by a breadth-first search from all the atoms at once (and, for ``distance_matrices()``, in
+all the molecules at once) over the adjacency of the molecules in compressed sparse row (CSR) form: each step expands
+the whole frontier, as ``(source, atom)`` pairs, with a few array operations.
+
+.. code-block:: python
+
+    from osmipy import smiles, topology
+
+    s = smiles.SMILES('CC(C)CO')
+    s.distance_matrix()  # (cached on the molecule)
+    topology.wiener_index(s)  # 18
+
+Row and column ``i`` of the matrix are the ``i``-th atom of the molecule, in the order of the string (as in
+``osmipy.adjacency.AdjacencyIndex``), and the distance between two atoms that are not connected is ``-1``.
+"""
+
+import itertools
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+UNREACHABLE = -1
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError('numpy is required for the topological distances')
+
+
+def distance_dtype(n):
+    """Smallest (signed) integer type that holds the distances in a molecule of ``n`` atoms
+
+    :param n: number of atoms
+    :type n: int
+    :rtype: numpy.dtype
+    """
+
+    for dtype in (numpy.int8, numpy.int16, numpy.int32):
+        if n <= numpy.iinfo(dtype).max:
+            return numpy.dtype(dtype)
+
+    return numpy.dtype(numpy.int64)
+
+
+def csr(index):
+    """Adjacency of a molecule in compressed sparse row form: the neighbours of atom ``i`` are
+    ``indices[indptr[i]:indptr[i + 1]]``
+
+    :param index: adjacency index of the molecule
+    :type index: osmipy.adjacency.AdjacencyIndex
+    :return: ``indptr`` and ``indices``
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+
+    _check_numpy()
+
+    indptr = numpy.zeros(len(index) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(a) for a in index.adjacent], out=indptr[1:])
+    indices = numpy.fromiter(itertools.chain.from_iterable(index.adjacent), dtype=numpy.int64, count=indptr[-1])
+
+    return indptr, indices
+
+
+def _bfs(indptr, indices, sizes):
+    """Distances between all the pairs of atoms of each molecule of a batch, whose adjacencies are the diagonal blocks
+    of the CSR matrix.
+
+    The distances are stored in a single flat array, where the matrix of molecule ``k`` starts at
+    ``starts[k]`` (row-major, ``sizes[k] ** 2`` items).
+
+    :return: the distances and ``starts``
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+
+    sizes = numpy.asarray(sizes, dtype=numpy.int64)
+    first_atom = numpy.cumsum(sizes) - sizes
+    starts = numpy.cumsum(sizes * sizes) - sizes * sizes
+    total_atoms = int(sizes.sum())
+
+    distances = numpy.full(int((sizes * sizes).sum()), UNREACHABLE, dtype=distance_dtype(int(sizes.max(initial=0))))
+    if total_atoms == 0:
+        return distances, starts
+
+    # frontier, as (source, atom) pairs, where the source is given by the position of its row in ``distances``
+    # minus the (global) number of its first atom, so that the position of the pair is ``key + atom``
+    molecule = numpy.repeat(numpy.arange(len(sizes)), sizes)
+    atoms = numpy.arange(total_atoms)
+    keys = starts[molecule] + (atoms - first_atom[molecule]) * sizes[molecule] - first_atom[molecule]
+    distances[keys + atoms] = 0
+
+    degrees = numpy.diff(indptr)
+    distance = 0
+
+    while len(atoms) > 0:
+        distance += 1
+
+        # all the neighbours of the frontier
+        counts = degrees[atoms]
+        total = int(counts.sum())
+        if total == 0:
+            break
+
+        before = numpy.cumsum(counts) - counts
+        neighbours = indices[numpy.repeat(indptr[atoms] - before, counts) + numpy.arange(total)]
+        keys = numpy.repeat(keys, counts)
+
+        pairs = keys + neighbours
+        new = distances[pairs] == UNREACHABLE
+        pairs, unique = numpy.unique(pairs[new], return_index=True)
+
+        distances[pairs] = distance
+        keys = keys[new][unique]
+        atoms = pairs - keys
+
+    return distances, starts
+
+
+def _block_csr(indexes):
+    """CSR form of the adjacency of a batch of molecules (block-diagonal)
+
+    :return: ``indptr``, ``indices`` and the number of atoms of each molecule
+    :rtype: tuple
+    """
+
+    sizes = [len(index) for index in indexes]
+    adjacent = [a for index in indexes for a in index.adjacent]
+
+    indptr = numpy.zeros(len(adjacent) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(a) for a in adjacent], out=indptr[1:])
+    indices = numpy.fromiter(itertools.chain.from_iterable(adjacent), dtype=numpy.int64, count=indptr[-1])
+
+    # (from the numbering of each molecule to the one of the batch)
+    first_atom = numpy.cumsum(sizes) - sizes
+    indices += numpy.repeat(numpy.repeat(first_atom, sizes), numpy.diff(indptr))
+
+    return indptr, indices, sizes
+
+
+def distance_matrices(molecules):
+    """Get the distance matrices of a batch of molecules, computed all at once (the matrices that are not already
+    cached on the molecules are cached)
+
+    :param molecules: the molecules
+    :type molecules: list of osmipy.smiles.SMILES
+    :rtype: list of numpy.ndarray
+    """
+
+    _check_numpy()
+
+    indexes = [m.adjacency() for m in molecules]
+    missing = [index for index in indexes if index.distances is None]
+
+    if missing:
+        indptr, indices, sizes = _block_csr(missing)
+        distances, starts = _bfs(indptr, indices, sizes)
+        for index, start, n in zip(missing, starts.tolist(), sizes):
+            matrix = distances[start:start + n * n].reshape(n, n).astype(distance_dtype(n))
+            matrix.flags.writeable = False  # (shared by all the users of the molecule)
+            index.distances = matrix
+
+    return [index.distances for index in indexes]
+
+
+def distance_matrix(molecule):
+    """Get the distance matrix of a molecule (cached on the molecule)
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: numpy.ndarray
+    """
+
+    return distance_matrices([molecule])[0]
+
+
+def wiener_index(molecule):
+    """Wiener index: sum of the distances between all the pairs of (connected) atoms
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: int
+    """
+
+    d = distance_matrix(molecule)
+    return int(d[d > 0].sum(dtype=numpy.int64)) // 2
+
+
+def eccentricity(molecule):
+    """Eccentricity of the atoms: largest distance to another atom (of the same fragment)
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: numpy.ndarray
+    """
+
+    return distance_matrix(molecule).max(axis=1, initial=0)
+
+
+def radius(molecule):
+    """Radius: smallest eccentricity
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: int
+    """
+
+    e = eccentricity(molecule)
+    return int(e.min()) if len(e) > 0 else 0
+
+
+def diameter(molecule):
+    """Diameter: largest eccentricity
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :rtype: int
+    """
+
+    return int(eccentricity(molecule).max(initial=0))
+
+
+def atom_pairs(molecule, max_distance=None):
+    """Count the atom pairs: pairs of atoms (given by their written form, without chirality) at a given distance
+
+    :param molecule: the molecule
+    :type molecule: osmipy.smiles.SMILES
+    :param max_distance: largest distance that is counted
+    :type max_distance: int
+    :return: the number of pairs, as ``(form of the first atom, form of the second atom, distance) -> count``, where
+        the forms are sorted
+    :rtype: dict
+    """
+
+    index = molecule.adjacency()
+    d = distance_matrix(molecule)
+
+    texts = [t.replace('@', '') if r is not None else t for t, r in zip(index.texts, index.references)]
+    forms, codes = numpy.unique(numpy.array(texts, dtype=object).astype(str), return_inverse=True)
+
+    i, j = numpy.nonzero(numpy.triu(d > 0))
+    if max_distance is not None:
+        close = d[i, j] <= max_distance
+        i, j = i[close], j[close]
+
+    a, b = numpy.minimum(codes[i], codes[j]), numpy.maximum(codes[i], codes[j])
+    keys, counts = numpy.unique(numpy.stack([a, b, d[i, j].astype(numpy.int64)]), axis=1, return_counts=True)
+
+    return dict(
+        ((str(forms[x]), str(forms[y]), int(k)), int(c)) for (x, y, k), c in zip(keys.T.tolist(), counts.tolist()))
@@ -1,6 +1,6 @@
 from tests import OSmiPyTestCase
 
-from osmipy import smiles
+from osmipy import smiles, smiles_ast
 
 
 class SMILESTestCase(OSmiPyTestCase):
@@ -47,3 +47,117 @@ class SMILESTestCase(OSmiPyTestCase):
         self.assertEqual(s.get_atom(0), s.node.left.atom)
         self.assertEqual(s.get_atom(1), s.node.right.left.atom)
         self.assertEqual(s.get_atom(2), s.node.right.right.left.atom)
+
+    def test_atom_ids(self):
+        """Test the list of atoms, by id"""
+
+        s = smiles.SMILES('CC(=O)[O-].[Na+]')
+        self.assertEqual(len(s.atom_ids), 5)
+        self.assertEqual(list(s.atom_ids), [0, 1, 2, 3, 4])
+        self.assertEqual([a.symbol for a in s], ['C', 'C', 'O', 'O', 'Na'])
+        self.assertEqual(s.symbols(), ['C', 'C', 'O', 'O', 'Na'])
+        self.assertEqual(s.charges(), [0, 0, 0, -1, 1])
+
+        self.assertIn(4, s.atom_ids)
+        self.assertNotIn(5, s.atom_ids)
+        self.assertNotIn(-1, s.atom_ids)
+
+        for i in [5, -1]:
+            with self.assertRaises(KeyError):
+                s.get_atom(i)
+
+        # ids with holes
+        ids = smiles.AtomIds()
+        for i in [3, 0]:
+            ids.add(smiles_ast.Atom('C', atom_id=i))
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(list(ids), [0, 3])
+        self.assertEqual(ids.attribute('symbol'), ['C', None, None, 'C'])
+        self.assertIsNone(ids.get(1))
+
+        with self.assertRaises(smiles.UnicityException):
+            ids.add(smiles_ast.Atom('N', atom_id=3))
+
+    def test_add_fragment_atom_ids(self):
+        """Test that the ids of the atoms are shifted when adding fragments"""
+
+        a = smiles.SMILES('N[C@@H](C)C(=O)O')
+        b = smiles.SMILES('c1ccccc1')
+        c = a + b + a
+
+        self.assertEqual(repr(c), 'N[C@@H](C)C(=O)O.c1ccccc1.N[C@@H](C)C(=O)O')
+        self.assertEqual(c.next_atom_id, 2 * a.next_atom_id + b.next_atom_id)
+        self.assertEqual(list(c.atom_ids), list(range(c.next_atom_id)))
+        self.assertEqual(c.symbols(), a.symbols() + b.symbols() + a.symbols())
+
+        for atom_id, atom in c.atom_ids.items():
+            self.assertEqual(atom.atom_id, atom_id)
+            self.assertIsNot(atom, a.atom_ids.get(atom_id))
+
+        # the original molecules are untouched
+        self.assertEqual(list(b.atom_ids), list(range(6)))
+        self.assertEqual([atom.atom_id for atom in b], list(range(6)))
+
+        # from an AST
+        d = a.add_fragment(smiles.SMILES('CO').node)
+        self.assertEqual(d.next_atom_id, a.next_atom_id + 2)
+        self.assertEqual(d.get_atom(a.next_atom_id + 1).symbol, 'O')
+
+    def test_components(self):
+        """Test the labels of the connected components"""
+
+        tests = [
+            ('CCO', [0, 0, 0]),
+            ('Oc1ccccc1.NCCO', [0] * 7 + [1] * 4),
+            ('c1c2c3c4cc1.Br2.Cl3.Cl4', [0] * 9),  # (ring bonds through the dots)
+            ('[Na+].[Cl-].[Na+]', [0, 1, 2]),
+            ('C(.N)O', [0, 1, 0]),
+            ('C1.C.C1', [0, 1, 0]),
+        ]
+
+        for text, expected in tests:
+            s = smiles.SMILES(text)
+            self.assertEqual(s.components(), expected, msg=text)
+            self.assertEqual(smiles.component_labels(s.node), expected, msg=text)  # (without the parser)
+            self.assertEqual(smiles.SMILES.from_graph(s.to_graph()).components(), expected, msg=text)
+
+        c = smiles.SMILES('CC') + smiles.SMILES('O')
+        self.assertEqual(c.components(), [0, 0, 1])
+
+    def test_fragments(self):
+        """Test the split of a molecule into its connected components"""
+
+        tests = [
+            ('Oc1ccccc1.NCCO', ['Oc1ccccc1', 'NCCO']),
+            ('[Na+].[Cl-]', ['[Na+]', '[Cl-]']),
+            ('c1c2c3c4cc1.Br2.Cl3.Cl4', ['c1c2c3c4cc1.Br2.Cl3.Cl4']),
+            ('C1.C.C1', ['C1.C1', 'C']),
+            ('C(C.N)C', ['C(C)C', 'N']),
+            ('C1(.N.C1)O', ['C1(.C1)O', 'N']),
+            ('C1CC(.[Na+])(.O)CC1.Cl', ['C1CCCC1', '[Na+]', 'O', 'Cl']),
+        ]
+
+        for text, expected in tests:
+            s = smiles.SMILES(text)
+            fragments = s.fragments()
+            self.assertEqual([repr(f) for f in fragments], expected, msg=text)
+
+            for f in fragments:
+                # the atoms keep their ids, and are shared
+                for atom_id, atom in f.atom_ids.items():
+                    self.assertIs(atom, s.get_atom(atom_id))
+
+                self.assertEqual(repr(smiles.SMILES.from_graph(f.to_graph())), repr(f))
+                self.assertEqual(f.fragments(), [f])
+
+            self.assertEqual(sorted(i for f in fragments for i in f.atom_ids), list(s.atom_ids))
+
+        # the last fragment is shared with the molecule, and the original tree is not changed
+        s = smiles.SMILES('Oc1ccccc1.NCCO')
+        f1, f2 = s.fragments()
+        self.assertIs(f2.node, s.node.right.right.right.right.right.right.right)
+        self.assertIs(f1.node.left, s.node.left)
+        self.assertEqual(repr(s), 'Oc1ccccc1.NCCO')
+
+        self.assertEqual(smiles.SMILES('').fragments(), [])
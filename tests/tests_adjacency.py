@@ -0,0 +1,83 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, adjacency, generate
+
+
+class AdjacencyTestCase(OSmiPyTestCase):
+
+    def test_index(self):
+        """Test the neighbours and the orientation of the bonds"""
+
+        index = smiles.SMILES('F/C=C/1CC1(\\Cl).[Na+]').adjacency()
+        self.assertEqual(len(index), 7)
+        self.assertEqual(len(index.fragments), 2)
+
+        self.assertEqual(index.bonds[0], {1: '/'})
+        self.assertEqual(index.bonds[1], {0: '\\', 2: '='})
+        self.assertEqual(index.bonds[2], {1: '=', 3: '', 4: '/'})
+        self.assertEqual(index.bonds[4], {3: '', 2: '\\', 5: '\\'})
+        self.assertEqual(index.bonds[6], {})
+
+        # the index is built once
+        s = smiles.SMILES('CCO')
+        self.assertIs(s.adjacency(), s.adjacency())
+        self.assertIsNone((s + s)._adjacency)
+
+    def test_randomized(self):
+        """Test that the random SMILES are valid, distinct and deterministic"""
+
+        s = smiles.SMILES('OC(=O)[C@@H](N)Cc1ccc2ccccc2c1.[Na+]')
+        variants = s.randomized(50, seed=42)
+
+        self.assertEqual(len(variants), 50)
+        self.assertEqual(len(set(variants)), 50)
+        self.assertEqual(variants, s.randomized(50, seed=42))
+
+        for v in variants:
+            self.assertEqual(len(smiles.SMILES(v).atom_ids), len(s.atom_ids))
+
+        # not that many spellings
+        self.assertEqual(sorted(smiles.SMILES('CCO').randomized(10, seed=1)), ['C(C)O', 'C(O)C', 'CCO', 'OCC'])
+        self.assertEqual(smiles.SMILES('C').randomized(10), ['C'])
+
+        # ring ids are reused, and ``%nn`` is used above 9
+        s = smiles.SMILES('C12C3C4C1C5C2C3C45')
+        for v in s.randomized(20, seed=1):
+            smiles.SMILES(v)
+
+        s = smiles.SMILES(generate.Generator(seed=1, min_atoms=80, max_atoms=80, ring_density=1.).smiles())
+        self.assertTrue(any('%10' in v for v in s.randomized(20, seed=1)))
+
+        # "Cn" would not be the same
+        variants = smiles.SMILES('c1cccn1C').randomized(50, seed=1)
+        self.assertTrue(any(v.startswith('C-n') for v in variants))
+        for v in variants:
+            self.assertEqual(len(smiles.SMILES(v).atom_ids), 6)
+
+        # a wheel of 101 atoms: written with two ring ids, but going around the rim needs one per spoke
+        wheel = smiles.SMILES('C(C1)' + '(C12)(C21)' * 49 + '(C12)(C2)')
+        with self.assertRaises(adjacency.RingClosureException):
+            wheel.randomized(1, seed=1)
+
+    def test_stereo(self):
+        """Test that the chirality and the directional bonds are kept"""
+
+        for s, expected in [
+            ('N[C@](Br)(O)C', 'Br[C@](O)(N)C'),
+            ('[C@H](F)(Cl)Br', 'F[C@@H](Cl)Br'),
+            ('F/C=C/F', 'F\\C=C\\F'),
+        ]:
+            variants = smiles.SMILES(s).randomized(200, seed=1)
+            self.assertIn(expected, variants)
+
+    def test_iter_randomized(self):
+        """Test the stream of random SMILES"""
+
+        molecules = [smiles.SMILES(s) for s in generate.Generator(seed=1).stream(10)]
+        r = list(adjacency.iter_randomized(molecules + [molecules[0].to_graph()], 3, seed=42))
+
+        self.assertEqual(r, list(adjacency.iter_randomized(molecules + [molecules[0].to_graph()], 3, seed=42)))
+        self.assertEqual(set(i for i, _ in r), set(range(11)))
+
+        for i, v in r:
+            self.assertEqual(len(smiles.SMILES(v).atom_ids), len(molecules[i % 10].atom_ids))
@@ -0,0 +1,97 @@
+import asyncio
+import concurrent.futures
+
+from tests import OSmiPyTestCase
+
+from osmipy import aio, smiles, generate, smiles_parser
+
+
+class Source:
+    """Stand-in for a stream of records (*e.g.* a socket), which gives them one by one, and keeps track of how many
+    of them were read"""
+
+    def __init__(self, records):
+        self.records = records
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        if self.read >= len(self.records):
+            raise StopAsyncIteration
+
+        self.read += 1
+        return self.records[self.read - 1]
+
+
+class AioTestCase(OSmiPyTestCase):
+
+    def setUp(self):
+        self.records = list(generate.Generator(seed=42).stream(300))
+        self.records[42] = 'C(C'
+        self.expected = [
+            (i, smiles.SMILES(r).to_bytes()) for i, r in enumerate(self.records) if i != 42]
+
+    def test_parse(self):
+        """Test the parsing of a single string"""
+
+        async def main():
+            molecule = await aio.parse('c1ccccc1C(=O)O')
+            self.assertEqual(repr(molecule), 'c1ccccc1C(=O)O')
+
+            with self.assertRaises(smiles_parser.ParserException):
+                await aio.parse('C(C')
+
+        asyncio.run(main())
+
+    def test_parse_stream(self):
+        """Test the parsing of a stream, in order or not"""
+
+        async def main(executor, ordered):
+            errors = []
+            molecules = [
+                (i, m.to_bytes()) async for i, m in aio.parse_stream(
+                    Source(self.records), executor, ordered=ordered, batch_size=16, errors=errors, indexed=True)
+            ]
+
+            if ordered:
+                self.assertEqual(molecules, self.expected)
+            else:
+                self.assertEqual(sorted(molecules), self.expected)
+
+            self.assertEqual([i for i, _ in errors], [42])
+            self.assertIsInstance(errors[0][1], smiles_parser.ParserException)
+
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            for ordered in (True, False):
+                asyncio.run(main(executor, ordered))
+
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:  # (molecules and errors are pickled)
+            asyncio.run(main(executor, True))
+
+        asyncio.run(main(None, True))  # default executor
+
+        # error is raised
+        async def raises():
+            async for _ in aio.parse_stream(Source(self.records)):
+                pass
+
+        with self.assertRaises(smiles_parser.ParserException):
+            asyncio.run(raises())
+
+    def test_backpressure(self):
+        """Test that the records are not read much in advance of the consumer"""
+
+        async def main():
+            source = Source(self.records)
+            stream = aio.parse_stream(source, batch_size=8, max_batches=2, queue_size=8, errors=[])
+
+            await stream.__anext__()
+            await asyncio.sleep(.1)  # (let the reader fill the queue)
+            self.assertLessEqual(source.read, 8 * 2 + 8 + 2)
+
+            await stream.aclose()
+
+        asyncio.run(main())
@@ -0,0 +1,98 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, array_graph, smiles_ast
+
+
+class ArrayGraphTestCase(OSmiPyTestCase):
+
+    test_smiles = [
+        '[Cu+2]',
+        '[2H+]',
+        '[CH4:2]',
+        'Oc1c(*)cccc1',
+        'N[C@@](Br)(O)C',
+        'CC(C)C(=O)C(C)C',
+        'C12(CCCCC1)CCCCC2',
+        'C(/F)=C/F',
+        '[NH4+].[NH4+].[O-]S(=O)(=O)[S-]',
+        'c1c2c3c4cc1.Br2.Cl3.Cl4',
+        'C%12CCCCC%12',
+        'C=1CCCCC1',
+    ]
+
+    def test_round_trip(self):
+        """Test that a molecule is rebuilt identical from its binary representation"""
+
+        for smi in self.test_smiles:
+            s = smiles.SMILES(smi)
+            data = s.to_bytes()
+            self.assertEqual(len(data), s.to_graph().nbytes())
+
+            ns = smiles.SMILES.from_bytes(data)
+            self.assertEqual(repr(ns), smi)
+            self.assertEqual(ns.next_atom_id, s.next_atom_id)
+            self.assertEqual(sorted(ns.atom_ids), sorted(s.atom_ids))
+
+            for atom_id, atom in s.atom_ids.items():
+                other = ns.get_atom(atom_id)
+                self.assertEqual(atom.symbol, other.symbol)
+                self.assertEqual(atom.atom_id, other.atom_id)
+                self.assertEqual(atom.klass, other.klass)
+                self.assertEqual(len(atom.parent.ring_bonds), len(other.parent.ring_bonds))
+
+                # ring bonds point to the same atoms
+                for rb, nrb in zip(atom.parent.ring_bonds, other.parent.ring_bonds):
+                    self.assertEqual(rb.target.atom.atom_id, nrb.target.atom.atom_id)
+                    self.assertEqual(nrb.parent, other.parent)
+
+        # parents
+        s = smiles.SMILES.from_bytes(smiles.SMILES('CC(=O)C').to_bytes())
+        self.assertIsNone(s.node.parent)
+        self.assertEqual(s.node.right.parent, s.node)
+        self.assertEqual(s.node.right.bond, None)
+        self.assertEqual(s.node.right.left.branches[0].parent, s.node.right.left)
+        self.assertEqual(s.node.right.left.branches[0].bond.parent, s.node.right.left.branches[0])
+        self.assertEqual(s.node.right.left.branches[0].chain.parent, s.node.right.left.branches[0])
+
+        # empty
+        self.assertIsNone(smiles.SMILES.from_bytes(smiles.SMILES('').to_bytes()).node)
+
+    def test_zero_copy(self):
+        """Test that the graph is a view of the buffer"""
+
+        buffer = bytearray(smiles.SMILES('CCO').to_bytes())
+        g = array_graph.ArrayGraph.from_buffer(buffer)
+        self.assertEqual(g.symbols(), ['C', 'C', 'O'])
+
+        buffer[array_graph.HEADER.size + 4 * 3 * 3 + 2 * 3 + 3 * 2 + 2] = array_graph.SYMBOL_CODES['N']
+        self.assertEqual(g.symbols(), ['C', 'C', 'N'])
+
+    def test_batch(self):
+        """Test the batch functions"""
+
+        molecules = [smiles.SMILES(s) for s in self.test_smiles]
+        data = smiles.dumps(molecules)
+        self.assertEqual([repr(s) for s in smiles.loads(data)], self.test_smiles)
+
+    def test_hand_made(self):
+        """Test an AST that was not parsed"""
+
+        s = smiles.SMILES(smiles_ast.Chain(
+            left=smiles_ast.BranchedAtom(atom=smiles_ast.Atom('C', atom_id=5)),
+            right=smiles_ast.Chain(left=smiles_ast.BranchedAtom(atom=smiles_ast.Atom('O'))),
+            bond=smiles_ast.Bond('=')))
+
+        ns = smiles.SMILES.from_bytes(s.to_bytes())
+        self.assertEqual(repr(ns), 'C=O')
+        self.assertEqual(ns.next_atom_id, 6)
+        self.assertEqual(ns.node.right.left.atom.atom_id, -1)
+
+        with self.assertRaises(array_graph.ArrayGraphException):
+            smiles.SMILES(smiles_ast.Chain(left=smiles_ast.BranchedAtom(atom=smiles_ast.Atom('Xx')))).to_bytes()
+
+        # ring bonds: target that is not in the tree, ring id that does not fit
+        outside = smiles_ast.BranchedAtom(atom=smiles_ast.Atom('C'))
+        for ring_bond in (smiles_ast.RingBond(1, target=outside), smiles_ast.RingBond(300)):
+            node = smiles_ast.Chain(left=smiles_ast.BranchedAtom(atom=smiles_ast.Atom('C'), ring_bonds=[ring_bond]))
+            with self.assertRaises(array_graph.ArrayGraphException):
+                array_graph.ArrayGraph.from_ast(node)
@@ -0,0 +1,56 @@
+from tests import OSmiPyTestCase
+
+from osmipy import batch, smiles, generate, smiles_parser
+
+
+class BatchTestCase(OSmiPyTestCase):
+
+    def test_cost(self):
+        """Test the estimation of the cost"""
+
+        self.assertLess(batch.estimate_cost('[Na+]'), batch.estimate_cost('c1ccccc1C(=O)O'))
+        self.assertLess(batch.estimate_cost('CCCCCC'), batch.estimate_cost('C(C)(C)C'))
+        self.assertLess(batch.estimate_cost('C1CC1' * 10), batch.estimate_cost('C%10CC%10' * 10))
+
+    def test_chunks(self):
+        """Test that the chunks contain all the records, longest-first, with a decreasing cost"""
+
+        costs = [batch.estimate_cost(s) for s in generate.Generator(seed=42, max_atoms=100).stream(500)]
+        costs[42] = costs[100] = 1e6  # giants
+
+        chunks = batch.make_chunks(costs, 4)
+        self.assertEqual(sorted(i for c in chunks for i in c), list(range(500)))
+
+        self.assertEqual(chunks[:2], [[42], [100]])  # alone, and first
+        order = [i for c in chunks for i in c]
+        self.assertEqual([costs[i] for i in order], sorted(costs, reverse=True))
+
+        chunk_costs = [sum(costs[i] for i in c) for c in chunks[2:-1]]
+        self.assertGreater(chunk_costs[0], chunk_costs[-1])
+        self.assertGreater(len(chunks), 4 * 4)
+
+    def test_parse(self):
+        """Test the parsing and the metrics"""
+
+        records = list(generate.Generator(seed=42).stream(200))
+        records.append('C' + 'CC(C)' * 1000)  # (needs a higher recursion limit)
+        records[10] = 'C(C'
+
+        with batch.BatchParser(workers=2) as parser:
+            molecules = parser.parse(records)
+
+        self.assertIsNone(molecules[10])
+        self.assertEqual([i for i, _ in parser.errors], [10])
+        self.assertIsInstance(parser.errors[0][1], smiles_parser.ParserException)
+
+        for r, m in zip(records[:10], molecules):
+            self.assertEqual(m.to_bytes(), smiles.SMILES(r).to_bytes())
+
+        self.assertEqual(len(molecules[-1].atom_ids), 3001)
+
+        metrics = parser.metrics.as_dict()
+        self.assertEqual(metrics['records'], len(records))
+        self.assertEqual(sum(w['records'] for w in metrics['workers'].values()), len(records))
+        self.assertEqual(sum(w['chunks'] for w in metrics['workers'].values()), metrics['chunks'])
+        self.assertGreater(metrics['utilization'], 0)
+        self.assertLessEqual(metrics['record_time']['p50'], metrics['record_time_max'])
@@ -0,0 +1,41 @@
+import unittest
+
+from tests import OSmiPyTestCase
+
+from osmipy import batch_lexer, lexer
+
+
+@unittest.skipIf(batch_lexer.numpy is None, 'numpy is not available')
+class BatchLexerTestCase(OSmiPyTestCase):
+
+    def test_batch_tokenize(self):
+        """Test that the batch tokenization gives the same tokens as the lexer"""
+
+        records = [
+            'c1ccccc1Cl', '', 'N[C@](Br)(O)C', '[se]1cccc1', 'C%12CC%12', 'Cas', 'Case', 'ClC', '[NH4+].[Cl-]', 'C']
+
+        batch = batch_lexer.tokenize_records(records)
+        self.assertEqual(len(batch), len(records))
+        self.assertFalse(batch.invalid_records().any())
+
+        for i, smi in enumerate(records):
+            expected = [t for t in lexer.Lexer(smi).tokenize()]
+            tokens = batch.tokens(i)
+            self.assertEqual(len(expected), len(tokens), msg=smi)
+
+            for a, b in zip(expected, tokens):
+                self.assertEqual(a.type, b.type, msg=smi)
+                self.assertEqual(a.value, b.value, msg=smi)
+                self.assertEqual(a.position, b.position, msg=smi)
+
+        self.assertEqual(repr(batch.smiles(0)), records[0])
+
+    def test_invalid(self):
+        """Test that invalid characters are flagged"""
+
+        records = ['CCO', 'C&C', 'Cl', 'Ce', 'Cx', 'CC']
+        batch = batch_lexer.tokenize_records(records)
+        self.assertEqual(batch.invalid_records().tolist(), [False, True, False, False, True, False])
+
+        with self.assertRaises(lexer.LexerException):
+            batch.tokens(1)
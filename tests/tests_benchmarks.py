@@ -0,0 +1,43 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles
+from benchmarks import corpora, bench, memory
+
+
+class BenchmarksTestCase(OSmiPyTestCase):
+
+    def test_corpora(self):
+        """Test that the corpora are deterministic and valid"""
+
+        for name in corpora.CLASSES:
+            if name == 'polymers':  # too deep for the default recursion limit
+                continue
+
+            corpus = corpora.corpus(name, 20)
+            self.assertEqual(corpus, corpora.corpus(name, 20))
+            self.assertNotEqual(corpus, corpora.corpus(name, 20, seed=1))
+
+            for s in corpus:
+                self.assertEqual(repr(smiles.SMILES(s)), s)
+
+    def test_run_and_compare(self):
+        """Test a (small) run and the comparison"""
+
+        results = bench.run(size=2, repeat=1, classes=['small_drugs'], benchmarks=['parser.smiles'])
+        self.assertIn('parser.smiles/small_drugs', results['results'])
+
+        slower = {'results': {'parser.smiles/small_drugs': {'time': results['results'][
+            'parser.smiles/small_drugs']['time'] * 2}}}
+
+        comparison = bench.compare(results, slower)
+        self.assertEqual(len(comparison), 1)
+        self.assertTrue(comparison[0][4])
+        self.assertFalse(bench.compare(slower, results)[0][4])
+
+    def test_memory(self):
+        """Test the memory measurement"""
+
+        r = memory.measure(corpora.corpus('small_drugs', 20))
+        self.assertEqual(r['molecules'], 20)
+        self.assertGreater(r['ast_bytes'], r['library_bytes'])
+        self.assertGreater(r['shared_nodes'], 0)
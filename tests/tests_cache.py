@@ -0,0 +1,117 @@
+import concurrent.futures
+import os
+import time
+
+from tests import OSmiPyTestCase
+
+from osmipy import cache, generate, lexer, smiles, smiles_parser
+
+
+def _parse_in_worker(path, records):
+    with cache.ParseCache(path) as c:
+        errors = []
+        molecules = c.parse_many(records, errors=errors)
+        return [repr(m) for m in molecules if m is not None], len(errors), c.hits
+
+
+class CacheTestCase(OSmiPyTestCase):
+
+    def setUp(self):
+        self.path = os.path.join(self.temporary_directory, 'parse.cache')
+        self.records = list(generate.Generator(seed=42).stream(100))
+
+    def test_parse(self):
+        """Test that the molecules and the errors are the same as without the cache"""
+
+        records = self.records + ['C(C', 'CX', 'C)']
+
+        for run in range(2):
+            with cache.ParseCache(self.path) as c:
+                errors = []
+                molecules = c.parse_many(records, errors=errors)
+
+                self.assertEqual([repr(m) for m in molecules[:-3]], [repr(smiles.SMILES(r)) for r in self.records])
+                self.assertEqual(molecules[-3:], [None] * 3)
+                self.assertEqual([i for i, _ in errors], [100, 101, 102])
+
+                for i, e in errors:
+                    with self.assertRaises(type(e)) as ctx:
+                        smiles.SMILES(records[i])
+                    self.assertEqual(str(e), str(ctx.exception))
+
+                self.assertEqual((c.hits, c.misses), (0, 103) if run == 0 else (103, 0))
+
+                graphs = c.parse_many(self.records[:10], graphs=True)
+                self.assertEqual(
+                    [repr(smiles.SMILES.from_graph(g)) for g in graphs], [repr(m) for m in molecules[:10]])
+
+        with cache.ParseCache(self.path) as c:
+            self.assertEqual(len(c), 103)
+            self.assertEqual(repr(c.parse('CCO')), 'CCO')
+            self.assertEqual(repr(c.parse('CCO')), 'CCO')  # (from the pending entries)
+
+            with self.assertRaises(lexer.LexerException):
+                c.parse('CX')
+            with self.assertRaises(smiles_parser.ParserException):
+                c.parse('C(C')
+
+    def test_version(self):
+        """Test that the entries of another version are removed"""
+
+        with cache.ParseCache(self.path) as c:
+            c.parse_many(self.records)
+
+        with cache.ParseCache(self.path) as c:
+            self.assertEqual(len(c), 100)
+
+        with cache.ParseCache(self.path, version='other') as c:
+            self.assertEqual(len(c), 0)
+
+    def test_evict(self):
+        """Test the eviction of the least recently used and of the old entries"""
+
+        with cache.ParseCache(self.path) as c:
+            c.parse_many(self.records[:50])
+            c.flush()
+            time.sleep(.01)
+            c.parse_many(self.records[50:])
+            c.flush()
+            time.sleep(.01)
+            c.parse_many(self.records[:10])  # used again
+
+        with cache.ParseCache(self.path, max_entries=60) as c:
+            self.assertEqual(c.evict(), 40)
+            self.assertEqual(len(c), 60)
+            c.parse_many(self.records[:10] + self.records[50:])
+            self.assertEqual(c.misses, 0)
+
+        with cache.ParseCache(self.path) as c:
+            c.parse_many(self.records[:50])
+            c.flush()
+            time.sleep(.01)
+            last = dict((r, len(m.to_bytes())) for r, m in zip(self.records[-5:], c.parse_many(self.records[-5:])))
+
+        with cache.ParseCache(self.path, max_bytes=sum(last.values())) as c:
+            c.evict()
+            self.assertEqual(len(c), len(last))
+            c.parse_many(self.records[-5:])
+            self.assertEqual(c.misses, 0)
+
+        with cache.ParseCache(self.path, max_age=0) as c:
+            c.evict()
+            self.assertEqual(len(c), 0)
+
+    def test_concurrent(self):
+        """Test the use of the cache by several processes"""
+
+        records = self.records + ['C(C']
+        expected = [repr(smiles.SMILES(r)) for r in self.records]
+
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            futures = [executor.submit(_parse_in_worker, self.path, records) for _ in range(4)]
+            for future in futures:
+                molecules, errors, _ = future.result()
+                self.assertEqual(molecules, expected)
+                self.assertEqual(errors, 1)
+
+        self.assertEqual(_parse_in_worker(self.path, records)[2], 101)
@@ -0,0 +1,125 @@
+import os
+
+from tests import OSmiPyTestCase
+
+from osmipy import dedup, smiles, smiles_parser
+
+
+class DedupTestCase(OSmiPyTestCase):
+
+    def write(self, name, lines):
+        path = os.path.join(self.temporary_directory, name)
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def read(self, path):
+        with open(path) as f:
+            return [line.rstrip('\n').split('\t') for line in f]
+
+    def test_canonical_key(self):
+        """Test that the canonical key does not depend on the spelling"""
+
+        texts = [
+            'c1ccccc1C(=O)O', 'N[C@@H](C)C(=O)O', 'C1CC2CCC1CC2', 'F/C=C/F', 'C/1=C/CCCCCC1', 'OC(=O)/C=C/c1ccccc1']
+        for text in texts:
+            key = dedup.canonical_key(smiles.SMILES(text))
+            for other in smiles.SMILES(text).randomized(10, seed=42):
+                self.assertEqual(dedup.canonical_key(smiles.SMILES(other)), key, msg=(text, other))
+
+        key = dedup.canonical_key
+        self.assertEqual(key(smiles.SMILES('C-C=C')), key(smiles.SMILES('C=CC')))
+        self.assertEqual(key(smiles.SMILES('c1:c:c:c:c:c:1')), key(smiles.SMILES('c1ccccc1')))
+
+        self.assertNotEqual(key(smiles.SMILES('CCCC')), key(smiles.SMILES('CC(C)C')))
+        self.assertNotEqual(key(smiles.SMILES('N[C@@H](C)C(=O)O')), key(smiles.SMILES('N[C@H](C)C(=O)O')))
+        self.assertEqual(key(smiles.SMILES('N[C@@H](C)C(=O)O')), key(smiles.SMILES('C[C@H](N)C(=O)O')))
+        self.assertEqual(key(smiles.SMILES('C[C@H](C)O')), key(smiles.SMILES('C[C@@H](C)O')))  # (not stereogenic)
+
+        # configuration of the double bonds
+        self.assertEqual(key(smiles.SMILES('C/C=C/C')), key(smiles.SMILES('C\\C=C\\C')))
+        self.assertEqual(key(smiles.SMILES('C/C=C/C')), key(smiles.SMILES('C(\\C)=C/C')))
+        self.assertNotEqual(key(smiles.SMILES('F/C=C/F')), key(smiles.SMILES('F/C=C\\F')))
+        self.assertNotEqual(key(smiles.SMILES('F/C=C/F')), key(smiles.SMILES('FC=CF')))
+        self.assertEqual(key(smiles.SMILES('C/C(C)=C/C')), key(smiles.SMILES('CC(C)=CC')))  # (not stereogenic)
+
+    def test_bloom_filter(self):
+        """Test the Bloom filter"""
+
+        digests = [dedup._digest(str(i)) for i in range(1000)]
+        f1, f2 = dedup.BloomFilter(1 << 16, 4), dedup.BloomFilter(1 << 16, 4)
+
+        self.assertFalse(any(f1.add(d) for d in digests[:600]))  # (false positives are unlikely)
+        self.assertTrue(all(f1.add(d) for d in digests[:600]))
+        for d in digests[400:]:
+            f2.add(d)
+
+        union, intersection = f1.union(f2), f1.intersection(f2)
+        self.assertTrue(all(d in union for d in digests))
+        self.assertTrue(all(d in intersection for d in digests[400:600]))
+        self.assertLess(sum(1 for d in digests[:400] + digests[600:] if d in intersection), 10)
+
+    def test_split_ranges(self):
+        """Test that the ranges start at the beginning of a line"""
+
+        path = self.write('a.smi', ['C' * (i % 17 + 1) for i in range(100)])
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        for n in (1, 3, 7, 200):
+            ranges = dedup.split_ranges(path, n)
+            self.assertLessEqual(len(ranges), n)
+            self.assertEqual(b''.join(content[s:e] for s, e in ranges), content)
+            self.assertTrue(all(s == 0 or content[s - 1:s] == b'\n' for s, _ in ranges))
+
+    def test_deduplicate(self):
+        """Test the deduplication, with first-seen names and line numbers"""
+
+        path1 = self.write('a.smi', [
+            'CCO ethanol',
+            '',
+            'OCC other name',
+            'C(C invalid',
+            'c1ccccc1O\tphenol',
+            'c1ccccc1O',
+        ])
+
+        path2 = self.write('b.smi', [
+            'C(O)C',
+            'N[C@@H](C)C(=O)O alanine',
+            'C[C@H](N)C(=O)O',
+            'CCO',
+            'C)',
+        ])
+
+        output = os.path.join(self.temporary_directory, 'out.smi')
+
+        for workers in (1, 2):
+            for bloom in (False, True):
+                stats = dedup.deduplicate(
+                    [path1, path2], output, partitions=3, key='interpreter', bloom=bloom, workers=workers)
+
+                self.assertEqual(self.read(output), [
+                    ['CCO', '1', 'ethanol'],
+                    ['OCC', '3', 'other name'],
+                    ['c1ccccc1O', '5', 'phenol'],
+                    ['C(O)C', '7'],
+                    ['N[C@@H](C)C(=O)O', '8', 'alanine'],
+                    ['C[C@H](N)C(=O)O', '9'],
+                ])
+
+                self.assertEqual(stats['records'], 10)
+                self.assertEqual(stats['unique'], 6)
+                self.assertEqual([(p, n) for p, n, _ in stats['invalid']], [(path1, 4), (path2, 5)])
+                self.assertIsInstance(stats['invalid'][0][2], smiles_parser.ParserException)
+
+                stats = dedup.deduplicate(
+                    [path1, path2], output, partitions=3, key='canonical', bloom=bloom, workers=workers)
+
+                self.assertEqual(self.read(output), [
+                    ['CCO', '1', 'ethanol'],
+                    ['c1ccccc1O', '5', 'phenol'],
+                    ['N[C@@H](C)C(=O)O', '8', 'alanine'],
+                ])
+
+                self.assertEqual(stats['unique'], 3)
@@ -0,0 +1,73 @@
+import os
+import unittest
+
+from tests import OSmiPyTestCase
+
+from osmipy import export, smiles, store, generate
+
+
+@unittest.skipIf(export.numpy is None, 'numpy is not available')
+class ExportTestCase(OSmiPyTestCase):
+
+    def test_tables(self):
+        """Test the tables of atoms and bonds"""
+
+        molecules = [smiles.SMILES(s) for s in ['[13CH3-:2]C(=O)O', 'c1cc[nH]c1', '[Na+].[Cl-]', 'C=1CC1', 'C1CC=1']]
+        atoms, bonds = export.tables(molecules)
+
+        self.assertEqual(atoms['molecule'].tolist(), [0] * 4 + [1] * 5 + [2] * 2 + [3] * 3 + [4] * 3)
+        self.assertEqual(atoms['atom_id'].tolist(), [0, 1, 2, 3, 0, 1, 2, 3, 4, 0, 1, 0, 1, 2, 0, 1, 2])
+        self.assertEqual(
+            [export.SYMBOLS[s] for s in atoms['symbol'][:9]], ['C', 'C', 'O', 'O', 'c', 'c', 'c', 'n', 'c'])
+        self.assertEqual(atoms[0].tolist(), (0, 0, atoms['symbol'][0], 13, -1, 3, 2))
+        self.assertEqual(atoms['charge'][9:11].tolist(), [1, -1])
+        self.assertEqual(atoms['hcount'][7], 1)
+
+        self.assertEqual([tuple(b) for b in bonds.tolist()], [
+            (0, 0, 1, 1., False), (0, 1, 2, 2., False), (0, 1, 3, 1., False),
+            (1, 0, 1, 1.5, False), (1, 1, 2, 1.5, False), (1, 2, 3, 1.5, False), (1, 3, 4, 1.5, False),
+            (1, 0, 4, 1.5, True),
+            (3, 0, 1, 1., False), (3, 1, 2, 1., False), (3, 0, 2, 2., True),  # (no bond in 2)
+            (4, 0, 1, 1., False), (4, 1, 2, 1., False), (4, 0, 2, 2., True),
+        ])
+
+    def test_inputs(self):
+        """Test that the buffers, the graphs and the stores give the same tables"""
+
+        molecules = [smiles.SMILES(s) for s in generate.Generator(seed=42).stream(200)]
+        atoms, bonds = export.tables(molecules)
+
+        self.assertEqual(len(atoms), sum(len(m.atom_ids) for m in molecules))
+        self.assertEqual(
+            len(bonds), sum(sum(len(n) for n in m.adjacency().neighbours) // 2 for m in molecules))
+
+        path = os.path.join(self.temporary_directory, 'test.osms')
+        with store.StoreWriter(path) as w:
+            for m in molecules:
+                w.write(m)
+
+        with store.MoleculeStore(path) as s:
+            others = [
+                export.tables(smiles.dumps(molecules)),
+                export.tables(m.to_graph() for m in molecules),
+                export.tables(s)
+            ]
+
+        for other_atoms, other_bonds in others:
+            self.assertTrue((other_atoms == atoms).all())
+            self.assertTrue((other_bonds == bonds).all())
+
+        atoms, bonds = export.tables([])
+        self.assertEqual((len(atoms), len(bonds)), (0, 0))
+
+    @unittest.skipIf(export.pyarrow is None, 'pyarrow is not available')
+    def test_parquet(self):
+        """Test the Parquet files"""
+
+        atoms, bonds = export.tables([smiles.SMILES('c1ccccc1C(=O)O')])
+        prefix = os.path.join(self.temporary_directory, 'test')
+        export.write_parquet(prefix, atoms, bonds)
+
+        table = export.pyarrow.parquet.read_table(prefix + '.bonds.parquet')
+        self.assertEqual(table.column_names, list(bonds.dtype.names))
+        self.assertEqual(table.column('order').to_pylist(), bonds['order'].tolist())
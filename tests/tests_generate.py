@@ -0,0 +1,63 @@
+from tests import OSmiPyTestCase
+
+from osmipy import generate, smiles
+
+
+class GenerateTestCase(OSmiPyTestCase):
+
+    def test_deterministic(self):
+        """Test that the same seed gives the same SMILES"""
+
+        self.assertEqual(
+            list(generate.Generator(seed=42).stream(50)), list(generate.Generator(seed=42).stream(50)))
+
+        self.assertNotEqual(
+            list(generate.Generator(seed=42).stream(50)), list(generate.Generator(seed=43).stream(50)))
+
+    def test_valid(self):
+        """Test that the generated SMILES are valid and written back identically"""
+
+        generators = [
+            generate.Generator(seed=1),
+            generate.Generator(seed=2, min_atoms=1, max_atoms=5, ring_density=0., dot_probability=.5),
+            generate.Generator(
+                seed=3, ring_density=.5, percent_fraction=.5, bracket_fraction=.5, bond_probability=.5, max_depth=5),
+            generate.Generator(seed=4, min_atoms=40, max_atoms=60, ring_density=1.),
+        ]
+
+        has_percent = False
+
+        for g in generators:
+            for s in g.stream(300):
+                has_percent |= '%' in s
+                self.assertEqual(repr(smiles.SMILES(s)), s)
+
+        self.assertTrue(has_percent)
+
+        # sizes
+        g = generate.Generator(seed=5, min_atoms=10, max_atoms=12)
+        for _ in range(50):
+            self.assertTrue(10 <= len(smiles.SMILES(g.smiles()).atom_ids) <= 12)
+
+    def test_invalid(self):
+        """Test that each mutation raises the expected exception"""
+
+        g = generate.Generator(seed=42)
+
+        for kind in generate.MUTATIONS:
+            for _ in range(20):
+                s, k, exception = g.invalid(kind)
+                self.assertEqual(k, kind)
+
+                with self.assertRaises(exception, msg=s):
+                    smiles.SMILES(s)
+
+        kinds = set()
+        for _ in range(200):
+            s, kind, exception = g.invalid()
+            kinds.add(kind)
+
+            with self.assertRaises(exception, msg=s):
+                smiles.SMILES(s)
+
+        self.assertEqual(kinds, set(generate.MUTATIONS))
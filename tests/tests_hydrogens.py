@@ -0,0 +1,96 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, hydrogens, generate
+
+
+class HydrogensTestCase(OSmiPyTestCase):
+
+    def test_implicit_hydrogens(self):
+        """Test the number of hydrogens that are not written as atoms"""
+
+        tests = [
+            ('C', [4]),
+            ('CC(=O)O', [3, 0, 0, 1]),
+            ('C#N', [1, 0]),
+            ('c1ccccc1', [1] * 6),
+            ('c1cc[nH]c1', [1, 1, 1, 1, 1]),
+            ('[CH2]C', [2, 3]),
+            ('[Na+].[Cl-]', [0, 0]),
+            ('[H]C', [0, 3]),
+            ('CS(=O)(=O)C', [3, 0, 0, 0, 3]),
+            ('[C]', [4]),  # (the brackets are not recorded, see the module documentation)
+        ]
+
+        for text, expected in tests:
+            self.assertEqual(hydrogens.implicit_hydrogens(smiles.SMILES(text).to_graph()), expected, msg=text)
+
+    def test_add_hydrogens(self):
+        """Test that the hydrogens are written as atoms"""
+
+        tests = [
+            ('C', 'C([H])([H])([H])([H])'),
+            ('CO', 'C([H])([H])([H])O([H])'),
+            ('C[C@@H](O)N', 'C([H])([H])([H])[C@@]([H])(O([H]))N([H])([H])'),
+            ('F[C@H](Cl)Br', 'F[C@]([H])(Cl)Br'),
+            ('[C@@H](F)(Cl)Br', '[C@@]([H])(F)(Cl)Br'),
+            ('[C@@H]1(F)CC1', '[C@]1([H])(F)C([H])([H])C1([H])([H])'),  # (the hydrogen now comes after the ring bond)
+            ('c1cc[nH]c1', 'c1([H])c([H])c([H])[nH]c1([H])'),
+            ('[CH2]C', '[CH2]C([H])([H])([H])'),  # (would get 3 implicit hydrogens)
+            ('[NH4+]', '[N+]([H])([H])([H])([H])'),
+            ('[2H]C', '[2H]C([H])([H])([H])'),
+            ('[Na+].[Cl-]', '[Na+].[Cl-]'),
+        ]
+
+        for text, expected in tests:
+            s = smiles.SMILES(text).add_hydrogens()
+            self.assertEqual(repr(s), expected, msg=text)
+            self.assertEqual(sorted(s.atom_ids.keys()), list(range(len(s.atom_ids))), msg=text)
+
+            # the same molecule is obtained when the string is parsed
+            self.assertEqual(repr(smiles.SMILES(expected)), expected)
+
+    def test_remove_hydrogens(self):
+        """Test that the hydrogens are implicit, when possible"""
+
+        tests = [
+            ('[H]C([H])([H])[H]', 'C'),
+            ('[H]C', 'C'),
+            ('[H]OC([H])=O', 'OC=O'),
+            ('F[C@]([H])(Cl)Br', 'F[C@H](Cl)Br'),
+            ('[C@]1([H])(F)CC1', '[C@@H]1(F)CC1'),
+            ('[H][C@](F)(Cl)Br', '[C@H](F)(Cl)Br'),
+            ('CC[H]', 'CC'),
+            ('[H]c1ccccc1', 'c1ccccc1'),
+            ('[H]N1CC1', 'N1CC1'),
+            ('C([2H])[H]', 'C([2H])'),
+            ('[H][H]', '[H][H]'),
+            ('[H+].[H-]', '[H+].[H-]'),
+            ('[H]/C=C/[H]', '[H]/C=C/[H]'),
+            ('[H]1CC1', '[H]1CC1'),
+            ('C[H:1]', 'C[H:1]'),
+            ('[H]C([H])([H])[CH2][H]', 'CC'),
+            ('[H]C([H])([H])[CH][H]', 'C[CH2]'),
+        ]
+
+        for text, expected in tests:
+            s = smiles.SMILES(text).remove_hydrogens()
+            self.assertEqual(repr(s), expected, msg=text)
+            self.assertEqual(sorted(s.atom_ids.keys()), list(range(len(s.atom_ids))), msg=text)
+
+    def test_round_trip(self):
+        """Test that adding then removing the hydrogens gives back the molecule"""
+
+        for text in generate.Generator(seed=7).stream(300):
+            s = smiles.SMILES(text)
+            a = s.add_hydrogens()
+
+            added = len([x for x in a.to_graph().symbol if x == hydrogens.H]) - \
+                len([x for x in s.to_graph().symbol if x == hydrogens.H])
+            self.assertEqual(
+                sum(hydrogens.implicit_hydrogens(a.to_graph())),
+                sum(hydrogens.implicit_hydrogens(s.to_graph())) - added, msg=text)
+
+            self.assertEqual(repr(a.add_hydrogens()), repr(a), msg=text)
+
+            r = a.remove_hydrogens()
+            self.assertEqual(repr(r.add_hydrogens().remove_hydrogens()), repr(r), msg=text)
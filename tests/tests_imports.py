@@ -0,0 +1,24 @@
+import os
+import pkgutil
+import subprocess
+import sys
+
+from tests import OSmiPyTestCase
+
+import osmipy
+
+
+class ImportsTestCase(OSmiPyTestCase):
+
+    def test_import(self):
+        """Test that each module can be imported first (in a fresh interpreter), so that there is no import cycle"""
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(osmipy.__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+
+        for module in pkgutil.iter_modules(osmipy.__path__):
+            name = 'osmipy.{}'.format(module.name)
+            process = subprocess.run(
+                [sys.executable, '-c', 'import {}'.format(name)], env=env, cwd=self.temporary_directory,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            self.assertEqual(process.returncode, 0, msg='{}: {}'.format(name, process.stderr))
@@ -0,0 +1,114 @@
+import random
+
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, incremental, generate, lexer, smiles_parser
+
+
+class IncrementalTestCase(OSmiPyTestCase):
+
+    def assertSameAsFullParse(self, s, text):
+        full = smiles.SMILES(text)
+
+        self.assertEqual(repr(s), repr(full))
+        self.assertEqual(s.to_bytes(), full.to_bytes())
+        self.assertEqual([a.atom_id for a in s], list(range(len(full.atom_ids))))
+        self.assertEqual(sorted(s.source.rings), sorted(incremental.parse(text).source.rings))
+
+        for start, end, branch in s.source.spans:
+            self.assertEqual(text[start], '(')
+            self.assertEqual(text[end - 1], ')')
+            self.assertIs(branch.parent.branches[branch.parent.branches.index(branch)], branch)
+
+    def test_reparse(self):
+        """Test that only the branch is parsed again"""
+
+        text = 'CC(C)(C)C(=O)Nc1ccccc1'
+        s = incremental.parse(text)
+        tree, last_atom = s.node, s.get_atom(len(s.atom_ids) - 1)
+
+        # "C" -> "CO" in the first branch
+        new_text = 'CC(CO)(C)C(=O)Nc1ccccc1'
+        n = incremental.reparse(s, new_text, 3, 5)
+        self.assertSameAsFullParse(n, new_text)
+
+        self.assertIs(n.node, tree)  # reused
+        self.assertIs(n.get_atom(len(n.atom_ids) - 1), last_atom)
+        self.assertEqual(last_atom.atom_id, 13)
+        self.assertIsNone(s.node)  # ... and taken from the previous molecule
+
+        # a branch in the branch
+        new_text_2 = 'CC(C(N)O)(C)C(=O)Nc1ccccc1'
+        n2 = incremental.reparse(n, new_text_2, 4, 7)
+        self.assertSameAsFullParse(n2, new_text_2)
+        self.assertIs(n2.node, tree)
+
+        # edit in the main chain: full parse
+        new_text_3 = 'CC(C(N)O)(C)C(=O)Oc1ccccc1'
+        n3 = incremental.reparse(n2, new_text_3, 17, 18)
+        self.assertSameAsFullParse(n3, new_text_3)
+        self.assertIsNot(n3.node, tree)
+
+        # not from this module: full parse
+        n4 = incremental.reparse(smiles.SMILES(text), new_text, 3, 5)
+        self.assertSameAsFullParse(n4, new_text)
+
+    def test_ring_closures(self):
+        """Test the edits of branches with ring closures"""
+
+        # ring inside the branch
+        n = incremental.reparse(incremental.parse('CC(C1CC1)C'), 'CC(C1CCC1)C', 5, 6)
+        self.assertSameAsFullParse(n, 'CC(C1CCC1)C')
+
+        # ring that closes outside of the branch: the whole molecule is parsed
+        n = incremental.reparse(incremental.parse('C1CC(CC1)C'), 'C1CC(CCC1)C', 5, 6)
+        self.assertSameAsFullParse(n, 'C1CC(CCC1)C')
+
+        # ... but the branch around can be used
+        n = incremental.reparse(incremental.parse('CC(C1CC(CC1)C)O'), 'CC(C1CC(CCC1)C)O', 8, 9)
+        self.assertSameAsFullParse(n, 'CC(C1CC(CCC1)C)O')
+
+        # ring id that is open around the branch
+        n = incremental.reparse(incremental.parse('C1CC(CC)CC1'), 'C1CC(CC1CC1)CC1', 7, 11)
+        self.assertSameAsFullParse(n, 'C1CC(CC1CC1)CC1')
+
+    def test_errors(self):
+        """Test that invalid edits give the same error as a full parse"""
+
+        for text, new_text, start, end, exception in [
+            ('CC(CC)C', 'CC(C%C)C', 4, 5, smiles_parser.ParserException),
+            ('CC(CC)C', 'CC(C!)C', 4, 5, lexer.LexerException),
+            ('CC(CC)C', 'CC(C1C)C', 4, 5, smiles_parser.ParserException),
+            ('CC(CC)C', 'CC(C)C)C', 4, 5, smiles_parser.ParserException),
+        ]:
+            with self.assertRaises(exception) as e:
+                incremental.reparse(incremental.parse(text), new_text, start, end)
+
+            with self.assertRaises(exception) as e_full:
+                smiles.SMILES(new_text)
+
+            self.assertEqual(str(e.exception), str(e_full.exception))
+
+    def test_random_edits(self):
+        """Test that random edits give the same result as a full parse"""
+
+        g = generate.Generator(seed=42, max_atoms=50, branch_probability=.3, ring_density=.15)
+        rng = random.Random(42)
+        pieces = ['C', 'O', 'N', '(C)', '(=O)', '(CC1CC1)', 'c1ccccc1', '[NH3+]']
+
+        for text in g.stream(100):
+            s = incremental.parse(text)
+
+            for _ in range(5):
+                i = rng.randrange(len(text))
+                piece = rng.choice(pieces)
+                new_text = text[:i] + piece + text[i + 1:]
+
+                try:
+                    smiles.SMILES(new_text)
+                except (lexer.LexerException, smiles_parser.ParserException):
+                    continue
+
+                s = incremental.reparse(s, new_text, i, i + len(piece))
+                self.assertSameAsFullParse(s, new_text)
+                text = new_text
@@ -0,0 +1,76 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, interning, generate
+
+
+class InterningTestCase(OSmiPyTestCase):
+
+    def test_library(self):
+        """Test that the molecules are given back"""
+
+        strings = ['c1ccccc1C(=O)O', 'c1ccncc1C(=O)O.[Na+]', 'CC(C)(C)C(=O)O', 'N[C@](Br)(O)C', 'C12C3C4C1C5C2C3C45']
+        strings.extend(generate.Generator(seed=42, ring_density=.3).stream(100))
+
+        library = interning.Library()
+        for s in strings:
+            library.add(smiles.SMILES(s))
+
+        self.assertEqual(len(library), len(strings))
+
+        for s, m in zip(strings, library):
+            self.assertEqual(repr(m), s)
+            self.assertEqual(m.to_bytes(), smiles.SMILES(s).to_bytes())
+
+    def test_shared(self):
+        """Test that identical subtrees are shared, and compared in O(1)"""
+
+        library = interning.Library()
+        library.add(smiles.SMILES('c1ccccc1C(=O)O'))
+        library.add(smiles.SMILES('c1ccncc1C(=O)O'))
+        library.add(smiles.SMILES('C(=O)O'))
+        library.add(smiles.SMILES('OC(=O)O'))
+
+        a, b, c, d = library.roots
+        tail_a = a.right.right.right.right.right.right
+        tail_b = b.right.right.right.right.right.right
+
+        self.assertTrue(tail_a.interned)
+        self.assertIs(tail_a, tail_b)
+        self.assertIs(tail_a, c)
+        self.assertIs(tail_a, d.right)
+        self.assertIs(tail_a.branches[0][1], tail_a.right)  # the same "O"
+
+        # rings are specific to each molecule
+        self.assertFalse(a.interned)
+        self.assertNotEqual(a, b)
+        self.assertEqual(a, library.intern(smiles.SMILES('c1ccccc1C(=O)O').to_graph()))
+        self.assertIsNot(a, library.intern(smiles.SMILES('c1ccccc1C(=O)O').to_graph()))
+
+        self.assertEqual(library.number_of_nodes(), 3)  # O, C(=O)O and OC(=O)O
+
+    def test_atom_ids(self):
+        """Test the atom ids overlay"""
+
+        library = interning.Library()
+        a = smiles.SMILES('CCO')
+        b = a + smiles.SMILES('[Na+]')
+
+        g = smiles.SMILES('OCC').to_graph()
+        g.atom_id[0], g.atom_id[2] = 2, 0
+        c = smiles.SMILES.from_graph(g)
+
+        for m in [a, b, c]:
+            library.add(m)
+
+        self.assertIsNone(library.atom_ids[0])
+        self.assertEqual(list(library.atom_ids[2]), [2, 1, 0])
+
+        for i, m in enumerate([a, b, c]):
+            n = library[i]
+            self.assertEqual(n.next_atom_id, m.next_atom_id)
+            self.assertEqual(
+                dict((i, a.symbol) for i, a in n.atom_ids.items()), dict((i, a.symbol) for i, a in m.atom_ids.items()))
+
+        # the shared "O" has different atom ids in "CCO" and "OCC"
+        self.assertEqual(library[0].get_atom(2).symbol, 'O')
+        self.assertEqual(library[2].get_atom(2).symbol, 'O')
@@ -49,3 +49,20 @@ class LexerTestCase(OSmiPyTestCase):
                 self.assertEqual(token.value, lexed[i].value, msg='{} of {}'.format(i, s))
 
             self.assertEqual(lexed[-1].type, smiles.EOF)
+
+    def test_bytes_lexer(self):
+        """Test that the lexer on a buffer gives the same tokens as the string one"""
+
+        buffer = b'xxN[C@](Br)(O)C%12 CC\nC'
+
+        lexed = [i for i in lexer.BytesLexer(memoryview(buffer), 2, 21).tokenize()]
+        expected = [i for i in lexer.Lexer('N[C@](Br)(O)C%12 CC').tokenize()]
+
+        self.assertEqual(len(lexed), len(expected))
+        for i, token in enumerate(expected):
+            self.assertEqual(token.type, lexed[i].type)
+            self.assertEqual(token.value, lexed[i].value)
+            self.assertEqual(token.position, lexed[i].position)
+
+        with self.assertRaises(lexer.LexerException):
+            [i for i in lexer.BytesLexer(b'CC&C').tokenize()]
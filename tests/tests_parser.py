@@ -117,12 +117,22 @@ class ParserTestCase(OSmiPyTestCase):
             'C12C2CCC1',  # "2" forms a direct pair
             'C-1CCCCC=1',  # not the same kind of bond
             'C12CCCCC1',  # unmatched "2"
+            'C.1CCC1',  # ring bond after a DOT
         ]
 
         for s in wrong_smiles:
             with self.assertRaises(smiles_parser.ParserException, msg=s):
                 smiles_parser.Parser(lexer.Lexer(s)).smiles()
 
+        # a ring bond with a bond, followed by one without, and a chain that continues with a wildcard
+        for s in ['C=12CCCC2C1', 'C=1CCC1*', 'C1CC*1.*']:
+            smiles_parser.Parser(lexer.Lexer(s)).smiles()
+
+        # atoms that follow each other through a dot are not a direct pair
+        parser = smiles_parser.Parser(lexer.Lexer('F/C=C/1.F1'))
+        parser.smiles()
+        self.assertEqual(parser.components, [0, 0, 0, 0])
+
     def test_hcount(self):
         """Test the specific case of hcount
         """
@@ -0,0 +1,68 @@
+import threading
+
+import osmipy
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, smiles_parser, lexer, profiling, smiles_ast
+
+
+class ProfilingTestCase(OSmiPyTestCase):
+
+    def test_profile(self):
+        """Test that the stages, counters and errors are recorded"""
+
+        exported = []
+
+        with osmipy.profile(hook=exported.append) as stats:
+            smiles.SMILES('c1ccccc1')
+            smiles.SMILES('C1CC1.C(=O)O')
+            smiles.SMILES(smiles_ast.Chain(left=smiles_ast.BranchedAtom(atom=smiles_ast.Atom('C'))))
+
+            for wrong in ['C1CC', 'C&C']:
+                with self.assertRaises((smiles_parser.ParserException, lexer.LexerException)):
+                    smiles.SMILES(wrong)
+
+        self.assertIsNone(profiling.active())
+        self.assertEqual(len(exported), 1)
+
+        r = exported[0]
+        self.assertEqual(r, stats.as_dict())
+
+        for stage in [
+                'lexer.tokenize', 'parser.chain', 'parser.consolidate_ring_bonds', 'parser.final_checks',
+                'validator.atom_ids']:
+            self.assertIn(stage, r['stages'])
+            self.assertGreaterEqual(r['stages'][stage]['time'], r['stages'][stage]['self_time'])
+
+        self.assertEqual(r['stages']['validator.atom_ids']['calls'], 1)
+        self.assertEqual(r['counters']['molecules'], 4)
+        self.assertEqual(r['counters']['atoms'], 6 + 6)
+        self.assertEqual(r['counters']['ring_closures'], 2)
+        self.assertEqual(r['errors'], {'ParserException': 1, 'LexerException': 1})
+
+        # not active anymore
+        smiles.SMILES('CCO')
+        self.assertEqual(stats.counters['molecules'], 4)
+
+    def test_threads(self):
+        """Test that each thread records into its own block"""
+
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def run(n):
+            with osmipy.profile() as stats:
+                barrier.wait()
+                for _ in range(n):
+                    smiles.SMILES('CCO')
+                barrier.wait()
+            results[n] = stats.counters['molecules']
+
+        threads = [threading.Thread(target=run, args=(n, )) for n in (3, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {3: 3, 5: 5})
+        self.assertIsNone(profiling.active())
@@ -0,0 +1,98 @@
+from tests import OSmiPyTestCase
+
+from osmipy import salts, smiles, smiles_parser
+
+
+class SaltsTestCase(OSmiPyTestCase):
+
+    def test_components(self):
+        """Test the components found without parsing"""
+
+        tests = [
+            ('CC(=O)[O-].[Na+]', [('CC(=O)[O-]', 4, 2), ('[Na+]', 1, 0)]),
+            ('[NH4+].[Cl-]', [('[NH4+]', 1, 0), ('[Cl-]', 1, 0)]),
+            ('c1ccccc1', [('c1ccccc1', 6, 6)]),
+            ('[2H]C([H])Cl.Br', [('[2H]C([H])Cl', 2, 1), ('Br', 1, 0)]),
+            # ring bonds between pieces
+            ('c1c2c3c4cc1.Br2.Cl3.Cl4', [('c1c2c3c4cc1.Br2.Cl3.Cl4', 9, 6)]),
+            ('C1.C.C1', [('C1.C1', 2, 2), ('C', 1, 1)]),
+            ('C1CC1.C%12.C%12', [('C1CC1', 3, 3), ('C%12.C%12', 2, 2)]),
+            # dots in a branch
+            ('CC(.O)C.N', [('CC(.O)C', 4, 3), ('N', 1, 0)]),
+        ]
+
+        for text, expected in tests:
+            self.assertEqual([(c.text, c.atoms, c.carbons) for c in salts.components(text)], expected, msg=text)
+
+    def test_normalize(self):
+        """Test the normalized text of the salts"""
+
+        self.assertEqual(salts.normalize('[Na+1]'), '[Na+]')
+        self.assertEqual(salts.normalize('[O-1]C'), '[O-]C')
+        self.assertEqual(salts.normalize('[Mg+2]'), '[Mg+2]')
+        self.assertEqual(salts.normalize('[Fe+12]'), '[Fe+12]')
+
+    def test_strip(self):
+        """Test the component that is kept"""
+
+        tests = [
+            ('CC(=O)[O-].[Na+]', 'CC(=O)[O-]'),
+            ('[Na+1].CC(=O)[O-]', 'CC(=O)[O-]'),
+            ('[NH4+].[Cl-]', '[NH4+]'),
+            ('CN.Cl', 'CN'),
+            ('OC(=O)C(F)(F)F.CN', 'CN'),
+            ('O.[Pt]', '[Pt]'),
+            ('CCO.CC', 'CC'),  # (the solvent is not kept)
+            ('c1ccccc1.CCCCCCCCCC', 'CCCCCCCCCC'),
+            ('c1c2c3c4cc1.Br2.Cl3.Cl4', 'c1c2c3c4cc1.Br2.Cl3.Cl4'),
+            ('C1.C.C1', 'C1.C1'),
+            ('CCCC(.[Na+])C.O', 'CCCCC'),  # (dots in a branch)
+            ('CCN', 'CCN'),
+        ]
+
+        stripper = salts.SaltStripper()
+        for text, expected in tests:
+            self.assertEqual(stripper.select(text).replace('(.[Na+])', ''), expected, msg=text)
+            self.assertEqual(str(stripper.strip(text)), str(smiles.SMILES(expected)), msg=text)
+            self.assertEqual(str(salts.strip_salts(text)), str(smiles.SMILES(expected)), msg=text)
+
+        # custom salts
+        stripper = salts.SaltStripper(salts.DEFAULT_SALTS | {'CS(=O)(=O)O'})
+        self.assertEqual(stripper.select('CS(=O)(=O)O.NCCc1ccccc1'), 'NCCc1ccccc1')
+        self.assertEqual(salts.SaltStripper().select('CS(=O)(=O)O.NCCc1ccccc1'), 'NCCc1ccccc1')
+        self.assertEqual(salts.SaltStripper().select('CS(=O)(=O)O.NCC'), 'CS(=O)(=O)O')
+        self.assertEqual(str(salts.strip_salts('CS(=O)(=O)O.NCC', salts=['CS(=O)(=O)O'])), 'NCC')
+
+        # inorganic components
+        self.assertEqual(salts.SaltStripper(prefer_organic=True).select('[O-]S(=O)(=O)[O-].C.[Ba+2]'), 'C')
+        self.assertEqual(
+            salts.SaltStripper(salts=(), prefer_organic=False).select('[O-]S(=O)(=O)[O-].C.[Ba+2]'),
+            '[O-]S(=O)(=O)[O-]')
+
+    def test_same_as_fragments(self):
+        """Test that the kept component is the largest fragment of the parsed record"""
+
+        stripper = salts.SaltStripper(salts=(), prefer_organic=False)
+
+        for text in ['CCO.[Na+]', 'c1ccccc1.CCCCCCC.O', 'C1CC1.C%12.C%12', 'N1.CCC1.O.CC', 'Br.Cl.CCCC(=O)O']:
+            fragments = smiles.SMILES(text).fragments()
+            largest = max(fragments, key=lambda f: len(f.adjacency()))
+            self.assertEqual(str(stripper.strip(text)), str(largest), msg=text)
+
+    def test_strip_many(self):
+        """Test the records that cannot be parsed"""
+
+        stripper = salts.SaltStripper()
+        self.assertEqual([str(m) for m in stripper.strip_many(['CC.[Na+]', 'CCN'])], ['CC', 'CCN'])
+
+        with self.assertRaises(smiles_parser.ParserException):
+            stripper.strip_many(['CC.[Na+]', 'C(C.[Na+]'])
+
+        errors = []
+        molecules = stripper.strip_many(['CC.[Na+]', 'CC=.[Na+]', 'CC(N.[Na+]'], errors=errors)
+        self.assertEqual(str(molecules[0]), 'CC')
+        self.assertEqual(molecules[1:], [None, None])
+        self.assertEqual([i for i, _ in errors], [1, 2])
+
+        # (the components that are not kept are not checked)
+        self.assertEqual(str(stripper.strip('CCCC.[Xx+]')), 'CCCC')
@@ -0,0 +1,128 @@
+import copy
+import gc
+import pickle
+import weakref
+
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, smiles_ast
+
+
+class SmilesASTTestCase(OSmiPyTestCase):
+
+    def test_weak_links(self):
+        """Test that, with weak links, a molecule is freed without the cyclic garbage collector"""
+
+        def parse_and_drop(weak):
+            with smiles_ast.use_weak_links(weak):
+                s = smiles.SMILES('C1CC(=O)C(Cl)CC1')
+                chain = s.node.right.right
+
+                self.assertIs(chain.left.parent, chain)
+                self.assertIs(chain.left.atom.parent, chain.left)
+                self.assertIs(s.node.left.ring_bonds[0].target, chain.right.right.right.left)
+                self.assertEqual(repr(s), 'C1CC(=O)C(Cl)CC1')
+
+                return weakref.ref(s.node), weakref.ref(chain)
+
+        enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            refs = parse_and_drop(False)
+            self.assertIsNotNone(refs[0]())  # reference cycles
+            self.assertIsNotNone(refs[1]())
+
+            refs = parse_and_drop(True)
+            self.assertIsNone(refs[0]())
+            self.assertIsNone(refs[1]())
+        finally:
+            if enabled:
+                gc.enable()
+
+        self.assertFalse(smiles_ast.weak_links)
+
+    def test_weak_links_copy(self):
+        """Test that the copy of a molecule with weak links gets its own links"""
+
+        with smiles_ast.use_weak_links():
+            a = smiles.SMILES('c1ccccc1C(=O)O')
+            b = a + smiles.SMILES('[Na+]')
+
+        for s in [a, b, copy.deepcopy(a), pickle.loads(pickle.dumps(b))]:
+            for atom in s.atom_ids.values():
+                chain = atom.parent.parent
+                self.assertIs(chain.left, atom.parent)
+                self.assertIsInstance(chain._parent, (weakref.ref, type(None)))
+
+            rb = s.node.left.ring_bonds[0]
+            self.assertIs(rb.target.ring_bonds[0].target, s.node.left)
+
+        self.assertEqual(repr(b), 'c1ccccc1C(=O)O.[Na+]')
+        self.assertIsNot(b.node.left.atom.parent, a.node.left)
+
+    def test_atom_spec(self):
+        """Test that atoms with default properties share their spec"""
+
+        s = smiles.SMILES('CC(=O)[NH3+]')
+        atoms = [s.get_atom(i) for i in range(4)]
+
+        self.assertIs(atoms[0].spec, atoms[1].spec)
+        self.assertIs(atoms[0].spec, smiles_ast.Atom('C').spec)
+        self.assertIsNot(atoms[3].spec, smiles.SMILES('[NH3+]').get_atom(0).spec)
+        self.assertFalse(hasattr(atoms[0], '__dict__'))
+
+        self.assertFalse(atoms[0].is_bracketed())
+        self.assertTrue(atoms[3].is_bracketed())
+        self.assertTrue(smiles_ast.Atom('Zn').is_bracketed())
+        self.assertFalse(smiles_ast.Atom('*').is_bracketed())
+        self.assertTrue(smiles_ast.Atom('c').is_aromatic())
+        self.assertEqual(smiles_ast.Atom('c').atom_symbol(), 'C')
+
+        # changing an atom does not change the others
+        atoms[1].hcount = 2
+        self.assertEqual(atoms[1].hcount, 2)
+        self.assertEqual(atoms[0].hcount, 0)
+        self.assertEqual(repr(s), 'C[CH2](=O)[NH3+]')
+
+        with self.assertRaises(AttributeError):
+            atoms[0].spec.hcount = 1
+
+        # copies share the spec as well
+        c = copy.deepcopy(s)
+        self.assertIs(c.get_atom(0).spec, atoms[0].spec)
+        self.assertIsNot(c.get_atom(0), atoms[0])
+        self.assertIs(pickle.loads(pickle.dumps(s)).get_atom(0).spec, atoms[0].spec)
+
+    def test_bond_spec(self):
+        """Test the shared bond specs, and the comparison of bonds"""
+
+        s = smiles.SMILES('C=C/C=C\\C')
+        self.assertIs(s.node.bond.spec, smiles_ast.Bond('=').spec)
+        self.assertIs(s.node.bond.parent, s.node)
+
+        self.assertEqual(smiles_ast.Bond('=').bond_order(), 2)
+        self.assertEqual(smiles_ast.Bond().bond_order(), 1)
+        self.assertEqual(smiles_ast.Bond('.').bond_order(), 0)
+
+        for a, b, equal in [
+            ('/', '\\', True),
+            ('/', '/', True),
+            ('/', None, True),
+            ('-', None, True),
+            (None, None, False),
+            ('=', '=', True),
+            ('=', '#', False),
+            ('=', None, False),
+            ('-', '/', False),
+        ]:
+            self.assertEqual(smiles_ast.Bond(a) == smiles_ast.Bond(b), equal, msg=(a, b))
+            if b is not None:
+                self.assertEqual(smiles_ast.Bond(a) == b, equal, msg=(a, b))
+
+        self.assertTrue(smiles_ast.Bond('-') == None)  # noqa
+
+        b = smiles_ast.Bond('=')
+        b.symbol = '#'
+        self.assertEqual(b.bond_order(), 3)
+        self.assertEqual(smiles_ast.Bond('=').bond_order(), 2)
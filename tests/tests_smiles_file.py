@@ -0,0 +1,36 @@
+import os
+
+from tests import OSmiPyTestCase
+
+from osmipy import smiles_file
+
+
+class SMILESFileTestCase(OSmiPyTestCase):
+
+    def test_index_lines(self):
+        """Test the line-offset index"""
+
+        starts, ends = smiles_file.index_lines(b'CCO ethanol\r\n\nc1ccccc1\nN')
+        self.assertEqual(list(starts), [0, 14, 23])
+        self.assertEqual(list(ends), [11, 22, 24])
+
+    def test_smiles_file(self):
+        """Test random access to the records of a file"""
+
+        records = [('c1ccccc1', 'benzene'), ('CCO', 'ethanol'), ('[NH4+].[Cl-]', ''), ('N1CC2CCCC2CC1', 'x y')]
+        path = os.path.join(self.temporary_directory, 'test.smi')
+        with open(path, 'w') as f:
+            for smi, name in records:
+                f.write('{} {}\n'.format(smi, name))
+
+        with smiles_file.SMILESFile(path) as f:
+            self.assertEqual(len(f), len(records))
+
+            for i in (3, 0, 2, 1):
+                self.assertEqual(repr(f[i]), records[i][0])
+                self.assertEqual(f.text(i), records[i][0])
+                self.assertEqual(f.name(i), records[i][1])
+
+            # share the index
+            with smiles_file.SMILESFile(path, index=f.index) as g:
+                self.assertEqual([repr(s) for s in g], [r[0] for r in records])
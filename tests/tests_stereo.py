@@ -0,0 +1,80 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, stereo
+
+
+class StereoTestCase(OSmiPyTestCase):
+
+    def test_configuration(self):
+        """Test the configuration of the double bonds"""
+
+        tests = [
+            ('F/C=C/F', [(1, 2)], [(0, 3)], [stereo.TRANS]),
+            ('F/C=C\\F', [(1, 2)], [(0, 3)], [stereo.CIS]),
+            ('C(\\F)=C/F', [(0, 2)], [(1, 3)], [stereo.TRANS]),
+            ('C(/F)=C/F', [(0, 2)], [(1, 3)], [stereo.CIS]),
+            ('F/C=C/C=C\\Cl', [(1, 2), (3, 4)], [(0, 3), (2, 5)], [stereo.TRANS, stereo.CIS]),
+            ('C/C=C(/C)C', [(1, 2)], [(0, 3)], [stereo.TRANS]),
+            ('F/C(/Cl)=C/F', [(1, 3)], [(0, 4)], [stereo.TRANS]),
+            ('c1ccccc1/C=N/O', [(6, 7)], [(5, 8)], [stereo.TRANS]),
+            ('CC=CC', [(1, 2)], [(-1, -1)], [stereo.UNSPECIFIED]),
+            ('C/C=CC', [(1, 2)], [(0, -1)], [stereo.UNSPECIFIED]),
+            ('C=C', [], [], []),
+            ('CC(C)=O', [], [], []),
+            # ring bonds
+            ('C/1=C/CCCCCC1', [(0, 1)], [(7, 2)], [stereo.CIS]),
+            ('C1CCCCCC/C=C/1', [(7, 8)], [(6, 0)], [stereo.TRANS]),
+            ('C/1CCCCCC/C=C1', [(7, 8)], [(6, 0)], [stereo.CIS]),
+            ('C\\1CCCCCC/C=C/1', [(7, 8)], [(6, 0)], [stereo.TRANS]),
+            # conflicts
+            ('F/C(\\Cl)=C/F', [(1, 3)], [(0, 4)], [stereo.CONFLICT]),
+            ('C/1CCCCCC/C=C/1', [(7, 8)], [(6, 0)], [stereo.CONFLICT]),
+        ]
+
+        for text, bonds, references, codes in tests:
+            result = smiles.SMILES(text).double_bond_stereo()
+            self.assertEqual(result.bonds, bonds, msg=text)
+            self.assertEqual(result.references, references, msg=text)
+            self.assertEqual(result.codes.tolist(), codes, msg=text)
+
+        result = smiles.SMILES('F/C=C/F').double_bond_stereo()
+        self.assertEqual(result.configuration(1, 2), (stereo.TRANS, (0, 3)))
+        self.assertEqual(result.configuration(2, 1), (stereo.TRANS, (3, 0)))
+        with self.assertRaises(KeyError):
+            result.configuration(0, 1)
+
+    def test_spellings(self):
+        """Test that the configuration does not depend on the spelling"""
+
+        for text in ['F/C=C/C=C\\Cl', 'C/1=C/CCCCCC1', 'OC(=O)/C=C/c1ccccc1', 'C/C(Cl)=C(/F)Br']:
+            s = smiles.SMILES(text)
+            expected = sorted(s.double_bond_stereo().codes.tolist())
+
+            for other in s.randomized(20, seed=42):
+                self.assertEqual(
+                    sorted(smiles.SMILES(other).double_bond_stereo().codes.tolist()), expected, msg=(text, other))
+
+    def test_redundant(self):
+        """Test the directional bonds that do not give a configuration"""
+
+        tests = [
+            ('F/C=C/F', []),
+            ('C/C=C', [(0, 1)]),
+            ('C/C=CC', [(0, 1)]),
+            ('C/CC', [(0, 1)]),
+            ('C/C=C=C/C', [(0, 1), (3, 4)]),
+            ('F/C=C/C=C\\Cl', []),
+        ]
+
+        for text, expected in tests:
+            self.assertEqual(smiles.SMILES(text).double_bond_stereo().redundant, expected, msg=text)
+
+    def test_report(self):
+        """Test the report on a batch"""
+
+        molecules = [smiles.SMILES(t) for t in ['F/C=C/F', 'C/C=C\\C', 'F/C(\\Cl)=C/F', 'CC=CC', 'C/C', 'C']]
+        counter, conflicting = stereo.report(molecules)
+
+        self.assertEqual(counter, {'unspecified': 1, 'cis': 1, 'trans': 1, 'conflict': 1, 'redundant': 1})
+        self.assertEqual(conflicting, [2])
+        self.assertIs(molecules[0].double_bond_stereo(), molecules[0].double_bond_stereo())  # cached
@@ -0,0 +1,47 @@
+import os
+
+from tests import OSmiPyTestCase
+
+from osmipy import store, smiles, array_graph
+
+
+class StoreTestCase(OSmiPyTestCase):
+
+    def test_store(self):
+        """Test writing, appending and reading a store"""
+
+        path = os.path.join(self.temporary_directory, 'test.osms')
+        first = ['c1ccccc1', 'CC(=O)O', '[NH4+].[Cl-]']
+        second = ['N1CC2CCCC2CC1', 'C(/F)=C/F']
+
+        with store.StoreWriter(path) as w:
+            for i, smi in enumerate(first):
+                self.assertEqual(w.write(smiles.SMILES(smi)), i)
+
+        with store.MoleculeStore(path) as s:
+            self.assertEqual(len(s), len(first))
+            self.assertEqual(repr(s.smiles(1)), first[1])
+
+        with store.StoreWriter(path) as w:
+            w.write(smiles.SMILES(second[0]))
+            w.write(smiles.SMILES(second[1]).to_graph())
+
+        with store.MoleculeStore(path) as s:
+            self.assertEqual(len(s), len(first) + len(second))
+            self.assertEqual([repr(s.smiles(i)) for i in range(len(s))], first + second)
+            self.assertEqual(repr(s.smiles(-1)), second[-1])
+
+            g = s[0]
+            self.assertEqual(type(g.symbol), memoryview)  # no copy
+            self.assertEqual(g.symbols(), ['c'] * 6)
+            self.assertEqual(len(list(s)), len(s))
+
+            with self.assertRaises(IndexError):
+                s.graph(len(s))
+
+            del g
+
+        with self.assertRaises(store.StoreException):
+            with open(path, 'wb') as f:
+                f.write(array_graph.MAGIC)
+            store.MoleculeStore(path)
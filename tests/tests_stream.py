@@ -0,0 +1,78 @@
+import random
+
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, stream, generate, lexer, smiles_parser
+
+
+class StreamTestCase(OSmiPyTestCase):
+
+    def test_split_records(self):
+        """Test that the records can be split anywhere"""
+
+        text = 'c1ccccc1Cl name\nC%12CC%12Br\r\n\n[NH4+].[Cl-]\tchloride\nCCO'
+        expected = ['c1ccccc1Cl', 'C%12CC%12Br', '[NH4+].[Cl-]', 'CCO']
+
+        for i in range(len(text)):
+            for j in range(i, len(text)):
+                parser = stream.PushParser()
+                molecules = parser.feed(text[:i]) + parser.feed(text[i:j]) + parser.feed(text[j:]) + parser.close()
+                self.assertEqual([repr(m) for m in molecules], expected)
+
+        # given as soon as the record is complete
+        parser = stream.PushParser()
+        self.assertEqual(parser.feed('CC'), [])
+        self.assertEqual([repr(m) for m in parser.feed('l\nC')], ['CCl'])
+        self.assertEqual([repr(m) for m in parser.close()], ['C'])
+
+        # bytes
+        molecules = stream.iter_chunks([b'CC(=O', b')O\nc1ccc', b'cc1\n'])
+        self.assertEqual([repr(m) for m in molecules], ['CC(=O)O', 'c1ccccc1'])
+
+    def test_random_chunks(self):
+        """Test that the molecules and the errors are the same as with a full parse, whatever the chunks"""
+
+        g = generate.Generator(seed=42, percent_fraction=.5, ring_density=.3)
+        rng = random.Random(42)
+
+        records = [g.invalid()[0] if rng.random() < .2 else g.smiles() for _ in range(200)]
+        text = '\n'.join(r + rng.choice(['', ' name', '\r']) for r in records) + '\n'
+
+        expected, errors = [], []
+        for i, r in enumerate(records):
+            try:
+                expected.append(smiles.SMILES(r).to_bytes())
+            except (lexer.LexerException, smiles_parser.ParserException) as e:
+                errors.append((i, str(e)))
+
+        self.assertNotEqual(errors, [])
+
+        parser = stream.PushParser(skip_errors=True)
+        molecules = []
+        i = 0
+        while i < len(text):
+            n = rng.randint(1, 50)
+            molecules.extend(parser.feed(text[i:i + n]))
+            i += n
+
+        molecules.extend(parser.close())
+
+        self.assertEqual([m.to_bytes() for m in molecules], expected)
+        self.assertEqual([(i, str(e)) for i, e in parser.errors], errors)
+        self.assertEqual(parser.records, len(records))
+
+    def test_errors(self):
+        """Test that the error is raised, and that the parsing can go on"""
+
+        parser = stream.PushParser()
+
+        with self.assertRaises(lexer.LexerException):
+            parser.feed('CC\nC!C\nCO\n')
+
+        self.assertEqual([repr(m) for m in parser.feed('')], ['CC', 'CO'])
+
+        with self.assertRaises(smiles_parser.ParserException):
+            parser.feed('C1CC\nCN')
+
+        self.assertEqual([repr(m) for m in parser.close()], ['CN'])
+        self.assertEqual(parser.records, 5)
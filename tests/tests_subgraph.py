@@ -0,0 +1,79 @@
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, subgraph, generate, dedup, adjacency
+
+
+class SubgraphTestCase(OSmiPyTestCase):
+
+    def test_subgraph(self):
+        """Test the subgraphs, with hydrogens or wildcards in place of the cut bonds"""
+
+        s = smiles.SMILES('OC(=O)[C@@H](N)Cc1ccccc1')
+
+        tests = [
+            ([1, 2, 3, 4], 'C(=O)[CH2]N', 'C(*)(=O)[C@@H](N)*'),
+            ([3, 4, 5, 6, 7, 8, 9, 10, 11], '[CH2](N)Cc1ccccc1', '[C@H](*)(N)Cc1ccccc1'),
+            ([6, 7, 8, 9, 10, 11], 'c1ccccc1', 'c1(*)ccccc1'),
+            ([0, 1, 2, 6, 7, 8, 9, 10, 11], 'OC=O.c1ccccc1', 'OC(=O)*.c1(*)ccccc1'),
+            ([7, 8, 9, 10, 11], 'ccccc', 'c(*)cccc*'),
+            ([3], '[CH4]', '[C@H](*)(*)*'),
+        ]
+
+        for atom_ids, expected, expected_wildcards in tests:
+            self.assertEqual(str(s.subgraph(atom_ids)), expected, msg=atom_ids)
+            self.assertEqual(str(s.subgraph(reversed(atom_ids), wildcards=True)), expected_wildcards, msg=atom_ids)
+
+        # the atoms keep their ids
+        r = s.subgraph([3, 4, 5], wildcards=True)
+        self.assertEqual(list(r.atom_ids.keys()), [3, 4, 5, 12, 13])
+        self.assertEqual(r.next_atom_id, 14)
+        self.assertEqual(r.get_atom(4).symbol, 'N')
+
+        # bracketed atoms get the hydrogens, others follow their valence
+        self.assertEqual(str(smiles.SMILES('C=[N+]=C').subgraph([1])), '[NH4+]')
+        self.assertEqual(str(smiles.SMILES('CC(C)=O').subgraph([1, 3])), 'C=O')
+        self.assertEqual(str(smiles.SMILES('CC(C)=O').subgraph([0, 1, 2])), 'CCC')
+
+        # new ring closures
+        self.assertEqual(str(smiles.SMILES('C1CC2CCC1CC2').subgraph([0, 1, 2, 5, 6, 7])), 'C1CCCCC1')
+        self.assertEqual(str(smiles.SMILES('C%10CC%10').subgraph([0, 1, 2])), 'C1CC1')
+
+        with self.assertRaises(KeyError):
+            s.subgraph([0, 42])
+
+        # (the hub of a wheel of 101 atoms is written first, with a ring closure to all the atoms of the rim but one)
+        wheel = smiles.SMILES('C(C1)' + '(C12)(C21)' * 49 + '(C12)(C2)')
+        self.assertEqual(len(smiles.SMILES(str(wheel.subgraph(range(100)))).atom_ids), 100)
+        with self.assertRaises(adjacency.RingClosureException):
+            wheel.subgraph(range(102))
+
+    def test_chirality(self):
+        """Test that the subgraph of all the atoms is the same molecule, whatever the string"""
+
+        for text in generate.Generator(seed=7).stream(100):
+            s = smiles.SMILES(text)
+            key = dedup.canonical_key(s)
+            self.assertEqual(dedup.canonical_key(smiles.SMILES(str(s.subgraph(s.atom_ids.keys())))), key, msg=text)
+
+            for variant in s.randomized(2, seed=1):
+                v = smiles.SMILES(variant)
+                self.assertEqual(
+                    dedup.canonical_key(smiles.SMILES(str(v.subgraph(v.atom_ids.keys())))), key, msg=variant)
+
+    def test_subgraphs(self):
+        """Test the extraction of many subgraphs (the neighbourhoods of the atoms)"""
+
+        s = smiles.SMILES('OC(=O)[C@@H](N)Cc1ccccc1')
+        self.assertEqual(subgraph.neighbourhood(s, 3, 0), [3])
+        self.assertEqual(subgraph.neighbourhood(s, 3, 1), [1, 3, 4, 5])
+        self.assertEqual(subgraph.neighbourhood(s, 6, 2), [3, 5, 6, 7, 8, 10, 11])
+        self.assertEqual(subgraph.neighbourhood(smiles.SMILES('CC.O'), 0, 5), [0, 1])
+
+        index = s.adjacency()
+        selections = [subgraph.neighbourhood(s, i, 1) for i in s.atom_ids.keys()]
+        results = subgraph.subgraphs(s, selections, wildcards=True)
+
+        self.assertIs(s.adjacency(), index)
+        self.assertEqual(
+            [str(r) for r in results], [str(s.subgraph(atom_ids, wildcards=True)) for atom_ids in selections])
+        self.assertEqual(str(results[0]), 'OC(=*)*')
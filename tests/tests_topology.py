@@ -0,0 +1,90 @@
+import collections
+import unittest
+
+from tests import OSmiPyTestCase
+
+from osmipy import smiles, topology, generate
+
+
+def _distances(molecule):
+    """Distances by a breadth-first search from each atom"""
+
+    index = molecule.adjacency()
+    n = len(index)
+    distances = [[-1] * n for _ in range(n)]
+
+    for source in range(n):
+        distances[source][source] = 0
+        queue = collections.deque([source])
+        while queue:
+            i = queue.popleft()
+            for j in index.adjacent[i]:
+                if distances[source][j] < 0:
+                    distances[source][j] = distances[source][i] + 1
+                    queue.append(j)
+
+    return distances
+
+
+@unittest.skipIf(topology.numpy is None, 'numpy is not available')
+class TopologyTestCase(OSmiPyTestCase):
+
+    def test_distance_matrix(self):
+        """Test the distance matrix"""
+
+        s = smiles.SMILES('CC(C)CO.[Na+]')
+        d = s.distance_matrix()
+
+        self.assertEqual(d.tolist(), [
+            [0, 1, 2, 2, 3, -1],
+            [1, 0, 1, 1, 2, -1],
+            [2, 1, 0, 2, 3, -1],
+            [2, 1, 2, 0, 1, -1],
+            [3, 2, 3, 1, 0, -1],
+            [-1, -1, -1, -1, -1, 0],
+        ])
+
+        self.assertEqual(d.dtype, topology.numpy.int8)
+        self.assertIs(s.distance_matrix(), d)  # cached
+        self.assertFalse(d.flags.writeable)
+
+        d = smiles.SMILES('C' * 200).distance_matrix()
+        self.assertEqual(d.dtype, topology.numpy.int16)
+        self.assertEqual(d[0, 199], 199)
+
+        self.assertEqual(smiles.SMILES('c1ccccc1').distance_matrix()[0].tolist(), [0, 1, 2, 3, 2, 1])
+
+    def test_batch(self):
+        """Test that the batch gives the same distances as a search from each atom"""
+
+        records = list(generate.Generator(seed=42).stream(100)) + ['C', '[Na+].[Cl-]', 'C12C3C4C1C5C2C3C45']
+        molecules = [smiles.SMILES(r) for r in records]
+        molecules[3].distance_matrix()  # (already cached)
+
+        matrices = topology.distance_matrices(molecules)
+        for molecule, d in zip(molecules, matrices):
+            self.assertEqual(d.tolist(), _distances(molecule), msg=repr(molecule))
+            self.assertIs(molecule.distance_matrix(), d)
+
+        self.assertEqual(topology.distance_matrices([]), [])
+
+    def test_indices(self):
+        """Test the topological indices"""
+
+        hexane, benzene = smiles.SMILES('CCCCCC'), smiles.SMILES('c1ccccc1')
+        self.assertEqual(topology.wiener_index(hexane), 35)
+        self.assertEqual(topology.wiener_index(benzene), 27)
+        self.assertEqual(topology.wiener_index(smiles.SMILES('CC.CC')), 2)
+
+        self.assertEqual(topology.eccentricity(hexane).tolist(), [5, 4, 3, 3, 4, 5])
+        self.assertEqual((topology.radius(hexane), topology.diameter(hexane)), (3, 5))
+        self.assertEqual((topology.radius(benzene), topology.diameter(benzene)), (3, 3))
+
+        pairs = topology.atom_pairs(smiles.SMILES('OC[C@H](N)C'))
+        self.assertEqual(pairs, {
+            ('C', 'O', 1): 1, ('C', 'O', 3): 1, ('C', 'C', 2): 1, ('C', 'N', 2): 2, ('N', 'O', 3): 1,
+            ('C', '[CH]', 1): 2, ('N', '[CH]', 1): 1, ('O', '[CH]', 2): 1,
+        })
+        self.assertEqual(topology.atom_pairs(smiles.SMILES('OC[C@@H](N)C')), pairs)
+
+        self.assertEqual(topology.atom_pairs(hexane, max_distance=2), {('C', 'C', 1): 5, ('C', 'C', 2): 4})